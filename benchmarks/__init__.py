@@ -0,0 +1 @@
+"""离线基准测试：固定的页面样本、提取函数计时和回归检查"""
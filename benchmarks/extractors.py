@@ -0,0 +1,180 @@
+"""页面提取函数基准测试
+
+对每个站点的每个样本页面测量提取函数的耗时（多次运行取中位数）、吞吐量（条目/秒、
+HTML MB/秒）和 tracemalloc 峰值内存，并把提取结果与 golden.json 中记录的结果比对，
+确保优化没有改变输出。
+
+    python -m benchmarks.extractors                    # 运行并输出结果
+    python -m benchmarks.extractors --save-baseline    # 把本机结果保存为基线
+    python -m benchmarks.extractors --check            # 与基线比较，变慢超过阈值时返回非零退出码
+    python -m benchmarks.extractors --update-golden    # 提取逻辑有意改变后重新记录结果
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import importlib
+import argparse
+import statistics
+import tracemalloc
+
+from benchmarks.fixtures import SITES, fixture_names, load_fixture
+from benchmarks.loader import quiet
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_PATH = os.path.join(BENCH_DIR, 'golden.json')
+# 基线与机器相关，不提交到仓库
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+# 默认回归阈值：比基线慢 25% 或峰值内存多 25% 视为回归
+DEFAULT_THRESHOLD = 0.25
+
+
+def _twitter(module, html):
+    datalist, _ = module.get_tweet_data(html, set())
+    return datalist
+
+
+# 站点 -> (提取函数名, 调用方式)；IMDb 测量浏览器抓取时使用的 parse_movie_list
+EXTRACTORS = {
+    'amazon': ('get_product_data', lambda module, html: module.get_product_data(html)),
+    'twitter': ('get_tweet_data', _twitter),
+    'booking': ('extract_image_urls', lambda module, html: module.extract_image_urls(html)),
+    'imdb': ('parse_movie_list', lambda module, html: module.parse_movie_list(html)),
+    'allrecipes': ('get_image_urls', lambda module, html: module.get_image_urls(html)),
+}
+
+
+def digest(result):
+    """提取结果的规范化摘要（元组按列表处理）"""
+    text = json.dumps(result, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _load_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def run_case(site, name, repeat):
+    """测量一个样本，返回结果字典"""
+    module = importlib.import_module(f'crawlers.{site}')
+    function_name, call = EXTRACTORS[site]
+    html = load_fixture(site, name)
+
+    with quiet():
+        # 预热一次，排除首次调用的导入和缓存开销
+        result = call(module, html)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call(module, html)
+            timings.append(time.perf_counter() - started)
+
+        # 峰值内存单独测量，tracemalloc 会拖慢计时
+        tracemalloc.start()
+        call(module, html)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    seconds = statistics.median(timings)
+    return {
+        'case': f'{site}/{name}',
+        'function': function_name,
+        'items': len(result),
+        'html_bytes': len(html.encode('utf-8')),
+        'seconds': seconds,
+        'min_seconds': min(timings),
+        'items_per_second': len(result) / seconds if seconds else 0.0,
+        'mb_per_second': len(html.encode('utf-8')) / 1024 / 1024 / seconds if seconds else 0.0,
+        'peak_bytes': peak,
+        'digest': digest(result),
+    }
+
+
+def compare(results, baseline, threshold):
+    """与基线比较，返回回归描述列表"""
+    regressions = []
+    for row in results:
+        base = baseline.get(row['case'])
+        if not base:
+            continue
+        if row['seconds'] > base['seconds'] * (1 + threshold):
+            regressions.append(f"{row['case']}: 耗时 {base['seconds'] * 1000:.1f} ms -> {row['seconds'] * 1000:.1f} ms")
+        if row['peak_bytes'] > base['peak_bytes'] * (1 + threshold):
+            regressions.append(f"{row['case']}: 峰值内存 {base['peak_bytes'] / 1024:.0f} KB -> "
+                               f"{row['peak_bytes'] / 1024:.0f} KB")
+    return regressions
+
+
+def print_table(results, baseline=None):
+    print(f"{'样本':<22}{'函数':<20}{'条目':>6}{'HTML KB':>10}{'中位 ms':>10}{'条目/秒':>10}"
+          f"{'MB/秒':>8}{'峰值 KB':>10}{'对比基线':>10}")
+    for row in results:
+        change = ''
+        base = (baseline or {}).get(row['case'])
+        if base and base['seconds']:
+            change = f"{(row['seconds'] / base['seconds'] - 1) * 100:+.1f}%"
+        print(f"{row['case']:<22}{row['function']:<20}{row['items']:>6}{row['html_bytes'] / 1024:>10.1f}"
+              f"{row['seconds'] * 1000:>10.2f}{row['items_per_second']:>10.0f}{row['mb_per_second']:>8.2f}"
+              f"{row['peak_bytes'] / 1024:>10.0f}{change:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='页面提取函数基准测试')
+    parser.add_argument('--sites', nargs='+', choices=SITES, default=SITES)
+    parser.add_argument('--repeat', type=int, default=5, help='每个样本的计时次数（取中位数）')
+    parser.add_argument('--check', action='store_true', help='与基线比较，出现回归时返回非零退出码')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='回归阈值（比例）')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='基线文件路径')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线')
+    parser.add_argument('--update-golden', action='store_true', help='重新记录提取结果')
+    parser.add_argument('--json', help='把本次结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    results = [run_case(site, name, args.repeat) for site in args.sites for name in fixture_names(site)]
+    baseline = _load_json(args.baseline)
+    print_table(results, baseline)
+
+    failures = []
+    golden = _load_json(GOLDEN_PATH)
+    if args.update_golden:
+        golden.update({row['case']: {'items': row['items'], 'digest': row['digest']} for row in results})
+        _save_json(GOLDEN_PATH, golden)
+        print(f"已更新 {len(results)} 个样本的 golden 结果")
+    else:
+        for row in results:
+            expected = golden.get(row['case'])
+            if expected is None:
+                print(f"{row['case']}: 没有 golden 结果（使用 --update-golden 记录）")
+            elif expected['digest'] != row['digest']:
+                failures.append(f"{row['case']}: 提取结果与 golden 不一致 "
+                                f"(条目 {expected['items']} -> {row['items']})")
+
+    if args.json:
+        _save_json(args.json, {row['case']: row for row in results})
+    if args.save_baseline:
+        baseline.update({row['case']: row for row in results})
+        _save_json(args.baseline, baseline)
+        print(f"基线已保存到 {args.baseline}")
+    elif args.check:
+        if not baseline:
+            failures.append(f"基线文件不存在: {args.baseline}（先使用 --save-baseline 生成）")
+        failures.extend(compare(results, baseline, args.threshold))
+
+    for failure in failures:
+        print(f"失败: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,377 @@
+"""内存中的假 WebDriver
+
+不启动 Chrome 就能运行和测量爬取循环（翻页、滚动、等待策略和终止条件）。FakeWebDriver
+实现爬虫用到的 WebDriver 接口：get、page_source、find_element(s)、execute_script 中的
+滚动和页面高度查询、元素的 send_keys(END/HOME) 和 click、current_url、add_cookie、
+标签页切换以及 CDP/日志相关的空实现。页面由 FakeSite 按URL提供，无限滚动页面每次
+滚动到底部后增加一批条目；页面加载和滚动的延迟记在 VirtualClock 上而不是真正等待。
+"""
+import re
+import time
+import contextlib
+from types import SimpleNamespace
+from urllib.parse import urljoin, urlsplit, parse_qs
+
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import NoSuchElementException, NoSuchWindowException
+
+from benchmarks.fixtures import amazon_serp, twitter_search_start, twitter_timeline, booking_attractions, imdb_chart, allrecipes_search
+
+# 生成的页面按参数缓存，预热之后测量的是循环本身而不是页面生成
+_render_cache = {}
+
+BLANK_PAGE = '<!DOCTYPE html><html><head><title></title></head><body></body></html>'
+
+# 页面高度模型：基础高度 + 每批条目的高度
+BASE_HEIGHT = 2000
+STEP_HEIGHT = 1600
+
+
+class VirtualClock:
+    """记录等待而不真正等待；scale 大于 0 时按比例真实等待（例如 0.01 表示 1%）"""
+
+    def __init__(self, scale=0.0):
+        self.scale = scale
+        self.waited = 0.0
+        self.sleeps = 0
+
+    def sleep(self, seconds):
+        seconds = max(0.0, seconds)
+        self.waited += seconds
+        self.sleeps += 1
+        if self.scale:
+            time.sleep(seconds * self.scale)
+
+
+@contextlib.contextmanager
+def patched(module, **attributes):
+    """临时替换模块属性，退出时恢复"""
+    missing = object()
+    saved = {name: getattr(module, name, missing) for name in attributes}
+    for name, value in attributes.items():
+        setattr(module, name, value)
+    try:
+        yield module
+    finally:
+        for name, value in saved.items():
+            if value is missing:
+                delattr(module, name)
+            else:
+                setattr(module, name, value)
+
+
+@contextlib.contextmanager
+def virtual_sleep(module, clock):
+    """把模块中 time.sleep 的调用改为记在 clock 上（time 的其他函数不变）"""
+    proxy = SimpleNamespace(**{name: getattr(time, name) for name in dir(time) if not name.startswith('_')})
+    proxy.sleep = clock.sleep
+    names = {name: proxy for name, value in vars(module).items() if value is time}
+    with patched(module, **names):
+        yield clock
+
+
+class FakePage:
+    """一个页面：render(step) 返回第 step 次滚动加载后的HTML，max_steps 为可加载的批数"""
+
+    def __init__(self, render, max_steps=0, load_delay=0.5, scroll_delay=0.3):
+        self.render = render
+        self.max_steps = max_steps
+        self.load_delay = load_delay
+        self.scroll_delay = scroll_delay
+
+
+class FakeSite:
+    """按URL提供页面；route(path, query) 返回 FakePage，未知URL得到空白页"""
+
+    def __init__(self, route):
+        self.route = route
+
+    def page(self, url):
+        parts = urlsplit(url)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        return self.route(parts.path, query) or FakePage(lambda step: BLANK_PAGE)
+
+
+def fake_site(site, pages=5, page_size=24, scroll_batch=20, scroll_steps=10, load_delay=0.5, scroll_delay=0.3):
+    """各站点的假页面：分页站点共 pages 页，无限滚动页面共可加载 scroll_steps 批"""
+    def cached(generator, *args, **kwargs):
+        key = (generator.__name__, args, tuple(sorted(kwargs.items())))
+        if key not in _render_cache:
+            _render_cache[key] = generator(*args, **kwargs)
+        return _render_cache[key]
+
+    def static(html):
+        return FakePage(lambda step: html, load_delay=load_delay, scroll_delay=scroll_delay)
+
+    def scrolling(render):
+        return FakePage(render, max_steps=scroll_steps, load_delay=load_delay, scroll_delay=scroll_delay)
+
+    def amazon(path, query):
+        page = int(query.get('page', 1))
+        if path == '/s' and page <= pages:
+            return static(cached(amazon_serp, page_size, page=page, has_next=page < pages))
+        return None
+
+    def twitter(path, query):
+        if path == '/search':
+            start = twitter_search_start(query.get('q', ''))
+            return scrolling(lambda step: cached(twitter_timeline, scroll_batch * (step + 1), start=start))
+        return static(BLANK_PAGE.replace('<body>', '<body><main>Home</main>'))
+
+    def booking(path, query):
+        if path.startswith('/attractions/searchresults/'):
+            return scrolling(lambda step: cached(booking_attractions, scroll_batch * (step + 1)))
+        return None
+
+    def imdb(path, query):
+        if path.rstrip('/') == '/chart/top':
+            return static(cached(imdb_chart, 250))
+        return None
+
+    def allrecipes(path, query):
+        offset = int(query.get('offset', 0))
+        if path == '/search':
+            return static(cached(allrecipes_search, min(page_size, max(0, pages * page_size - offset)), offset=offset))
+        return None
+
+    return FakeSite({'amazon': amazon, 'twitter': twitter, 'booking': booking,
+                     'imdb': imdb, 'allrecipes': allrecipes}[site])
+
+
+class FakeElement:
+    """页面元素：基于 BeautifulSoup 标签"""
+
+    def __init__(self, driver, tag):
+        self._driver = driver
+        self._tag = tag
+
+    @property
+    def tag_name(self):
+        return self._tag.name
+
+    @property
+    def text(self):
+        return self._tag.get_text(' ', strip=True)
+
+    def get_attribute(self, name):
+        value = self._tag.get(name)
+        if isinstance(value, list):
+            value = ' '.join(value)
+        if name in ('href', 'src') and value:
+            value = urljoin(self._driver.current_url, value)
+        return value
+
+    def is_displayed(self):
+        return True
+
+    def send_keys(self, *keys):
+        self._driver.calls['send_keys'] += 1
+        text = ''.join(keys)
+        if Keys.END in text:
+            self._driver._scroll_to_bottom()
+        elif Keys.HOME in text:
+            self._driver._tab['scroll_y'] = 0
+
+    def click(self):
+        href = self.get_attribute('href') if self._tag.name == 'a' else None
+        if href:
+            self._driver.get(href)
+
+    def find_element(self, by, value):
+        return self._driver._find(by, value, self._tag, single=True)
+
+    def find_elements(self, by, value):
+        return self._driver._find(by, value, self._tag, single=False)
+
+
+class _SwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def window(self, handle):
+        if handle not in self._driver._tabs:
+            raise NoSuchWindowException(f'no such window: {handle}')
+        self._driver._current = handle
+
+    def new_window(self, type_hint=None):
+        self._driver._open_tab()
+
+
+class FakeWebDriver:
+    """假 WebDriver；calls 记录各接口的调用次数"""
+
+    XPATH_CLASS_RE = re.compile(r"^//(\w+|\*)\[contains\(@class,\s*'([^']+)'\)\]$")
+
+    def __init__(self, site, clock=None, options=None):
+        self.site = site
+        self.clock = clock or VirtualClock()
+        self.options = options
+        self.cookies = []
+        self.calls = {'get': 0, 'page_source': 0, 'find': 0, 'execute_script': 0, 'send_keys': 0, 'scroll': 0}
+        self.switch_to = _SwitchTo(self)
+        self.service = None
+        self._tabs = {}
+        self._next_handle = 1
+        self._current = None
+        self._soup_cache = (None, None)
+        self._open_tab()
+
+    # 标签页
+
+    def _open_tab(self):
+        handle = f'FAKE-TAB-{self._next_handle}'
+        self._next_handle += 1
+        self._tabs[handle] = {'url': 'about:blank', 'page': FakePage(lambda step: BLANK_PAGE), 'step': 0, 'scroll_y': 0}
+        self._current = handle
+        return handle
+
+    @property
+    def _tab(self):
+        if self._current not in self._tabs:
+            raise NoSuchWindowException('no such window: target window already closed')
+        return self._tabs[self._current]
+
+    @property
+    def current_window_handle(self):
+        self._tab  # 当前标签页已关闭时抛出 NoSuchWindowException
+        return self._current
+
+    @property
+    def window_handles(self):
+        return list(self._tabs)
+
+    def close(self):
+        self._tabs.pop(self._current, None)
+
+    def quit(self):
+        self._tabs.clear()
+
+    # 导航
+
+    def _navigate(self, url, delay=True):
+        page = self.site.page(url)
+        if delay:
+            self.clock.sleep(page.load_delay)
+        self._tabs[self._current] = {'url': url, 'page': page, 'step': 0, 'scroll_y': 0}
+
+    def get(self, url):
+        self.calls['get'] += 1
+        self._navigate(url)
+
+    def refresh(self):
+        self._navigate(self._tab['url'])
+
+    @property
+    def current_url(self):
+        return self._tab['url']
+
+    @property
+    def title(self):
+        soup = self._soup()
+        return soup.title.get_text() if soup.title else ''
+
+    @property
+    def page_source(self):
+        self.calls['page_source'] += 1
+        return self._html()
+
+    def _html(self):
+        tab = self._tab
+        return tab['page'].render(tab['step'])
+
+    def _soup(self):
+        html = self._html()
+        if self._soup_cache[0] is not html:
+            self._soup_cache = (html, BeautifulSoup(html, 'html.parser'))
+        return self._soup_cache[1]
+
+    # 滚动
+
+    def _height(self):
+        return BASE_HEIGHT + self._tab['step'] * STEP_HEIGHT
+
+    def _scroll_to_bottom(self):
+        """滚动到底部；无限滚动页面还有未加载的批次时加载下一批"""
+        tab = self._tab
+        self.calls['scroll'] += 1
+        tab['scroll_y'] = self._height()
+        if tab['step'] < tab['page'].max_steps:
+            self.clock.sleep(tab['page'].scroll_delay)
+            tab['step'] += 1
+
+    def execute_script(self, script, *args):
+        self.calls['execute_script'] += 1
+        if 'scrollHeight' in script and script.lstrip().startswith('return'):
+            return self._height()
+        if 'arguments[0].click()' in script and args:
+            return args[0].click()
+        if 'window.location.href' in script and args:
+            return self._navigate(args[0], delay=False)
+        if 'scrollTo' in script or 'scrollBy' in script:
+            match = re.search(r'scrollBy\(\s*0\s*,\s*(\d+)', script)
+            tab = self._tab
+            tab['scroll_y'] = tab['scroll_y'] + int(match.group(1)) if match else self._height()
+            if tab['scroll_y'] >= self._height():
+                self._scroll_to_bottom()
+            return None
+        return None
+
+    # 查找元素
+
+    def _find(self, by, value, root=None, single=False):
+        self.calls['find'] += 1
+        root = root if root is not None else self._soup()
+        if by == By.CSS_SELECTOR:
+            tags = root.select(value)
+        elif by == By.TAG_NAME:
+            tags = root.find_all(value)
+        elif by == By.CLASS_NAME:
+            tags = root.select('.' + value)
+        elif by == By.ID:
+            tags = root.select('#' + value)
+        elif by in (By.LINK_TEXT, By.PARTIAL_LINK_TEXT):
+            tags = [a for a in root.find_all('a')
+                    if (value in a.get_text() if by == By.PARTIAL_LINK_TEXT else a.get_text().strip() == value)]
+        elif by == By.XPATH:
+            match = self.XPATH_CLASS_RE.match(value)
+            tags = root.select(f"{'' if match.group(1) == '*' else match.group(1)}[class*='{match.group(2)}']") \
+                if match else []
+        else:
+            tags = []
+
+        elements = [FakeElement(self, tag) for tag in tags]
+        if single:
+            if not elements:
+                raise NoSuchElementException(f'no such element: {by}={value}')
+            return elements[0]
+        return elements
+
+    def find_element(self, by=By.ID, value=None):
+        return self._find(by, value, single=True)
+
+    def find_elements(self, by=By.ID, value=None):
+        return self._find(by, value, single=False)
+
+    # 其他接口
+
+    def add_cookie(self, cookie):
+        self.cookies.append(dict(cookie))
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+    def execute_cdp_cmd(self, command, params):
+        if command == 'Runtime.getHeapUsage':
+            return {'usedSize': 20 * 1024 * 1024 + self._tab['step'] * 2 * 1024 * 1024, 'totalSize': 0}
+        return {}
+
+    def get_log(self, log_type):
+        return []
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def implicitly_wait(self, seconds):
+        pass
@@ -0,0 +1,234 @@
+"""各站点页面样本生成器
+
+按真实页面的结构（以及提取函数依赖的选择器）生成确定性的HTML：亚马逊搜索结果页、
+X 搜索时间线、Booking 景点列表、IMDb 榜单和 Allrecipes 搜索页。每个页面都带有导航、
+脚本、样式等与提取无关的内容，使解析开销接近真实页面。同样的参数总是生成同样的HTML，
+生成的页面保存在 benchmarks/fixtures/ 下；放入该目录的 <站点>_<名称>.html 真实页面也会被测试。
+"""
+import os
+import random
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+SITES = ['amazon', 'twitter', 'booking', 'imdb', 'allrecipes']
+
+# 样本规模：每页的条目数（商品、推文、景点、电影、食谱）
+SIZES = {'small': 16, 'medium': 60, 'large': 250}
+
+WORDS = ('smoke fire grill pizza cheese tomato basil garden river mountain city night light '
+         'classic deluxe portable wireless organic fresh crispy spicy golden silver tour museum '
+         'castle temple market harbor sunset journey story legend shadow storm').split()
+
+
+def _rng(site, start, seed):
+    return random.Random(f'{site}:{start}:{seed}')
+
+
+def _words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def _token(rng, length=11):
+    return ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789') for _ in range(length))
+
+
+def _page(title, body, site):
+    """外层页面：head 中的样式和脚本、导航栏、页脚，与提取无关但参与解析"""
+    styles = '\n'.join(f'.{site}-c{i}{{margin:{i}px;padding:{i % 7}px}}' for i in range(120))
+    scripts = '\n'.join(f'<script>window.__{site}_{i}={{"k":{i},"v":"{"x" * 40}"}};</script>' for i in range(20))
+    nav = ''.join(f'<li class="nav-item"><a href="/nav/{i}">{site} {i}</a></li>' for i in range(30))
+    footer = ''.join(f'<a class="footer-link" href="/help/{i}">Help {i}</a>' for i in range(40))
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{title}</title>'
+            f'<style>{styles}</style>{scripts}</head><body>'
+            f'<header><nav><ul>{nav}</ul></nav>'
+            f'<img class="nav-logo" src="data:image/gif;base64,R0lGODlhAQABAAAAACw="></header>'
+            f'<main>{body}</main><footer>{footer}</footer></body></html>')
+
+
+def amazon_serp(count, page=1, seed=0, base='', has_next=True):
+    """亚马逊搜索结果页：div[data-component-type=s-search-result] 中的 img.s-image
+
+    base 为站内链接的路径前缀（替身服务器上的站点前缀），has_next 为 False 时没有下一页按钮。
+    """
+    rng = _rng('amazon', page, seed)
+    items = []
+    for i in range(count):
+        index = (page - 1) * count + i
+        asin = f'B0{index:08d}'
+        image_id = _token(rng)
+        src = f'https://m.media-amazon.com/images/I/{image_id}._AC_UL320_.jpg'
+        srcset = ', '.join(f'https://m.media-amazon.com/images/I/{image_id}._AC_UL{320 * k}_.jpg {k}x'
+                           for k in (1, 2, 3))
+        # 赞助商品、占位条目没有 ASIN
+        asin_attr = '' if rng.random() < 0.05 else asin
+        items.append(
+            f'<div data-asin="{asin_attr}" data-index="{i}" data-component-type="s-search-result" '
+            f'class="s-result-item s-asin sg-col-4-of-24"><div class="sg-col-inner"><span class="rush-component">'
+            f'<a class="a-link-normal s-no-outline" href="/dp/{asin}"><div class="a-section aok-relative s-image-fixed-height">'
+            f'<img class="s-image" src="{src}" srcset="{srcset}" alt="{_words(rng, 6)}"></div></a></span>'
+            f'<h2 class="a-size-mini"><a href="/dp/{asin}"><span class="a-size-base-plus">{_words(rng, 12)}</span></a></h2>'
+            f'<div class="a-row"><span class="a-icon-alt">{rng.randint(30, 50) / 10} out of 5 stars</span>'
+            f'<span class="a-size-base s-underline-text">{rng.randint(1, 90000):,}</span></div>'
+            f'<div class="a-row"><span class="a-price"><span class="a-offscreen">${rng.randint(5, 400)}.99</span></span></div>'
+            f'</div></div>')
+    pagination = (f'<span class="s-pagination-strip"><a class="s-pagination-item s-pagination-next" '
+                  f'href="{base}/s?k=smoke&page={page + 1}">Next</a></span>') if has_next else ''
+
+    body = f'<div class="s-main-slot s-result-list">{"".join(items)}</div>{pagination}'
+    return _page('Amazon.com : smoke', body, 'amazon')
+
+
+# 时间线第 0 条推文的ID；与真实的 X 一样，越往下滚动推文越早、ID 越小
+TWEET_ID_BASE = 1790000000000000000
+
+
+def twitter_search_start(q):
+    """搜索词中 max_id:N 游标对应的时间线起点（第一条 ID 不大于 N 的推文），没有游标时为 0"""
+    for term in q.split():
+        if term.startswith('max_id:') and term[len('max_id:'):].isdigit():
+            return max(0, TWEET_ID_BASE - int(term[len('max_id:'):]))
+    return 0
+
+
+def tweet_articles(start, count, seed=0):
+    """X 时间线中的推文 article 片段（无限滚动时逐段追加）"""
+    rng = _rng('twitter', start, seed)
+    articles = []
+    for i in range(start, start + count):
+        tweet_id = TWEET_ID_BASE - i
+        user = f'user_{rng.randint(1, 99999)}'
+        stats = ''.join(f'<div role="group"><button data-testid="{name}"><span data-testid="app-text-transition-container">'
+                        f'{rng.randint(0, 5000)}</span></button></div>'
+                        for name in ('reply', 'retweet', 'like'))
+        articles.append(
+            f'<div data-testid="cellInnerDiv"><article role="article" data-testid="tweet" tabindex="0">'
+            f'<div class="css-175oi2r"><div data-testid="User-Name"><a href="/{user}"><span>{_words(rng, 2).title()}</span>'
+            f'<span>@{user}</span></a></div>'
+            f'<a href="/{user}/status/{tweet_id}"><time datetime="2025-06-{1 + i % 28:02d}T{i % 24:02d}:00:00.000Z">'
+            f'Jun {1 + i % 28}</time></a></div>'
+            f'<div data-testid="tweetText" lang="en"><span>{_words(rng, rng.randint(8, 40))}</span></div>'
+            f'{stats}</article></div>')
+    return ''.join(articles)
+
+
+def twitter_timeline(count, start=0, seed=0):
+    """X 搜索时间线：article 中的 /status/ 链接、User-Name、tweetText、time 和互动数"""
+    body = (f'<div aria-label="Timeline: Search timeline"><div style="position:relative">'
+            f'{tweet_articles(start, count, seed)}</div></div>')
+    return _page('smoke - Search / X', body, 'twitter')
+
+
+def booking_cards(start, count, seed=0):
+    """Booking 景点卡片片段，混有延迟加载图片、协议相对地址、站内相对地址和 base64 占位图"""
+    rng = _rng('booking', start, seed)
+    cards = []
+    for i in range(start, start + count):
+        photo = 100000000 + i
+        key = _token(rng, 16)
+        kind = i % 4
+        if kind == 0:
+            img = f'<img data-src="https://cf.bstatic.com/xdata/images/xphoto/square240/{photo}.jpg?k={key}" src="data:image/gif;base64,R0lGOD">'
+        elif kind == 1:
+            img = f'<img src="//cf.bstatic.com/xdata/images/xphoto/max500/{photo}.jpg?k={key}" width="500" height="375">'
+        elif kind == 2:
+            img = f'<img src="https://cf.bstatic.com/xdata/images/xphoto/max300/{photo}.jpg?k={key}" width="300" height="225">'
+        else:
+            img = f'<img src="/static/img/icons/attraction-{i % 12}.png" width="16" height="16">'
+        cards.append(
+            f'<div data-testid="card" class="css-card"><a href="/attractions/jp/pr{photo}.html">{img}</a>'
+            f'<h3 class="css-title">{_words(rng, 5).title()}</h3><div class="css-rating">{rng.randint(70, 99) / 10}</div>'
+            f'<div class="css-price">From ¥{rng.randint(1000, 30000):,}</div></div>')
+    return ''.join(cards)
+
+
+def booking_attractions(count, start=0, seed=0):
+    """Booking 景点搜索结果页：所有 img 标签（data-src 优先）"""
+    body = f'<div data-testid="search-results">{booking_cards(start, count, seed)}</div>'
+    return _page('Attractions in Osaka', body, 'booking')
+
+
+def imdb_chart(count, seed=0):
+    """IMDb 榜单页：li.ipc-metadata-list-summary-item 中的排名、标题、元数据、评分和海报"""
+    rng = _rng('imdb', 0, seed)
+    items = []
+    for i in range(count):
+        title_id = f'tt{100000 + i * 37:07d}'
+        poster = _token(rng, 30)
+        src = f'https://m.media-amazon.com/images/M/MV5B{poster}@._V1_QL75_UX140_CR0,1,140,207_.jpg'
+        srcset = ', '.join(f'https://m.media-amazon.com/images/M/MV5B{poster}@._V1_QL75_UX{w}_CR0,1,{w},{w * 3 // 2}_.jpg {w}w'
+                           for w in (140, 210, 280, 380))
+        title = _words(rng, rng.randint(1, 4)).title()
+        items.append(
+            f'<li class="ipc-metadata-list-summary-item sc-10233bc-0"><div class="ipc-metadata-list-summary-item__c">'
+            f'<div class="ipc-poster"><img alt="{title}" class="ipc-image" loading="lazy" src="{src}" srcset="{srcset}" '
+            f'sizes="50vw" width="140"></div>'
+            f'<div class="ipc-title ipc-title--base"><a href="/title/{title_id}/?ref_=chttp_t_{i + 1}" class="ipc-title-link-wrapper">'
+            f'<div class="ipc-title__text">{i + 1}. {title}</div></a></div>'
+            f'<div class="cli-title-metadata"><span class="cli-title-metadata-item">{1950 + i % 75}</span>'
+            f'<span class="cli-title-metadata-item">{1 + i % 3}h {i % 60}m</span>'
+            f'<span class="cli-title-metadata-item">{rng.choice(["R", "PG-13", "PG"])}</span></div>'
+            f'<span class="ipc-rating-star ipc-rating-star--imdb">{rng.randint(75, 93) / 10}'
+            f'<span class="ipc-rating-star--voteCount">&nbsp;({rng.randint(1, 30)}M)</span></span>'
+            f'<div class="ipc-title__subtext">{_words(rng, 4).title()}</div></div></li>')
+    body = f'<ul class="ipc-metadata-list ipc-metadata-list--dividers-between">{"".join(items)}</ul>'
+    return _page('IMDb Top 250 Movies', body, 'imdb')
+
+
+def allrecipes_search(count, offset=0, seed=0):
+    """Allrecipes 搜索页：延迟加载的 /thmb/ 缩略图（data-src、data-srcset）和站内图标"""
+    rng = _rng('allrecipes', offset, seed)
+    cards = []
+    for i in range(offset, offset + count):
+        sig = _token(rng, 27)
+        name = f'{100000 + i}-{_words(rng, 1)}.jpg'
+        src = f'https://www.allrecipes.com/thmb/{sig}=/282x188/filters:no_upscale():max_bytes(150000):strip_icc()/{name}'
+        srcset = ', '.join(f'https://www.allrecipes.com/thmb/{sig}=/{w}x{w * 2 // 3}/filters:no_upscale()/{name} {w}w'
+                           for w in (282, 375, 750))
+        cards.append(
+            f'<a class="comp mntl-card-list-items mntl-document-card" href="https://www.allrecipes.com/recipe/{100000 + i}/">'
+            f'<div class="card__media"><img data-src="{src}" data-srcset="{srcset}" width="282" height="188" '
+            f'src="data:image/svg+xml,%3Csvg%3E" class="lazyload card__img"></div>'
+            f'<div class="card__content"><span class="card__title-text">{_words(rng, 4).title()}</span>'
+            f'<div class="mntl-recipe-star-rating"><img src="/img/icons/star.svg" width="12" height="12">'
+            f'</div><div class="mntl-recipe-card-meta">{rng.randint(2, 4000)} Ratings</div></div></a>')
+    body = f'<div id="mntl-search-results_1-0" class="comp mntl-search-results">{"".join(cards)}</div>'
+    return _page('Pizza Recipes', body, 'allrecipes')
+
+
+GENERATORS = {
+    'amazon': amazon_serp,
+    'twitter': twitter_timeline,
+    'booking': booking_attractions,
+    'imdb': imdb_chart,
+    'allrecipes': allrecipes_search,
+}
+
+
+def fixture_path(site, name):
+    return os.path.join(FIXTURE_DIR, f'{site}_{name}.html')
+
+
+def load_fixture(site, name):
+    """读取保存的样本页面；标准规模的样本不存在时生成并保存"""
+    path = fixture_path(site, name)
+    if not os.path.exists(path):
+        if name not in SIZES:
+            raise FileNotFoundError(path)
+        os.makedirs(FIXTURE_DIR, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(GENERATORS[site](SIZES[name]))
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def fixture_names(site):
+    """站点的所有样本：标准规模加上目录中额外保存的页面"""
+    names = list(SIZES)
+    if os.path.isdir(FIXTURE_DIR):
+        prefix = f'{site}_'
+        for filename in sorted(os.listdir(FIXTURE_DIR)):
+            if filename.startswith(prefix) and filename.endswith('.html'):
+                name = filename[len(prefix):-len('.html')]
+                if name not in names:
+                    names.append(name)
+    return names
@@ -0,0 +1,33 @@
+"""基准测试的公共工具：临时工作目录和安静模式
+
+插件模块导入时不创建文件，但运行任务会创建图片目录、结果库和下载队列，
+基准测试在临时工作目录中运行，不会在仓库中留下任何文件。
+"""
+import os
+import atexit
+import shutil
+import logging
+import tempfile
+import contextlib
+
+_work_dir = None
+
+
+def work_dir():
+    """本进程共用的临时工作目录，进程退出时删除"""
+    global _work_dir
+    if _work_dir is None:
+        _work_dir = tempfile.mkdtemp(prefix='crawler-bench-')
+        atexit.register(shutil.rmtree, _work_dir, ignore_errors=True)
+    return _work_dir
+
+
+@contextlib.contextmanager
+def quiet():
+    """屏蔽提取函数的逐条日志和 print 输出，只测量解析本身"""
+    logging.disable(logging.INFO)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,144 @@
+"""爬取控制循环基准测试（使用假 WebDriver，不启动 Chrome）
+
+用共享的编排器（crawlers/engine.py 的 run_jobs）运行各站点插件的 discover 循环：Amazon 翻页、
+Twitter 和 Booking 的无限滚动、IMDb 榜单滚动以及 Allrecipes 浏览器逐页翻页。插件和编排器中的
+time.sleep 记在虚拟时钟上，因此报告分为两部分：循环本身的实际耗时（毫秒）和等待策略要求的等待时间（秒），
+以及循环轮数、新结果条数和各 WebDriver 接口的调用次数。图片下载被替换为跳过。
+
+    python -m benchmarks.loops
+    python -m benchmarks.loops --cases booking twitter --repeat 5 --scroll-steps 20
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import statistics
+
+import politeness
+import browser_daemon
+from crawlers import engine
+from benchmarks.loader import quiet, work_dir
+from benchmarks.fake_webdriver import FakeWebDriver, VirtualClock, fake_site, patched, virtual_sleep
+
+
+class LoopRun:
+    """一次循环运行的上下文：创建假浏览器并汇总其调用次数"""
+
+    def __init__(self, site, clock, **site_options):
+        self.site = fake_site(site, **site_options)
+        self.clock = clock
+        self.drivers = []
+        self.items = 0
+
+    def new_driver(self, options=None, **kwargs):
+        driver = FakeWebDriver(self.site, self.clock, options)
+        self.drivers.append(driver)
+        return driver
+
+    def calls(self):
+        total = {}
+        for driver in self.drivers:
+            for name, count in driver.calls.items():
+                total[name] = total.get(name, 0) + count
+        return total
+
+
+def fake_load_cookies(module):
+    def load_cookies(driver):
+        driver.get(module.BASE_URL)
+        driver.add_cookie({'name': 'auth_token', 'value': 'fake'})
+        driver.refresh()
+    return load_cookies
+
+
+# 站点 -> 插件模块属性的替换：不发起真实的 HTTP 请求（JSON 快速通道、详情补全、并发 offset 请求）
+OVERRIDES = {
+    'amazon': lambda module: {},
+    'twitter': lambda module: {'load_cookies': fake_load_cookies(module)},
+    'booking': lambda module: {},
+    'imdb': lambda module: {'USE_JSON_FAST_PATH': False, 'ENRICH_TITLE_DETAILS': False},
+    'allrecipes': lambda module: {'PARALLEL_OFFSET_MODE': False},
+}
+
+CASES = list(OVERRIDES)
+
+
+def run_case(site, args):
+    module = importlib.import_module(f'crawlers.{site}')
+    site_options = {'pages': args.pages, 'scroll_steps': args.scroll_steps}
+    options = {'max_scrolls': args.max_scrolls} if site == 'booking' else {}
+
+    def once():
+        clock = VirtualClock()
+        run = LoopRun(site, clock, **site_options)
+        engine_overrides = {'PARSE_IN_PROCESS_POOL': False} if args.inline_parse else {}
+        # 假页面使用真实站点的URL，限速会让循环真正休眠；也不连接可能在运行的守护浏览器
+        with quiet(), virtual_sleep(module, clock), virtual_sleep(engine, clock), \
+                patched(module, **OVERRIDES[site](module)), patched(engine, **engine_overrides), \
+                patched(engine.DownloadEngine, download=lambda self, crawler, asset: ''), \
+                patched(politeness, ENABLED=False), patched(browser_daemon, ENABLED=False):
+            started = time.perf_counter()
+            results = engine.run_jobs([site], browsers=1, launcher=run.new_driver, options=options)
+            elapsed = time.perf_counter() - started
+        if not results.get(site):
+            raise RuntimeError(f"{site} 任务失败")
+        run.items = results[site][1]
+        return run, elapsed
+
+    cwd = os.getcwd()
+    os.chdir(work_dir())
+    try:
+        # 预热：生成页面缓存、启动解析进程等一次性开销
+        once()
+        runs = [once() for _ in range(args.repeat)]
+    finally:
+        os.chdir(cwd)
+
+    run, _ = runs[-1]
+    seconds = statistics.median(elapsed for _, elapsed in runs)
+    calls = run.calls()
+    iterations = max(calls.get('scroll', 0), calls.get('get', 0), 1)
+    return {
+        'case': site,
+        'seconds': seconds,
+        'iterations': iterations,
+        'ms_per_iteration': seconds * 1000 / iterations,
+        'items': run.items,
+        'waited': run.clock.waited,
+        'sleeps': run.clock.sleeps,
+        'browsers': len(run.drivers),
+        'calls': calls,
+    }
+
+
+def print_table(results):
+    print(f"{'用例':<18}{'循环 ms':>10}{'轮数':>6}{'ms/轮':>8}{'条目':>7}{'等待策略 s':>12}{'sleep次数':>10}  WebDriver 调用")
+    for row in results:
+        calls = ', '.join(f"{name}={count}" for name, count in row['calls'].items() if count)
+        print(f"{row['case']:<18}{row['seconds'] * 1000:>10.1f}{row['iterations']:>6}{row['ms_per_iteration']:>8.1f}"
+              f"{row['items']:>7}{row['waited']:>12.1f}{row['sleeps']:>10}  {calls}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='爬取控制循环基准测试（假 WebDriver）')
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=CASES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--pages', type=int, default=5, help='分页站点的总页数')
+    parser.add_argument('--scroll-steps', type=int, default=10, help='无限滚动页面可加载的批数')
+    parser.add_argument('--max-scrolls', type=int, default=50, help='Booking 滚动上限')
+    parser.add_argument('--inline-parse', action='store_true', help='在主进程中解析（不启动解析进程池）')
+    parser.add_argument('--json', help='把结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    results = [run_case(name, args) for name in args.cases]
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
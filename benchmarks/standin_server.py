@@ -0,0 +1,373 @@
+"""本地替身站点服务器
+
+在没有网络的机器上回放各站点的样本页面，用于端到端测量爬取吞吐量（页/分钟、图片/秒）
+以及并发、重试和流水线改动的效果。每个站点挂在自己的路径前缀下：
+
+    /amazon/s?k=...&page=N                     分页搜索结果（超过 --pages 页后没有下一页）
+    /twitter/search?q=...                      无限滚动时间线（滚动时请求 /twitter/timeline?start=N；
+                                               支持 max_id:N 游标）
+    /booking/attractions/searchresults/...     无限滚动景点列表（滚动时请求 /booking/cards?start=N）
+    /imdb/chart/top/                           榜单页（含 JSON-LD，可用 --no-imdb-json 关闭）
+    /imdb/title/<id>/                          电影详情页
+    /allrecipes/search?q=...&offset=N          按 offset 分页的搜索结果
+    /cdn/<原域名>/...                          图片（页面中的CDN地址都改写到这里）
+
+图片和页面都可以配置延迟、带宽、错误率和 429 比例。爬虫通过环境变量指向替身服务器，例如：
+
+    python -m benchmarks.standin_server --port 8000 --latency 0.05 --bandwidth 2000 --error-rate 0.02
+    AMAZON_BASE_URL=http://127.0.0.1:8000/amazon python Amazon.py
+
+访问 /__stats 返回已服务的页面数、图片数和对应的速率。
+"""
+import io
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from PIL import Image
+
+from image_variants import find_rule
+from benchmarks.fixtures import (amazon_serp, tweet_articles, twitter_search_start, twitter_timeline, booking_cards,
+                                 booking_attractions, imdb_chart, allrecipes_search)
+
+# 页面中需要改写到替身服务器的图片CDN域名
+CDN_HOSTS = ['m.media-amazon.com', 'cf.bstatic.com', 'www.allrecipes.com/thmb']
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg')
+
+# 无限滚动：页面滚动到底部附近时请求下一批内容并追加
+INFINITE_SCROLL_JS = '''<script>
+(function () {
+  var start = %(start)d, batch = %(batch)d, limit = %(limit)d, loading = false;
+  window.addEventListener('scroll', function () {
+    if (loading || start >= limit) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 800) return;
+    loading = true;
+    fetch('%(endpoint)s?start=' + start + '&count=' + Math.min(batch, limit - start))
+      .then(function (r) { return r.ok ? r.text() : ''; })
+      .then(function (html) {
+        if (html) { document.querySelector('%(container)s').insertAdjacentHTML('beforeend', html); start += batch; }
+        loading = false;
+      }, function () { loading = false; });
+  });
+})();
+</script>'''
+
+
+class StandinConfig:
+    """替身服务器的行为参数"""
+
+    def __init__(self, latency=0.0, image_latency=0.0, bandwidth=0, error_rate=0.0, rate_429=0.0,
+                 pages=20, page_size=24, scroll_batch=20, scroll_limit=400, chart_size=250, imdb_json=True):
+        self.latency = latency                # 页面响应前的延迟（秒）
+        self.image_latency = image_latency    # 图片响应前的延迟（秒）
+        self.bandwidth = bandwidth            # 每个连接的带宽（KB/秒），0 为不限
+        self.error_rate = error_rate          # 返回 503 的比例
+        self.rate_429 = rate_429              # 返回 429（带 Retry-After）的比例
+        self.pages = pages                    # 分页搜索的总页数
+        self.page_size = page_size            # 每页条目数
+        self.scroll_batch = scroll_batch      # 无限滚动每批条目数
+        self.scroll_limit = scroll_limit      # 无限滚动的条目总数
+        self.chart_size = chart_size
+        self.imdb_json = imdb_json
+
+
+class StandinStats:
+    """已服务的请求统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counts = {'page': 0, 'image': 0, 'fragment': 0, 'error': 0, '429': 0}
+        self.bytes = 0
+
+    def add(self, kind, size=0):
+        with self._lock:
+            self.counts[kind] += 1
+            self.bytes += size
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = max(time.time() - self.started, 1e-6)
+            return dict(self.counts, bytes=self.bytes, seconds=round(elapsed, 1),
+                        pages_per_minute=round(self.counts['page'] * 60 / elapsed, 1),
+                        images_per_second=round(self.counts['image'] / elapsed, 2))
+
+
+_image_cache = {}
+_image_lock = threading.Lock()
+
+
+def image_bytes(width):
+    """指定宽度的 JPEG（4:3，随机噪声使文件大小接近真实照片），按宽度缓存"""
+    width = max(16, min(int(width or 500), 2000))
+    with _image_lock:
+        body = _image_cache.get(width)
+    if body is None:
+        # 在锁外生成，其他宽度的请求不必等待；同一宽度并发生成时结果相同，保留先写入的
+        height = width * 3 // 4
+        rng = random.Random(width)
+        image = Image.frombytes('RGB', (width, height), rng.randbytes(width * height * 3))
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=80)
+        with _image_lock:
+            body = _image_cache.setdefault(width, buffer.getvalue())
+    return body
+
+
+def _parse_range(header, size):
+    """解析单个字节范围（RFC 9110）：返回 (起点, 终点)；起点超出文件时返回 'unsatisfiable'；
+    没有 Range、格式错误或多个范围时返回 None（按完整响应处理）"""
+    if not header.startswith('bytes=') or ',' in header:
+        return None
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    if not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    if not first:
+        # 后缀范围 bytes=-N：最后 N 个字节
+        length = int(last)
+        return (max(0, size - length), size - 1) if length and size else 'unsatisfiable'
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        return 'unsatisfiable'
+    return first, min(int(last) if last else size - 1, size - 1)
+
+
+def rewrite_cdn(html, origin):
+    """把页面中的CDN图片地址改写到替身服务器"""
+    for host in CDN_HOSTS:
+        html = html.replace(f'https://{host}/', f'{origin}/cdn/{host}/').replace(f'//{host}/', f'{origin}/cdn/{host}/')
+    return html
+
+
+def _title_page(title_id):
+    data = {
+        '@type': 'Movie', 'name': f'Movie {title_id}', 'genre': ['Action', 'Drama'],
+        'director': [{'@type': 'Person', 'name': 'Stand In'}], 'duration': 'PT2H3M',
+        'aggregateRating': {'ratingCount': 12345, 'ratingValue': 8.1},
+    }
+    return (f'<!DOCTYPE html><html><head><title>{title_id}</title>'
+            f'<script type="application/ld+json">{json.dumps(data)}</script></head><body><h1>{title_id}</h1></body></html>')
+
+
+def _chart_json_ld(count, base):
+    items = [{'@type': 'ListItem', 'position': i + 1, 'item': {
+        '@type': 'Movie', 'url': f'{base}/title/tt{100000 + i * 37:07d}/', 'name': f'Movie {i + 1}',
+        'aggregateRating': {'ratingValue': 8.0}, 'duration': 'PT2H',
+        'image': f'https://m.media-amazon.com/images/M/MV5Bstandin{i}@._V1_QL75_UX140_.jpg',
+    }} for i in range(count)]
+    return f'<script type="application/ld+json">{json.dumps({"@type": "ItemList", "itemListElement": items})}</script>'
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = 'StandinServer/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    # 由 make_server 设置
+    config = None
+    stats = None
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def origin(self):
+        return f'http://{self.headers.get("Host") or "%s:%d" % self.server.server_address[:2]}'
+
+    def do_HEAD(self):
+        self._handle(head=True)
+
+    def do_GET(self):
+        self._handle(head=False)
+
+    def _handle(self, head):
+        parts = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        path = parts.path
+
+        if path == '/__stats':
+            return self._send(200, json.dumps(self.stats.snapshot()).encode(), 'application/json', head, kind=None)
+
+        is_image = path.startswith('/cdn/') or path.lower().endswith(IMAGE_EXTENSIONS)
+        config = self.config
+        time.sleep(config.image_latency if is_image else config.latency)
+
+        # 故障注入
+        roll = random.random()
+        if roll < config.rate_429:
+            self.stats.add('429')
+            return self._send(429, b'Too Many Requests', 'text/plain', head, kind=None, extra={'Retry-After': '1'})
+        if roll < config.rate_429 + config.error_rate:
+            self.stats.add('error')
+            return self._send(503, b'Service Unavailable', 'text/plain', head, kind=None)
+
+        if is_image:
+            return self._send_image(path, head)
+
+        site, _, rest = path.lstrip('/').partition('/')
+        handler = getattr(self, f'_site_{site}', None)
+        result = handler('/' + rest, query) if handler else None
+        if result is None:
+            return self._send(404, b'Not Found', 'text/plain', head, kind=None)
+        html, kind = result
+        self._send(200, rewrite_cdn(html, self.origin).encode('utf-8'), 'text/html; charset=utf-8', head, kind=kind)
+
+    def _site_amazon(self, path, query):
+        if path != '/s':
+            return None
+        page = int(query.get('page', 1))
+        if page > self.config.pages:
+            return None
+        html = amazon_serp(self.config.page_size, page=page, base='/amazon', has_next=page < self.config.pages)
+        return html, 'page'
+
+    def _scroll_page(self, html, endpoint, container, start=0):
+        script = INFINITE_SCROLL_JS % {'start': start + self.config.scroll_batch, 'batch': self.config.scroll_batch,
+                                       'limit': self.config.scroll_limit, 'endpoint': endpoint,
+                                       'container': container}
+        return html.replace('</body>', script + '</body>')
+
+    def _fragment_range(self, query):
+        start = int(query.get('start', 0))
+        count = min(int(query.get('count', self.config.scroll_batch)), max(0, self.config.scroll_limit - start))
+        return start, count
+
+    def _site_twitter(self, path, query):
+        if path in ('/', '/home'):
+            return '<!DOCTYPE html><html><head><title>X</title></head><body><main>Home</main></body></html>', 'page'
+        if path == '/search':
+            start = twitter_search_start(query.get('q', ''))
+            html = twitter_timeline(self.config.scroll_batch, start=start)
+            return self._scroll_page(html, '/twitter/timeline', '[aria-label="Timeline: Search timeline"] > div',
+                                     start), 'page'
+        if path == '/timeline':
+            start, count = self._fragment_range(query)
+            return tweet_articles(start, count), 'fragment'
+        return None
+
+    def _site_booking(self, path, query):
+        if path.startswith('/attractions/searchresults/'):
+            html = booking_attractions(self.config.scroll_batch)
+            return self._scroll_page(html, '/booking/cards', '[data-testid="search-results"]'), 'page'
+        if path == '/cards':
+            start, count = self._fragment_range(query)
+            return booking_cards(start, count), 'fragment'
+        return None
+
+    def _site_imdb(self, path, query):
+        if path.rstrip('/') == '/chart/top':
+            html = imdb_chart(self.config.chart_size)
+            if self.config.imdb_json:
+                html = html.replace('</head>', _chart_json_ld(self.config.chart_size, f'{self.origin}/imdb') + '</head>')
+            return html, 'page'
+        if path.startswith('/title/'):
+            return _title_page(path.strip('/').split('/')[-1]), 'page'
+        return None
+
+    def _site_allrecipes(self, path, query):
+        if path != '/search':
+            return None
+        offset = int(query.get('offset', 0))
+        count = min(self.config.page_size, max(0, self.config.pages * self.config.page_size - offset))
+        return allrecipes_search(count, offset=offset), 'page'
+
+    def _send_image(self, path, head):
+        url = path[len('/cdn/'):] if path.startswith('/cdn/') else path
+        rule = find_rule('https://' + url)
+        width = rule.width_of('https://' + url) if rule else None
+        body = image_bytes(width)
+
+        # 支持尺寸探测使用的 Range 请求
+        byte_range = _parse_range(self.headers.get('Range', ''), len(body))
+        if byte_range == 'unsatisfiable':
+            return self._send(416, b'', 'image/jpeg', head, kind=None, extra={'Content-Range': f'bytes */{len(body)}'})
+        if byte_range:
+            first, last = byte_range
+            extra = {'Content-Range': f'bytes {first}-{last}/{len(body)}'}
+            return self._send(206, body[first:last + 1], 'image/jpeg', head, kind='image', extra=extra)
+        self._send(200, body, 'image/jpeg', head, kind='image')
+
+    def _send(self, status, body, content_type, head, kind, extra=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if head:
+            return
+        if kind:
+            self.stats.add(kind, len(body))
+
+        # 按带宽限速分块发送
+        bandwidth = self.config.bandwidth * 1024
+        chunk = 16 * 1024
+        try:
+            for start in range(0, len(body), chunk):
+                self.wfile.write(body[start:start + chunk])
+                if bandwidth:
+                    time.sleep(min(chunk, len(body) - start) / bandwidth)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def make_server(host='127.0.0.1', port=8000, config=None):
+    """创建替身服务器（尚未启动），port 为 0 时自动选择端口"""
+    handler = type('Handler', (StandinHandler,), {'config': config or StandinConfig(), 'stats': StandinStats()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(host='127.0.0.1', port=0, config=None):
+    """在后台线程中启动替身服务器，返回 (server, 根地址)"""
+    server = make_server(host, port, config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{server.server_address[0]}:{server.server_address[1]}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='本地替身站点服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help='页面延迟（秒）')
+    parser.add_argument('--image-latency', type=float, default=0.0, help='图片延迟（秒）')
+    parser.add_argument('--bandwidth', type=int, default=0, help='每连接带宽（KB/秒），0 为不限')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 503 的比例')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='返回 429 的比例')
+    parser.add_argument('--pages', type=int, default=20, help='分页搜索的总页数')
+    parser.add_argument('--page-size', type=int, default=24)
+    parser.add_argument('--scroll-batch', type=int, default=20)
+    parser.add_argument('--scroll-limit', type=int, default=400)
+    parser.add_argument('--no-imdb-json', action='store_true', help='IMDb 榜单页不含内嵌JSON（强制走浏览器）')
+    args = parser.parse_args(argv)
+
+    config = StandinConfig(latency=args.latency, image_latency=args.image_latency, bandwidth=args.bandwidth,
+                           error_rate=args.error_rate, rate_429=args.rate_429, pages=args.pages,
+                           page_size=args.page_size, scroll_batch=args.scroll_batch,
+                           scroll_limit=args.scroll_limit, imdb_json=not args.no_imdb_json)
+    server = make_server(args.host, args.port, config)
+    root = f'http://{args.host}:{server.server_address[1]}'
+    print(f"替身服务器已启动: {root}")
+    for env, site in (('AMAZON_BASE_URL', 'amazon'), ('TWITTER_BASE_URL', 'twitter'),
+                      ('BOOKING_BASE_URL', 'booking'), ('IMDB_BASE_URL', 'imdb'),
+                      ('ALLRECIPES_BASE_URL', 'allrecipes')):
+        print(f"  {env}={root}/{site}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.RequestHandlerClass.stats.snapshot(), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""从浏览器网络事件中截获已加载的图片
+
+浏览器在渲染和滚动页面时已经下载过商品图、海报和食谱图片，之后再用 requests
+请求同一个URL等于把每张图片传输两遍。这里通过 ChromeDriver 的 performance 日志
+读取 CDP 网络事件（Network.responseReceived / Network.loadingFinished），
+在资源仍在浏览器缓冲区时用 Network.getResponseBody 取出正文，下载函数优先使用
+截获的字节，只有页面从未加载过的变体（例如放大后的分辨率）才发起HTTP请求。
+下载函数请求的往往是按目标分辨率改写过的URL，与浏览器实际加载的 src 不同，
+所以截获的图片同时按去掉CDN尺寸标记后的URL登记。
+"""
+import json
+import base64
+import logging
+import threading
+from collections import OrderedDict
+
+from selenium.common.exceptions import WebDriverException
+
+from image_variants import find_rule, strip_size_tokens
+
+# 浏览器网络缓冲区大小，过小时图片正文会在读取前被丢弃
+MAX_TOTAL_BUFFER_SIZE = 200 * 1024 * 1024
+MAX_RESOURCE_BUFFER_SIZE = 20 * 1024 * 1024
+
+
+def enable_performance_log(options):
+    """在 ChromeOptions 中开启 performance 日志（包含 CDP 网络事件）"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+def _target_id(window_handle):
+    """窗口句柄对应的 DevTools target ID（旧版 ChromeDriver 的句柄带 CDwindow- 前缀）"""
+    return window_handle[len('CDwindow-'):] if window_handle.startswith('CDwindow-') else window_handle
+
+
+class NetworkEventTap:
+    """读取 performance 日志并把 CDP 网络事件分发给订阅者
+
+    ChromeDriver 的日志读取一次即清空，所以同一个浏览器的所有网络事件消费者
+    都应通过同一个 tap 订阅，而不是各自调用 get_log。
+    Network.getResponseBody 等 CDP 命令只作用于当前标签页，因此后台标签页
+    （例如预取的下一页）的事件先暂存，等切换到该标签页后再分发。
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._listeners = []
+        self._deferred = {}
+        self.enable()
+
+    def enable(self):
+        """开启 Network 域并放大缓冲区，使 getResponseBody 能取到较早加载的资源"""
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {
+                'maxTotalBufferSize': MAX_TOTAL_BUFFER_SIZE,
+                'maxResourceBufferSize': MAX_RESOURCE_BUFFER_SIZE,
+            })
+        except WebDriverException as e:
+            logging.warning(f"开启 CDP 网络事件失败: {str(e)}")
+
+    def subscribe(self, listener):
+        """订阅网络事件，listener(method, params)"""
+        self._listeners.append(listener)
+        return listener
+
+    def cdp(self, command, params=None):
+        return self.driver.execute_cdp_cmd(command, params or {})
+
+    def poll(self):
+        """读取自上次调用以来当前标签页的网络事件并分发，返回分发的事件数量"""
+        try:
+            entries = self.driver.get_log('performance')
+            current = _target_id(self.driver.current_window_handle)
+            handles = {_target_id(handle) for handle in self.driver.window_handles}
+        except WebDriverException as e:
+            logging.warning(f"读取 performance 日志失败: {str(e)}")
+            return 0
+
+        for entry in entries:
+            try:
+                payload = json.loads(entry['message'])
+                message = payload['message']
+            except (KeyError, ValueError, TypeError):
+                continue
+            if message.get('method', '').startswith('Network.'):
+                webview = payload.get('webview') or current
+                self._deferred.setdefault(webview, []).append(message)
+
+        # 已关闭的标签页的事件直接丢弃
+        for webview in list(self._deferred):
+            if webview != current and webview not in handles:
+                del self._deferred[webview]
+
+        messages = self._deferred.pop(current, [])
+        for message in messages:
+            method = message['method']
+            for listener in self._listeners:
+                try:
+                    listener(method, message.get('params') or {})
+                except Exception as e:
+                    logging.error(f"处理网络事件 {method} 时出错: {str(e)}")
+        return len(messages)
+
+
+class ImageCapture:
+    """截获浏览器已加载的图片正文，按URL供下载函数取用（线程安全）
+
+    截获的字节按加载顺序保存在内存中，总量超过 max_bytes 时丢弃最早的条目；
+    可以同时订阅多个浏览器（共享浏览器池），浏览器关闭后已截获的图片仍然可用。URL没有完全相同的截获时，按去掉尺寸标记的URL
+    查找同一张图片的其他变体，宽度不小于请求的变体（或宽度未知）才使用。
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, min_bytes=512):
+        self.max_bytes = max_bytes
+        self.min_bytes = min_bytes
+        self._lock = threading.Lock()
+        self._bodies = OrderedDict()
+        self._canonical = {}
+        self._size = 0
+
+        # 统计信息
+        self.captured = 0
+        self.captured_bytes = 0
+        self.capture_failures = 0
+        self.evicted = 0
+        self.reused = 0
+        self.reused_bytes = 0
+        self.misses = 0
+
+    def attach(self, tap):
+        """订阅一个浏览器的网络事件；每个浏览器的 tap 调用一次"""
+        pending = {}
+        tap.subscribe(lambda method, params: self._on_event(tap, pending, method, params))
+        return self
+
+    def _on_event(self, tap, pending, method, params):
+        if method == 'Network.responseReceived':
+            response = params.get('response') or {}
+            url = response.get('url', '')
+            if params.get('type') == 'Image' and response.get('status') == 200 \
+                    and response.get('mimeType', '').startswith('image/') and url.startswith('http'):
+                pending[params.get('requestId')] = url
+        elif method == 'Network.loadingFinished':
+            url = pending.pop(params.get('requestId'), None)
+            if url:
+                self._fetch_body(tap, params['requestId'], url)
+        elif method == 'Network.loadingFailed':
+            pending.pop(params.get('requestId'), None)
+
+    def _fetch_body(self, tap, request_id, url):
+        try:
+            result = tap.cdp('Network.getResponseBody', {'requestId': request_id})
+        except WebDriverException:
+            # 资源已被浏览器从缓冲区中丢弃
+            self.capture_failures += 1
+            return
+
+        body = result.get('body', '')
+        body = base64.b64decode(body) if result.get('base64Encoded') else body.encode('latin-1')
+        if len(body) < self.min_bytes:
+            return
+        self._put(url, body)
+
+    def _put(self, url, body):
+        canonical = strip_size_tokens(url)
+        with self._lock:
+            old = self._bodies.pop(url, None)
+            if old is not None:
+                self._size -= len(old)
+            self._bodies[url] = body
+            self._canonical[canonical] = url
+            self._size += len(body)
+            self.captured += 1
+            self.captured_bytes += len(body)
+
+            while self._size > self.max_bytes and self._bodies:
+                dropped_url, dropped = self._bodies.popitem(last=False)
+                self._forget(dropped_url)
+                self._size -= len(dropped)
+                self.evicted += 1
+
+    def _forget(self, url):
+        canonical = strip_size_tokens(url)
+        if self._canonical.get(canonical) == url:
+            del self._canonical[canonical]
+
+    @staticmethod
+    def _wide_enough(loaded_url, url):
+        """浏览器加载的变体不比请求的窄（任一宽度未知时视为同一张图片）"""
+        rule = find_rule(url)
+        if rule is None or not rule.matches(loaded_url):
+            return True
+        loaded_width, width = rule.width_of(loaded_url), rule.width_of(url)
+        return loaded_width is None or width is None or loaded_width >= width
+
+    def take(self, url):
+        """取出截获的图片字节（取出后释放内存），未截获时返回 None"""
+        canonical = strip_size_tokens(url)
+        with self._lock:
+            if url not in self._bodies:
+                loaded_url = self._canonical.get(canonical)
+                if loaded_url is not None and self._wide_enough(loaded_url, url):
+                    url = loaded_url
+            body = self._bodies.pop(url, None)
+            if body is None:
+                self.misses += 1
+                return None
+            self._forget(url)
+            self._size -= len(body)
+            self.reused += 1
+            self.reused_bytes += len(body)
+            return body
+
+    def log_report(self):
+        logging.info(
+            f"浏览器图片截获: 截获 {self.captured} 张共 {self.captured_bytes / 1024 / 1024:.2f} MB "
+            f"(读取失败 {self.capture_failures}, 内存上限丢弃 {self.evicted}); "
+            f"复用 {self.reused} 张共 {self.reused_bytes / 1024 / 1024:.2f} MB, "
+            f"需另行下载 {self.misses} 张"
+        )
@@ -0,0 +1,353 @@
+"""常驻浏览器守护进程：爬虫通过 debuggerAddress 连接，省去每次运行的浏览器启动
+
+每次运行 webdriver.Chrome(options=...) 都要经过 selenium-manager 解析 chromedriver 和浏览器路径、
+启动 Chrome 并建立会话；对于大量短时间的定时爬取，这部分开销往往比爬取本身还长。
+守护进程用预先配置好的启动参数常驻一个 Chrome（远程调试端口），并把浏览器和 chromedriver
+的路径记在状态文件中。爬虫调用 open_browser()：守护浏览器在运行时直接连接，并通过
+Target.createBrowserContext 为本次爬取创建独立的浏览器上下文（Cookies、缓存、存储互不影响），
+quit() 时只销毁该上下文；守护浏览器未运行时照常冷启动。两种方式的耗时都会记录。
+守护浏览器的进程号记在状态文件中，内存监控（driver_supervisor）按它统计守护浏览器的内存；
+超过预算时，没有其他爬取连接就重启守护浏览器，否则本进程之后改为冷启动（recycle_daemon）。
+
+    python browser_daemon.py start [--headless] [--port 9222]
+    python browser_daemon.py status
+    python browser_daemon.py bench --runs 3     # 对比冷启动和热连接耗时
+    python browser_daemon.py stop
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import logging
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+
+from browser_capture import enable_performance_log
+from resource_blocking import apply_blocking_prefs
+
+# 设为 False 时 open_browser 总是冷启动（例如基准测试中使用假浏览器）
+ENABLED = os.environ.get('BROWSER_DAEMON', '1') != '0'
+
+STATE_FILE = os.environ.get('BROWSER_DAEMON_STATE',
+                            os.path.join(tempfile.gettempdir(), 'crawler_browser_daemon.json'))
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), 'crawler_browser_profile')
+DEFAULT_PORT = 9222
+
+# 浏览器启动参数：守护浏览器和冷启动的爬虫浏览器（chrome_options）共用
+CHROME_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-gpu',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-extensions',
+    '--disable-notifications',
+    '--disable-infobars',
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--window-size=1920,1080',
+    '--lang=en-US',
+    '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/115.0.0.0 Safari/537.36',
+]
+
+# 连接时从调用方的 ChromeOptions 中沿用的 capability（启动参数和首选项对已运行的浏览器无效）
+ATTACH_CAPABILITIES = ('goog:loggingPrefs', 'pageLoadStrategy')
+
+# 超过内存预算、本进程不再连接的守护浏览器 PID
+_retired = set()
+
+
+def chrome_options(profile=None, performance_log=False):
+    """爬虫浏览器的 ChromeOptions（冷启动时使用，连接守护浏览器时只沿用 ATTACH_CAPABILITIES）；
+    profile 为资源屏蔽配置，performance_log 开启 CDP 网络事件（截获图片、统计流量）"""
+    options = webdriver.ChromeOptions()
+    for arg in CHROME_ARGS:
+        options.add_argument(arg)
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    if profile is not None:
+        apply_blocking_prefs(options, profile)
+    if performance_log:
+        enable_performance_log(options)
+    return options
+
+
+def resolve_binaries():
+    """解析 Chrome 和 chromedriver 的路径，返回 (浏览器路径, driver路径)"""
+    browser = os.environ.get('CHROME_BINARY')
+    driver = os.environ.get('CHROMEDRIVER')
+    if not (browser and driver):
+        try:
+            from selenium.webdriver.common.selenium_manager import SeleniumManager
+            paths = SeleniumManager().binary_paths(['--browser', 'chrome'])
+            browser = browser or paths.get('browser_path')
+            driver = driver or paths.get('driver_path')
+        except Exception as e:
+            logging.warning(f"selenium-manager 解析浏览器路径失败: {str(e)}")
+    browser = browser or next(filter(None, map(shutil.which, (
+        'google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome'))), None)
+    driver = driver or shutil.which('chromedriver')
+    return browser, driver
+
+
+def read_state():
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_alive(state, timeout=0.5):
+    """守护浏览器的调试端口是否可用"""
+    if not state:
+        return False
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{state['port']}/json/version", timeout=timeout) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def start_daemon(port=DEFAULT_PORT, headless=False, profile_dir=PROFILE_DIR, timeout=30):
+    """启动守护浏览器（已在运行时直接返回其状态）"""
+    state = read_state()
+    if is_alive(state):
+        logging.info(f"守护浏览器已在运行: 端口 {state['port']}, PID {state['pid']}")
+        return state
+
+    browser, driver = resolve_binaries()
+    if not browser:
+        raise RuntimeError("找不到 Chrome，可通过环境变量 CHROME_BINARY 指定")
+
+    args = [browser, f'--remote-debugging-port={port}', f'--user-data-dir={profile_dir}'] + CHROME_ARGS
+    if headless:
+        args.append('--headless=new')
+    args.append('about:blank')
+
+    started = time.perf_counter()
+    detach = {'creationflags': subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP} \
+        if os.name == 'nt' else {'start_new_session': True}
+    process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **detach)
+
+    state = {'port': port, 'pid': process.pid, 'browser_path': browser, 'driver_path': driver,
+             'headless': headless, 'profile_dir': profile_dir, 'started': time.time()}
+    while not is_alive(state):
+        if process.poll() is not None or time.perf_counter() - started > timeout:
+            raise RuntimeError(f"守护浏览器启动失败 (退出码 {process.poll()})")
+        time.sleep(0.1)
+
+    with open(STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    logging.info(f"守护浏览器已启动: 端口 {port}, PID {process.pid}, 耗时 {time.perf_counter() - started:.2f} 秒")
+    return state
+
+
+def _pid_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+def stop_daemon(timeout=10):
+    """停止守护浏览器并等待进程退出（调试端口和用户目录释放后才能重新启动）"""
+    state = read_state()
+    if state and is_alive(state):
+        try:
+            os.kill(state['pid'], signal.SIGTERM)
+            deadline = time.monotonic() + timeout
+            while _pid_exists(state['pid']) and time.monotonic() < deadline:
+                time.sleep(0.1)
+            if _pid_exists(state['pid']) and hasattr(signal, 'SIGKILL'):
+                os.kill(state['pid'], signal.SIGKILL)
+            logging.info(f"守护浏览器已停止: PID {state['pid']}")
+        except OSError as e:
+            logging.warning(f"停止守护浏览器失败: {str(e)}")
+    if os.path.exists(STATE_FILE):
+        os.remove(STATE_FILE)
+
+
+class AttachedChrome(webdriver.Chrome):
+    """连接到守护浏览器的 driver；quit() 只关闭本次爬取的浏览器上下文，浏览器继续运行"""
+
+    # 首选项（prefs）对已运行的浏览器无效，resource_blocking 据此改用URL规则屏蔽图片
+    attached = True
+    context_id = None
+    owns_window = False
+
+    # 守护浏览器的进程号（来自状态文件），本地 chromedriver 的子进程中没有守护浏览器
+    daemon_pid = None
+
+    def isolate(self):
+        """创建独立的浏览器上下文并切换到其中的新标签页；不支持时沿用默认上下文"""
+        try:
+            self.context_id = self.execute_cdp_cmd('Target.createBrowserContext', {})['browserContextId']
+            target = self.execute_cdp_cmd('Target.createTarget', {
+                'url': 'about:blank', 'browserContextId': self.context_id,
+            })
+            self.switch_to.window(target['targetId'])
+        except (WebDriverException, KeyError) as e:
+            logging.warning(f"创建独立浏览器上下文失败，使用新标签页: {str(e)}")
+            self.context_id = None
+            self.switch_to.new_window('tab')
+        self.owns_window = True
+
+    def quit(self):
+        try:
+            if self.context_id:
+                self.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': self.context_id})
+            elif self.owns_window:
+                self.close()
+        except WebDriverException as e:
+            logging.warning(f"关闭浏览器上下文失败: {str(e)}")
+        finally:
+            self.context_id = None
+            self.owns_window = False
+            super().quit()
+
+
+def attach(options=None, isolated=True):
+    """连接到守护浏览器，守护浏览器未运行时返回 None"""
+    state = read_state()
+    if not is_alive(state) or state['pid'] in _retired:
+        return None
+
+    attach_options = webdriver.ChromeOptions()
+    attach_options.debugger_address = f"127.0.0.1:{state['port']}"
+    for name in ATTACH_CAPABILITIES:
+        if options is not None and name in options.capabilities:
+            attach_options.set_capability(name, options.capabilities[name])
+
+    # 使用守护进程记录的 chromedriver 路径，跳过 selenium-manager 解析
+    service = Service(executable_path=state['driver_path']) if state.get('driver_path') else None
+    driver = AttachedChrome(options=attach_options, service=service)
+    driver.daemon_pid = state['pid']
+    if isolated:
+        driver.isolate()
+    return driver
+
+
+def _used_by_others(driver):
+    """守护浏览器中是否还有其他爬取的上下文或打开的页面（无法判断时按有处理）"""
+    try:
+        contexts = driver.execute_cdp_cmd('Target.getBrowserContexts', {}).get('browserContextIds', [])
+        targets = driver.execute_cdp_cmd('Target.getTargets', {}).get('targetInfos', [])
+    except WebDriverException:
+        return True
+    if any(context != driver.context_id for context in contexts):
+        return True
+    return any(target.get('type') == 'page' and target.get('browserContextId') != driver.context_id
+               and target.get('url') != 'about:blank' for target in targets)
+
+
+def recycle_daemon(driver):
+    """连接的守护浏览器超过内存预算时调用（会关闭 driver）：没有其他爬取在使用时重启守护浏览器，
+    否则本进程之后不再连接它，open_browser 改为冷启动。返回 'restarted' 或 'cold'"""
+    state = read_state()
+    exclusive = not _used_by_others(driver)
+    try:
+        driver.quit()
+    except Exception as e:
+        logging.warning(f"关闭浏览器时出错: {str(e)}")
+
+    if exclusive and state and state.get('pid') == driver.daemon_pid:
+        logging.info(f"重启守护浏览器以释放内存: PID {state['pid']}")
+        try:
+            stop_daemon()
+            start_daemon(state['port'], state.get('headless', False), state.get('profile_dir', PROFILE_DIR))
+            return 'restarted'
+        except (OSError, RuntimeError) as e:
+            logging.warning(f"重启守护浏览器失败，本进程之后改为冷启动: {str(e)}")
+    else:
+        logging.info(f"守护浏览器 PID {driver.daemon_pid} 仍有其他爬取在使用，本进程之后改为冷启动")
+    _retired.add(driver.daemon_pid)
+    return 'cold'
+
+
+def open_browser(options, launcher=None, isolated=True):
+    """优先连接守护浏览器，否则用 launcher（默认 webdriver.Chrome）冷启动，并记录耗时"""
+    started = time.perf_counter()
+    driver = None
+    if ENABLED:
+        try:
+            driver = attach(options, isolated)
+        except WebDriverException as e:
+            logging.warning(f"连接守护浏览器失败，改为冷启动: {str(e)}")
+    if driver is not None:
+        logging.info(f"已连接守护浏览器（热连接）: {time.perf_counter() - started:.2f} 秒")
+        return driver
+
+    driver = (launcher or webdriver.Chrome)(options=options)
+    logging.info(f"浏览器冷启动: {time.perf_counter() - started:.2f} 秒")
+    return driver
+
+
+def bench(runs):
+    """对比冷启动和热连接（含创建独立上下文）的耗时，各运行 runs 次"""
+    def timed(open_driver):
+        times = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            driver = open_driver()
+            driver.get('about:blank')
+            times.append(time.perf_counter() - started)
+            driver.quit()
+        return times
+
+    def cold():
+        options = chrome_options()
+        options.add_argument('--headless=new')
+        return webdriver.Chrome(options=options)
+
+    results = {'冷启动': timed(cold)}
+    if is_alive(read_state()):
+        results['热连接'] = timed(attach)
+    else:
+        print("守护浏览器未运行，只测量冷启动（先运行 python browser_daemon.py start）")
+    for name, times in results.items():
+        print(f"{name}: 平均 {sum(times) / len(times):.2f} 秒, 最快 {min(times):.2f} 秒, 最慢 {max(times):.2f} 秒")
+    return results
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='常驻浏览器守护进程')
+    commands = parser.add_subparsers(dest='command', required=True)
+    start = commands.add_parser('start', help='启动守护浏览器')
+    start.add_argument('--port', type=int, default=DEFAULT_PORT)
+    start.add_argument('--headless', action='store_true')
+    start.add_argument('--profile-dir', default=PROFILE_DIR)
+    commands.add_parser('stop', help='停止守护浏览器')
+    commands.add_parser('status', help='查看守护浏览器状态')
+    bench_parser = commands.add_parser('bench', help='对比冷启动和热连接耗时')
+    bench_parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.command == 'start':
+        start_daemon(args.port, args.headless, args.profile_dir)
+    elif args.command == 'stop':
+        stop_daemon()
+    elif args.command == 'status':
+        state = read_state()
+        if is_alive(state):
+            print(f"运行中: 端口 {state['port']}, PID {state['pid']}, "
+                  f"已运行 {(time.time() - state['started']) / 60:.1f} 分钟, chromedriver {state.get('driver_path')}")
+        else:
+            print("未运行")
+            return 1
+    else:
+        bench(args.runs)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
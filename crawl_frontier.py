@@ -0,0 +1,289 @@
+"""基于 SQLite 的持久化抓取队列（frontier）
+
+每个待下载URL先规范化（去掉跟踪参数、片段和CDN尺寸标记）作为主键，
+并记录状态：pending（待处理）、in_flight（处理中）、done（完成）、failed（失败，含尝试次数）。
+所有状态更新都以批量事务提交；程序中断后重新启动时，处理中的条目以及
+未超过重试次数的失败条目会回到待处理，下载从中断的位置继续。
+
+领取条目时记录领取者（主机名:进程ID:实例）和租约到期时间。多个进程共用一个队列文件时，
+recover 只恢复领取者已退出（同一台机器上按进程是否存在判断）、租约已到期（其他机器）
+或没有领取者记录的处理中条目，不会抢走仍在运行的进程正在下载的条目。
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+import concurrent.futures
+from collections import namedtuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import metrics
+import profiling
+from image_variants import strip_size_tokens
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+# 不影响资源内容的查询参数
+NOISE_PARAMS = {
+    'ref', 'ref_', 'qid', 'sr', 'crid', 'sprefix', 'dib', 'dib_tag', 'content-id', 'psc',
+    'fbclid', 'gclid', 'msclkid', 'spm', '_encoding', 'label', 'aid', 'sid',
+}
+NOISE_PREFIXES = ('utm_', 'pf_rd_', 'pd_rd_')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# 处理中条目的租约时长（秒）：其他机器上的领取者超过该时间未完成时，条目可被 recover 恢复
+LEASE_SECONDS = float(os.environ.get('FRONTIER_LEASE_SECONDS', '1800'))
+
+FrontierItem = namedtuple('FrontierItem', ['key', 'url', 'meta', 'attempts'])
+
+
+def canonicalize_url(url):
+    """规范化URL，作为去重的主键"""
+    url = strip_size_tokens(url.strip())
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    params = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in NOISE_PARAMS and not k.lower().startswith(NOISE_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(params), ''))
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+class CrawlFrontier:
+    """SQLite 抓取队列（线程安全，多进程通过 SQLite 锁互斥）"""
+
+    def __init__(self, db_path='crawl_frontier.sqlite', max_attempts=3, lease_seconds=LEASE_SECONDS):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                key TEXT PRIMARY KEY,
+                site TEXT NOT NULL,
+                url TEXT NOT NULL,
+                meta TEXT,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                result TEXT,
+                updated REAL,
+                owner TEXT,
+                lease_expires REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_frontier_site_state ON frontier (site, state);
+        """)
+        # 旧版本创建的队列文件没有领取者和租约列
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(frontier)")}
+        for column, kind in (('owner', 'TEXT'), ('lease_expires', 'REAL')):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE frontier ADD COLUMN {column} {kind}")
+
+    def _abandoned(self, owner, lease_expires, now):
+        """处理中的条目是否已无人处理：没有领取者记录、领取者进程已退出，或其他机器上的租约已到期"""
+        if not owner or lease_expires is None:
+            return True
+        host, _, rest = owner.partition(':')
+        pid, _, _ = rest.partition(':')
+        if host != socket.gethostname() or not pid.isdigit():
+            return lease_expires < now
+        if int(pid) == os.getpid():
+            # 本进程中之前的实例（已关闭）领取的条目
+            return owner != self.owner
+        return not _process_alive(int(pid))
+
+    def recover(self, site):
+        """启动时调用：已无人处理的中断条目和可重试的失败条目恢复为待处理"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT key, owner, lease_expires FROM frontier WHERE site = ? AND state = ?", (site, IN_FLIGHT)
+                ).fetchall()
+                abandoned = [key for key, owner, lease_expires in rows if self._abandoned(owner, lease_expires, now)]
+                self._conn.executemany(
+                    "UPDATE frontier SET state = ?, owner = NULL, lease_expires = NULL, updated = ? WHERE key = ?",
+                    [(PENDING, now, key) for key in abandoned]
+                )
+                cursor = self._conn.execute(
+                    "UPDATE frontier SET state = ?, updated = ? WHERE site = ? AND state = ? AND attempts < ?",
+                    (PENDING, now, site, FAILED, self.max_attempts)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        recovered = len(abandoned) + cursor.rowcount
+        if recovered:
+            logging.info(f"[{site}] 恢复 {recovered} 个未完成的下载任务")
+        if len(rows) > len(abandoned):
+            logging.info(f"[{site}] {len(rows) - len(abandoned)} 个处理中的下载任务仍由其他进程持有，不恢复")
+        return recovered
+
+    def add(self, site, items):
+        """批量加入 (url, meta) 条目，已存在的规范化URL会被忽略，返回新增数量"""
+        now = time.time()
+        rows = [(canonicalize_url(url), site, url, json.dumps(meta or {}, ensure_ascii=False), PENDING, now)
+                for url, meta in items]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO frontier (key, site, url, meta, state, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                added = self._conn.total_changes - before
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        metrics.set_queue_depth('frontier', lambda: self.stats(site).get(PENDING, 0), site)
+        return added
+
+    def claim(self, site, limit=32):
+        """领取一批待处理条目，并标记为处理中"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT key, url, meta, attempts FROM frontier "
+                    "WHERE site = ? AND state = ? ORDER BY rowid LIMIT ?",
+                    (site, PENDING, limit)
+                ).fetchall()
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE frontier SET state = ?, owner = ?, lease_expires = ?, updated = ? WHERE key = ?",
+                    [(IN_FLIGHT, self.owner, now + self.lease_seconds, now, row[0]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [FrontierItem(key, url, json.loads(meta or '{}'), attempts) for key, url, meta, attempts in rows]
+
+    def claim_keys(self, site, keys, chunk=500):
+        """只领取指定主键中仍处于待处理的条目并标记为处理中，返回领取到的主键
+        （边爬边下载时使用：已在之前的运行中完成或正由其他进程处理的条目不会被再次领取）"""
+        keys = list(keys)
+        claimed = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for start in range(0, len(keys), chunk):
+                    part = keys[start:start + chunk]
+                    marks = ', '.join('?' * len(part))
+                    rows = self._conn.execute(
+                        f"SELECT key FROM frontier WHERE site = ? AND state = ? AND key IN ({marks})",
+                        (site, PENDING, *part)
+                    ).fetchall()
+                    claimed.extend(row[0] for row in rows)
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE frontier SET state = ?, owner = ?, lease_expires = ?, updated = ? WHERE key = ?",
+                    [(IN_FLIGHT, self.owner, now + self.lease_seconds, now, key) for key in claimed]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def complete(self, results):
+        """批量提交结果：[(key, 是否成功, 结果或错误信息)]"""
+        now = time.time()
+        done_rows = [(DONE, str(value) if value is not None else None, now, key)
+                     for key, ok, value in results if ok]
+        failed_rows = [(FAILED, str(value) if value is not None else None, now, key)
+                       for key, ok, value in results if not ok]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE frontier SET state = ?, result = ?, owner = NULL, lease_expires = NULL, updated = ? "
+                    "WHERE key = ?", done_rows
+                )
+                self._conn.executemany(
+                    "UPDATE frontier SET state = ?, attempts = attempts + 1, last_error = ?, owner = NULL, "
+                    "lease_expires = NULL, updated = ? WHERE key = ?", failed_rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def state_of(self, url):
+        """查询URL的状态，不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM frontier WHERE key = ?", (canonicalize_url(url),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def stats(self, site):
+        """各状态的条目数量"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM frontier WHERE site = ? GROUP BY state", (site,)
+            ).fetchall()
+        return dict(rows)
+
+    def run(self, site, worker, max_workers=1, batch_size=32):
+        """循环领取任务并执行 worker(url, meta)，返回 (成功数, 失败数)
+
+        worker 返回非空值表示成功（例如保存的文件路径）；返回空字符串表示有意跳过
+        （标记为完成但不计入成功数）；返回 None 或抛出异常表示失败。
+        """
+        def execute(item):
+            try:
+                result = worker(item.url, item.meta)
+                return item.key, result is not None, result
+            except Exception as e:
+                logging.error(f"[{site}] 任务执行异常: {item.url} - {str(e)}")
+                return item.key, False, str(e)
+
+        succeeded = failed = 0
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+        try:
+            while True:
+                items = self.claim(site, batch_size)
+                if not items:
+                    break
+
+                results = list(executor.map(execute, items)) if executor else [execute(item) for item in items]
+                self.complete(results)
+                profiling.checkpoint('download_batch', site)
+
+                succeeded += sum(1 for _, _, result in results if result)
+                failed += sum(1 for _, ok, _ in results if not ok)
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+        return succeeded, failed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,9 @@
+"""站点爬虫插件和并发编排器
+
+    python -m crawlers list
+    python -m crawlers run amazon imdb allrecipes --browsers 2 --download-workers 16
+
+插件接口见 crawlers/base.py，共享的浏览器池、下载引擎和任务编排见 crawlers/engine.py。
+"""
+from crawlers.base import Crawler, Page, Asset, Extracted, CRAWLERS, register, get_crawler, save_image
+from crawlers.scripts import SCRIPTS
@@ -0,0 +1,5 @@
+import sys
+
+from crawlers.cli import main
+
+sys.exit(main())
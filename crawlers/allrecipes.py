@@ -0,0 +1,239 @@
+"""Allrecipes 搜索插件：并发按 offset 直接请求搜索页，遇到第一个没有新图片的页面停止；
+请求被拒绝时改用浏览器从该 offset 起逐页滚动（在后台标签页预取后续页面）
+"""
+import os
+import time
+import uuid
+import random
+import logging
+import concurrent.futures
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+
+import metrics
+from crawlers.base import Crawler, Extracted, Page, Asset, register, save_image
+from image_dedup import open_index
+from image_filter import ImageSizeFilter
+from image_variants import select_variant, VariantReport
+from resource_blocking import PROFILES
+
+# 站点根地址，可通过环境变量指向本地替身服务器（benchmarks/standin_server.py）
+BASE_URL = os.environ.get('ALLRECIPES_BASE_URL', 'https://www.allrecipes.com').rstrip('/')
+
+# 披萨食谱搜索结果第一页
+SEARCH_URL = f"{BASE_URL}/search?q=Pizza"
+
+# 搜索结果每页24条，通过 offset 参数翻页
+PAGE_SIZE = 24
+
+# 并发抓取所有 offset 页面（不启动浏览器），失败时回退到浏览器逐页翻页
+PARALLEL_OFFSET_MODE = True
+OFFSET_FETCH_WORKERS = 4
+
+# 安全上限：正常情况下遇到第一个空页即停止
+MAX_SEARCH_PAGES = 50
+
+# 浏览器模式下处理当前页时在后台标签页预取后续页面（offset 可直接计算，可预取多页）
+PREFETCH_NEXT_PAGE = True
+PREFETCH_DEPTH = 2
+
+# 屏蔽广告、字体、视频和第三方脚本（站点规则见 resource_blocking.PROFILES）
+BLOCK_RESOURCES = True
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# 搜索页请求头
+PAGE_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# 下载图片的目标宽度（选择满足该宽度的最小变体）
+TARGET_IMAGE_WIDTH = 1200
+
+IMAGE_DIR = 'allrecipes_images'
+
+
+def get_image_urls(html, size_filter=None):
+    """从页面HTML中提取所有图片URL，可选地记录尺寸提示供下载前过滤"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    image_urls = []
+
+    # 找到所有img标签
+    img_tags = soup.find_all('img')
+    logging.info(f"找到 {len(img_tags)} 个图片标签")
+
+    for img in img_tags:
+        try:
+            # 获取图片URL - 优先使用data-src属性（延迟加载图片）
+            img_url = img.get('data-src') or img.get('src')
+
+            # 跳过无效URL
+            if not img_url or 'data:image' in img_url:
+                continue
+
+            # 确保URL完整
+            if img_url.startswith('//'):
+                img_url = 'https:' + img_url
+            elif img_url.startswith('/'):
+                img_url = BASE_URL + img_url
+
+            # 按目标分辨率选择最小的合适变体
+            srcset = img.get('data-srcset') or img.get('srcset')
+            img_url = select_variant(img_url, TARGET_IMAGE_WIDTH, srcset=srcset).url
+
+            # 记录 width/height/srcset 尺寸提示（小图放大后仍是小图）
+            if size_filter is not None:
+                size_filter.note_tag(img_url, img)
+
+            image_urls.append(img_url)
+        except Exception as e:
+            logging.error(f"处理图片标签时出错: {str(e)}")
+            continue
+
+    return image_urls
+
+
+def get_image_urls_with_hints(html):
+    """提取图片URL并一并返回尺寸提示（在解析进程中调用，进程内记录的提示不会自动回到主进程）"""
+    hint_filter = ImageSizeFilter()
+    image_urls = get_image_urls(html, hint_filter)
+    return image_urls, hint_filter.export_hints()
+
+
+def build_offset_url(url, offset):
+    """生成指定 offset 的搜索页URL"""
+    parts = urlsplit(url)
+    params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != 'offset']
+    if offset:
+        params.append(('offset', str(offset)))
+    return urlunsplit(parts._replace(query=urlencode(params)))
+
+
+def scroll_to_bottom(driver):
+    """更平滑的滚动到页面底部"""
+    last_height = driver.execute_script("return document.body.scrollHeight")
+    while True:
+        # 随机滚动距离模拟人类行为
+        scroll_distance = random.randint(800, 1500)
+        driver.execute_script(f"window.scrollBy(0, {scroll_distance});")
+        time.sleep(random.uniform(0.8, 1.5))
+
+        new_height = driver.execute_script("return document.body.scrollHeight")
+        if new_height == last_height:
+            break
+        last_height = new_height
+
+
+@register
+class AllrecipesCrawler(Crawler):
+    name = 'allrecipes'
+    table = 'allrecipes_images'
+    export_basename = 'allrecipes_images'
+    profile = PROFILES['allrecipes'] if BLOCK_RESOURCES else None
+    parser = staticmethod(get_image_urls_with_hints)
+
+    def __init__(self):
+        super().__init__()
+        self.asset_headers = {'User-Agent': USER_AGENT, 'Referer': f'{BASE_URL}/'}
+        # 下载前尺寸过滤和跨运行的近似重复索引
+        self.size_filter = ImageSizeFilter(min_width=100, min_height=100, headers=self.asset_headers)
+        self.phash_index = open_index(IMAGE_DIR)
+        # 统计实际流量与固定放大到 2000 的对比
+        self.variant_report = VariantReport(headers={'Referer': f'{BASE_URL}/'})
+
+    def discover(self, ctx):
+        offsets = [page * PAGE_SIZE for page in range(ctx.option('max_pages', MAX_SEARCH_PAGES))]
+        if PARALLEL_OFFSET_MODE:
+            offsets = yield from self.fetch_offsets(ctx, offsets)
+        if offsets:
+            logging.info(f"[allrecipes] 使用浏览器从 offset={offsets[0]} 起逐页抓取")
+            yield from self.browse(ctx, offsets)
+
+    def fetch_offsets(self, ctx, offsets):
+        """并发请求各 offset 页面，按 offset 顺序产出，遇到第一个没有新图片的页面即停止
+        （最多多请求一批中剩余的页面）。请求失败时返回剩余的 offset，交给浏览器逐页抓取"""
+        with concurrent.futures.ThreadPoolExecutor(max_workers=OFFSET_FETCH_WORKERS) as executor:
+            for start in range(0, len(offsets), OFFSET_FETCH_WORKERS):
+                batch = offsets[start:start + OFFSET_FETCH_WORKERS]
+                futures = [executor.submit(ctx.get_html, build_offset_url(SEARCH_URL, offset), PAGE_HEADERS)
+                           for offset in batch]
+                logging.info(f"[allrecipes] 并发请求 offset={batch[0]}..{batch[-1]}")
+                for index, (offset, future) in enumerate(zip(batch, futures)):
+                    try:
+                        html = future.result()
+                    except requests.exceptions.RequestException as e:
+                        logging.warning(f"[allrecipes] 请求搜索页失败 (offset={offset}): {str(e)}")
+                        for pending in futures:
+                            pending.cancel()
+                        # 已产出的页面处理完后再判断是否已到最后一页
+                        ctx.drain()
+                        return [] if ctx.last_new == 0 else offsets[start + index:]
+                    yield Page(build_offset_url(SEARCH_URL, offset), html, {'offset': offset})
+                    # 页面与解析流水线进行，last_new 是上一页的新图片数
+                    if ctx.last_new == 0:
+                        logging.info(f"[allrecipes] offset={offset - PAGE_SIZE} 没有新图片，已到最后一页")
+                        # 丢弃本批中空页之后的请求
+                        for pending in futures:
+                            pending.cancel()
+                        return []
+        return []
+
+    def browse(self, ctx, offsets):
+        """用浏览器逐页打开、滚动，处理当前页时在后台标签页预取后续页面"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+
+        for index, offset in enumerate(offsets):
+            url = build_offset_url(SEARCH_URL, offset)
+            with ctx.browser() as driver:
+                ctx.open(driver, url)
+                try:
+                    with metrics.span(metrics.READY_WAIT, self.name):
+                        WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, "img")))
+                except TimeoutException:
+                    logging.warning(f"[allrecipes] 页面主要内容加载超时 (offset={offset})，继续执行...")
+                scroll_to_bottom(driver)
+                time.sleep(random.uniform(2, 3))
+                html = ctx.page_source(driver)
+
+                upcoming = offsets[index + 1:index + 1 + PREFETCH_DEPTH] if PREFETCH_NEXT_PAGE else []
+                if upcoming:
+                    ctx.prefetch(driver, [build_offset_url(SEARCH_URL, next_offset) for next_offset in upcoming],
+                                 PREFETCH_DEPTH)
+                ctx.check_budget(driver)
+            yield Page(url, html, {'offset': offset})
+            if ctx.last_new == 0:
+                logging.info(f"[allrecipes] offset={offset - PAGE_SIZE} 没有新图片，已到最后一页")
+                break
+
+    def extract(self, page, parsed=None):
+        if parsed is None:
+            image_urls = get_image_urls(page.html, self.size_filter)
+        else:
+            image_urls, hints = parsed
+            self.size_filter.merge_hints(hints)
+        records = [{'image_url': url, 'offset': page.meta['offset']} for url in image_urls]
+        return Extracted(records, [Asset(url, {'offset': page.meta['offset']}) for url in image_urls])
+
+    def should_fetch(self, asset, captured=False):
+        # 之前已判定为近似重复的URL无需再次下载；浏览器已加载的图片无需尺寸探测
+        if self.phash_index.lookup_url(asset.url):
+            return False
+        return captured or self.size_filter.allow(asset.url)
+
+    def fetched(self, asset, size):
+        self.variant_report.record(asset.url, size)
+
+    def save_asset(self, asset, content):
+        return save_image(content, f"{IMAGE_DIR}/{uuid.uuid4().hex[:6]}.jpg", self.phash_index, asset.url,
+                          dict(asset.meta, site=self.name))
+
+    def log_report(self):
+        self.size_filter.log_report()
+        self.variant_report.log_report()
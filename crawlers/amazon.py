@@ -0,0 +1,201 @@
+"""Amazon 搜索结果插件：每页单独租用浏览器，沿下一页链接翻页，处理当前页时在后台标签页预取下一页"""
+import os
+import time
+import uuid
+import random
+import logging
+
+import metrics
+import politeness
+from crawlers.base import Crawler, Extracted, Page, Asset, register, save_image
+from image_variants import select_variant, VariantReport
+from resource_blocking import PROFILES
+
+# 站点根地址，可通过环境变量指向本地替身服务器（benchmarks/standin_server.py）
+BASE_URL = os.environ.get('AMAZON_BASE_URL', 'https://www.amazon.com').rstrip('/')
+
+# 搜索结果第一页
+SEARCH_URL = f"{BASE_URL}/s?k=household+cleaning+tools&i=hpc&rh=n%3A3760901%2Cp_123%3A237711&dc&ds=v1%3AHlBzaO8xfIaSn0MCKp%2BRBs1VDSmcdVfE%2BNnNIzcT6Zc&qid=1746167441&rnid=23991400011&ref=sr_nr_p_n_feature_six_browse-bin_1"
+
+# 最多处理的页数
+MAX_PAGES = 9
+
+# 处理当前页时在后台标签页预取下一页
+PREFETCH_NEXT_PAGE = True
+PREFETCH_DEPTH = 1
+
+# 下载图片的目标宽度（选择满足该宽度的最小变体）
+TARGET_IMAGE_WIDTH = 1000
+
+# 屏蔽广告、字体、视频和第三方脚本（站点规则见 resource_blocking.PROFILES）
+BLOCK_RESOURCES = True
+
+IMAGE_DIR = 'amazon_images'
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+RESULT_SELECTOR = 'div[data-component-type="s-search-result"]'
+
+
+def get_product_data(html):
+    """解析亚马逊商品数据并返回图片URL列表"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    products = soup.find_all('div', {'data-component-type': 's-search-result'})
+    image_urls = []
+
+    for product in products:
+        try:
+            # 获取商品唯一ID (ASIN)
+            asin = product.get('data-asin')
+            if not asin:
+                continue
+
+            # 查找商品图片
+            img_container = product.find('img', {'class': 's-image'})
+            if img_container:
+                img_url = img_container.get('src')
+                if img_url and 'images' in img_url:  # 验证是否为图片URL
+                    # 按目标分辨率选择最小的合适变体
+                    variant = select_variant(img_url, TARGET_IMAGE_WIDTH, srcset=img_container.get('srcset'))
+                    image_urls.append((variant.url, asin))
+        except Exception as e:
+            logging.error(f"解析商品时出错: {str(e)}")
+            continue
+
+    return image_urls
+
+
+def scroll_to_bottom(driver):
+    """滚动到页面底部"""
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    time.sleep(random.uniform(1.5, 2.5))
+
+
+def get_next_page_url(driver):
+    """读取下一页按钮的链接，找不到时返回 None"""
+    from selenium.webdriver.common.by import By
+    try:
+        links = driver.find_elements(By.CSS_SELECTOR, 'a.s-pagination-next[href]')
+        return links[0].get_attribute('href') if links else None
+    except Exception as e:
+        logging.warning(f"读取下一页链接失败: {str(e)}")
+        return None
+
+
+def find_and_click_next_page(driver):
+    """查找并点击下一页按钮"""
+    from selenium.webdriver.common.by import By
+    politeness.acquire(driver.current_url)
+    try:
+        next_buttons = driver.find_elements(By.CSS_SELECTOR, 'a.s-pagination-next')
+        if next_buttons:
+            next_button = next_buttons[0]
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_button)
+            time.sleep(random.uniform(0.5, 1.5))
+            driver.execute_script("arguments[0].click();", next_button)
+            logging.info("通过CSS选择器找到下一页按钮并点击")
+            return True
+
+        next_buttons = driver.find_elements(By.CLASS_NAME, 's-pagination-next')
+        if next_buttons:
+            next_button = next_buttons[0]
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_button)
+            time.sleep(random.uniform(0.5, 1.5))
+            driver.execute_script("arguments[0].click();", next_button)
+            logging.info("通过类名找到下一页按钮并点击")
+            return True
+
+        next_links = driver.find_elements(By.PARTIAL_LINK_TEXT, 'Next')
+        if next_links:
+            next_link = next_links[0]
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_link)
+            time.sleep(random.uniform(0.5, 1.5))
+            driver.execute_script("arguments[0].click();", next_link)
+            logging.info("通过链接文本找到下一页按钮并点击")
+            return True
+
+        try:
+            next_button = driver.find_element(By.XPATH, "//a[contains(@class, 's-pagination-next')]")
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_button)
+            time.sleep(random.uniform(0.5, 1.5))
+            driver.execute_script("arguments[0].click();", next_button)
+            logging.info("通过XPath找到下一页按钮并点击")
+            return True
+        except:
+            pass
+
+        logging.warning("所有方法均未找到下一页按钮")
+        return False
+
+    except Exception as e:
+        logging.error(f"查找下一页按钮时出错: {str(e)}")
+        return False
+
+
+@register
+class AmazonCrawler(Crawler):
+    name = 'amazon'
+    table = 'amazon_products'
+    export_basename = 'amazon_products'
+    profile = PROFILES['amazon'] if BLOCK_RESOURCES else None
+    parser = staticmethod(get_product_data)
+
+    def __init__(self):
+        super().__init__()
+        self.asset_headers = {'User-Agent': USER_AGENT, 'Referer': f'{BASE_URL}/'}
+        # 统计实际流量与固定放大到 UL1500 的对比
+        self.variant_report = VariantReport(headers={'Referer': f'{BASE_URL}/'})
+
+    def discover(self, ctx):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        url = ctx.option('start_url', SEARCH_URL)
+        first_page = ctx.option('first_page', 1)
+        last_page = first_page + ctx.option('max_pages', MAX_PAGES) - 1
+        for page in range(first_page, last_page + 1):
+            # 只在加载和读取页面时占用浏览器，解析和下载期间浏览器可供其他任务使用
+            with ctx.browser() as driver:
+                ctx.open(driver, url)
+                try:
+                    with metrics.span(metrics.READY_WAIT, self.name):
+                        WebDriverWait(driver, 20).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, RESULT_SELECTOR))
+                        )
+                except Exception as e:
+                    logging.warning(f"[{self.name}] 等待商品加载超时: {str(e)}")
+                scroll_to_bottom(driver)
+                html = ctx.page_source(driver)
+
+                next_url = None
+                if page < last_page:
+                    next_url = get_next_page_url(driver)
+                    if not next_url and find_and_click_next_page(driver):
+                        # 下一页按钮没有链接时点击翻页，记下翻页后的地址
+                        WebDriverWait(driver, 20).until(EC.url_changes(url))
+                        next_url = driver.current_url
+                    if next_url and PREFETCH_NEXT_PAGE:
+                        ctx.prefetch(driver, [next_url], PREFETCH_DEPTH)
+                ctx.check_budget(driver)
+            yield Page(url, html, {'page': page})
+            if not next_url:
+                break
+            url = next_url
+
+    def extract(self, page, parsed=None):
+        image_urls = get_product_data(page.html) if parsed is None else parsed
+        records = [{'asin': asin, 'image_url': img_url, 'page': page.meta['page']} for img_url, asin in image_urls]
+        return Extracted(records, [Asset(img_url, {'asin': asin, 'page': page.meta['page']})
+                                    for img_url, asin in image_urls])
+
+    def fetched(self, asset, size):
+        self.variant_report.record(asset.url, size)
+
+    def save_asset(self, asset, content):
+        return save_image(content, os.path.join(IMAGE_DIR, f"{asset.meta['asin']}_{uuid.uuid4().hex[:6]}.jpg"),
+                          url=asset.url, meta=dict(asset.meta, site=self.name))
+
+    def log_report(self):
+        self.variant_report.log_report()
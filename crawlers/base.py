@@ -0,0 +1,128 @@
+"""爬虫插件接口和注册表
+
+每个站点一个 Crawler 插件，一次爬取分为四步：
+1. discover(ctx)：生成器，逐个产出页面（Page）。浏览器从 ctx.browser() 租用，HTTP 请求使用 ctx.http；
+   页面解析与生成器流水线进行：产出第 N 页后，编排器把它交给解析进程、处理完第 N-1 页即继续执行生成器，
+   此时 ctx.last_new / ctx.no_new_rounds 反映第 N-1 页，滚动类站点据此决定是否停止（多滚动一次）；
+   需要全部已产出页面的结果时（例如换浏览器前确定恢复位置）调用 ctx.drain()。
+   在 with ctx.browser() 中产出页面时，编排器的交接时间（page_handoff）也计入浏览器租用时间，
+   因此分页站点在产出页面前归还浏览器；
+2. extract(page, parsed)：从页面中提取结果行和需要下载的资源（Extracted）。插件设置了 parser 时，
+   编排器先在解析进程中执行 parser(page.html)，结果作为 parsed 传入；
+3. 下载资源：由共享的下载引擎完成，下载前调用 should_fetch(asset, captured)，
+   通过HTTP下载后调用 fetched(asset, 字节数)，最后调用 save_asset(asset, content)，
+   整个过程在 downloading(asset) 返回的上下文中进行；
+4. persist(store, records)：写入结果库，全部完成后 export(store) 导出。
+站点的常量、页面操作和解析函数都定义在插件模块中，站点脚本（Amazon.py 等）和分布式 worker 只是运行插件的入口。
+插件模块导入时不打开数据库、不创建文件，解析进程中可以直接使用；尺寸过滤和近似重复索引在创建插件实例时打开。
+"""
+import io
+import os
+import logging
+import importlib
+from collections import namedtuple
+from contextlib import nullcontext
+
+# 一个待提取的页面：URL、HTML 和插件自定义的附加信息
+Page = namedtuple('Page', ['url', 'html', 'meta'])
+
+# 一个待下载的资源
+Asset = namedtuple('Asset', ['url', 'meta'])
+
+# 一个页面的提取结果：结果库的行（字典）和资源列表
+Extracted = namedtuple('Extracted', ['records', 'assets'])
+
+# 站点 -> 插件类（插件模块导入时注册）
+CRAWLERS = {}
+
+
+def register(cls):
+    """类装饰器：按 cls.name 注册插件"""
+    CRAWLERS[cls.name] = cls
+    return cls
+
+
+def get_crawler(name):
+    """创建站点插件，插件模块在第一次使用时导入"""
+    if name not in CRAWLERS:
+        importlib.import_module(f"crawlers.{name}")
+    return CRAWLERS[name]()
+
+
+def save_image(content, path, dedup_index=None, url=None, meta=None):
+    """把图片内容保存为 JPEG（或按 IMAGE_OUTPUT 写入分片），返回保存位置；
+    传入近似重复索引且判定为重复时返回空字符串"""
+    from PIL import Image
+    from image_dedup import dhash
+    import shard_writer
+
+    image = Image.open(io.BytesIO(content))
+    if dedup_index is not None:
+        duplicate = dedup_index.register(dhash(image), path, url)
+        if duplicate:
+            logging.info(f"跳过近似重复图片: {url} -> {duplicate.path} (汉明距离 {duplicate.distance})")
+            return ''
+
+    try:
+        if not shard_writer.sharded():
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        return shard_writer.save_image(image, path, dict(meta or {}, url=url))
+    except Exception:
+        if dedup_index is not None:
+            dedup_index.unregister(path)
+        raise
+
+
+class Crawler:
+    """站点插件基类"""
+
+    # 站点名（同 crawlers.scripts.SCRIPTS 的键）、结果表和导出文件名
+    name = None
+    table = None
+    export_basename = None
+
+    # 资源屏蔽配置（resource_blocking.PROFILES），为 None 时不屏蔽
+    profile = None
+
+    # 在解析进程中执行的页面解析函数 html -> 结果，必须是可以 pickle 的模块级函数（写作 staticmethod(函数)）；
+    # 为 None 时由 extract 在任务线程中解析
+    parser = None
+
+    # 下载资源时使用的请求头
+    asset_headers = {}
+
+    def discover(self, ctx):
+        raise NotImplementedError
+
+    def extract(self, page, parsed=None):
+        """parsed 为 parser(page.html) 的结果；回放录制的页面时为 None，由 extract 自行解析"""
+        raise NotImplementedError
+
+    def prepare_driver(self, driver):
+        """浏览器第一次用于本站点时调用（例如加载 Cookies）"""
+
+    def should_fetch(self, asset, captured=False):
+        """下载前过滤（尺寸、已知重复），在下载线程中调用；captured 表示浏览器已截获该资源的字节"""
+        return True
+
+    def downloading(self, asset):
+        """下载线程处理一个资源（过滤、下载、保存）期间的上下文，例如按站点计时"""
+        return nullcontext()
+
+    def fetched(self, asset, size):
+        """资源通过HTTP下载后调用（例如统计变体流量）"""
+
+    def save_asset(self, asset, content):
+        """保存下载的资源，返回文件路径；按规则跳过时返回空字符串"""
+        raise NotImplementedError
+
+    def persist(self, store, records):
+        store.upsert(self.table, records)
+
+    def export(self, store):
+        return store.export(self.table, self.export_basename, run_id=store.run_id)
+
+    def log_report(self):
+        """爬取结束时输出站点自己的统计"""
@@ -0,0 +1,221 @@
+"""Booking 景点列表插件：滚动加载图片，下载前按尺寸和近似重复索引过滤
+
+景点列表是无限滚动，换浏览器后无法按URL恢复位置，因此不按滚动次数回收浏览器。
+内存超过阈值或浏览器崩溃时换一个浏览器重新打开列表页，先不产出页面地滚动到已记录的深度，
+再继续抓取（已发现的图片由 ctx.seen_keys 去重）。重放的代价随深度线性增长，
+每次约为已滚动次数 × 1~2 秒，因此崩溃重启最多 MAX_BROWSER_RESTARTS 次。
+"""
+import os
+import time
+import uuid
+import random
+import logging
+
+import metrics
+import politeness
+from crawlers.base import Crawler, Extracted, Page, Asset, register, save_image
+from image_dedup import open_index
+from image_filter import ImageSizeFilter
+from resource_blocking import PROFILES
+
+# 站点根地址，可通过环境变量指向本地替身服务器（benchmarks/standin_server.py）
+BASE_URL = os.environ.get('BOOKING_BASE_URL', 'https://www.booking.com').rstrip('/')
+
+# 大阪景点搜索结果页
+TARGET_URL = f"{BASE_URL}/attractions/searchresults/jp/osaka.html?adplat=www-searchresults_irene-web_shell_header-attraction-missing_creative-2ib34fEzYYgPNhzHDqbp6C&aid=304142&label=gen173nr-1FCAEoggI46AdIM1gEaMkBiAEBmAExuAEHyAEM2AEB6AEB-AECiAIBqAIDuAL16tLABsACAdICJGYxMjNhYWEyLThhNjktNGU4Ny05NDA3LTgyZWIyOTJkZGRmN9gCBeACAQ&client_name=b-web-shell-bff&distribution_id=2ib34fEzYYgPNhzHDqbp6C&start_date=2025-06-13&end_date=2025-06-13&source=search_box&filter_by_ufi%5B%5D=-231169"
+
+# 屏蔽广告、字体、视频和第三方脚本（站点规则见 resource_blocking.PROFILES）
+BLOCK_RESOURCES = True
+
+# 图片保存目录（由近似重复索引创建）
+IMAGE_DIR = 'booking_attractions_images'
+
+# 设置请求头
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36',
+    'Accept': 'image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': f'{BASE_URL}/',
+    'Connection': 'keep-alive',
+    'Pragma': 'no-cache',
+    'Cache-Control': 'no-cache'
+}
+
+MAX_SCROLLS = 50
+MAX_NO_NEW_ROUNDS = 5
+MAX_BROWSER_RESTARTS = 3
+
+
+def extract_image_urls(html_content, size_filter=None):
+    """从HTML内容中提取所有图片URL，可选地记录尺寸提示供下载前过滤"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    image_urls = []
+
+    # 查找所有图片标签
+    img_tags = soup.find_all('img')
+    logging.info(f"找到 {len(img_tags)} 个图片标签")
+
+    for img in img_tags:
+        try:
+            # 获取图片URL - 优先使用data-src属性（延迟加载图片）
+            img_url = img.get('data-src') or img.get('src')
+
+            # 跳过无效URL
+            if not img_url or 'data:image' in img_url or 'base64' in img_url:
+                continue
+
+            # 确保URL完整
+            if img_url.startswith('//'):
+                img_url = 'https:' + img_url
+            elif img_url.startswith('/'):
+                img_url = BASE_URL + img_url
+
+            # 记录 width/height/srcset 尺寸提示
+            if size_filter is not None:
+                size_filter.note_tag(img_url, img)
+
+            # 添加到列表
+            if img_url not in image_urls:
+                image_urls.append(img_url)
+        except Exception as e:
+            logging.error(f"处理图片标签时出错: {str(e)}")
+            continue
+
+    return image_urls
+
+
+def extract_image_urls_with_hints(html_content):
+    """提取图片URL并一并返回尺寸提示（在解析进程中调用，进程内记录的提示不会自动回到主进程）"""
+    hint_filter = ImageSizeFilter()
+    image_urls = extract_image_urls(html_content, hint_filter)
+    return image_urls, hint_filter.export_hints()
+
+
+@register
+class BookingCrawler(Crawler):
+    name = 'booking'
+    table = 'booking_images'
+    export_basename = 'booking_image_urls'
+    profile = PROFILES['booking'] if BLOCK_RESOURCES else None
+    parser = staticmethod(extract_image_urls_with_hints)
+
+    def __init__(self):
+        super().__init__()
+        self.asset_headers = HEADERS
+        # 下载前尺寸过滤，跳过图标、追踪像素等小图；跨运行的近似重复索引（同时创建图片目录）
+        self.size_filter = ImageSizeFilter(min_width=100, min_height=100, headers=HEADERS)
+        self.phash_index = open_index(IMAGE_DIR)
+
+    def prepare_driver(self, driver):
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+    def discover(self, ctx):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from driver_supervisor import is_browser_crash
+
+        max_scrolls = ctx.option('max_scrolls', MAX_SCROLLS)
+        scroll = restarts = 0
+        while scroll < max_scrolls:
+            with ctx.browser() as driver:
+                try:
+                    logging.info(f"[{self.name}] 访问URL: {TARGET_URL}")
+                    ctx.open(driver, TARGET_URL)
+                    with metrics.span(metrics.READY_WAIT, self.name):
+                        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, "img")))
+                    time.sleep(random.uniform(2, 4))
+                    if scroll:
+                        self.replay(driver, scroll)
+                except Exception as e:
+                    if not is_browser_crash(e):
+                        raise
+                    crashed = e
+                else:
+                    crashed, scroll = yield from self.scroll(ctx, driver, scroll, max_scrolls)
+                if crashed is not None:
+                    ctx.retire(driver, "浏览器崩溃")
+            if crashed is None:
+                if ctx.no_new_rounds >= MAX_NO_NEW_ROUNDS:
+                    return
+                continue
+            if restarts >= MAX_BROWSER_RESTARTS:
+                logging.warning(f"[{self.name}] 浏览器已崩溃 {restarts + 1} 次，结束滚动")
+                return
+            restarts += 1
+            logging.warning(f"[{self.name}] 浏览器崩溃，第 {restarts} 次重启: "
+                            f"{str(crashed).splitlines()[0] if str(crashed) else crashed}")
+
+    def replay(self, driver, depth):
+        """在新浏览器中滚动到已记录的深度，不产出页面（这些内容之前已处理过）"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+
+        logging.info(f"[{self.name}] 恢复位置：重新滚动 {depth} 次")
+        with metrics.span(metrics.PAGE_LOAD, self.name):
+            for _ in range(depth):
+                politeness.acquire(driver.current_url)
+                driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.END)
+                time.sleep(random.uniform(1, 2))
+
+    def scroll(self, ctx, driver, scroll, max_scrolls):
+        """在当前浏览器中继续滚动并产出页面，返回 (崩溃异常或 None, 已滚动次数)；
+        连续没有新内容或内存超过阈值时正常返回"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+        from driver_supervisor import is_browser_crash
+
+        while scroll < max_scrolls:
+            scroll += 1
+            try:
+                if ctx.no_new_rounds:
+                    # 上一次滚动没有新图片：等待更长时间，隔一次滚回顶部再滚到底部以触发更多内容加载
+                    time.sleep(random.uniform(3, 5))
+                    if ctx.no_new_rounds % 2 == 0:
+                        driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.HOME)
+                        time.sleep(random.uniform(1, 2))
+
+                # 滚动到页面底部（会向站点请求下一批内容）
+                politeness.acquire(driver.current_url)
+                driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.END)
+                time.sleep(random.uniform(2, 4))
+                html = ctx.page_source(driver)
+            except Exception as e:
+                if is_browser_crash(e):
+                    return e, scroll - 1
+                logging.error(f"[{self.name}] 滚动处理出错: {str(e)}")
+                time.sleep(3)
+                continue
+
+            yield Page(TARGET_URL, html, {'scroll': scroll})
+            if ctx.no_new_rounds >= MAX_NO_NEW_ROUNDS:
+                logging.info(f"[{self.name}] 连续 {MAX_NO_NEW_ROUNDS} 次滚动没有新内容，停止滚动")
+                break
+            reason = ctx.check_budget(driver)
+            if reason:
+                logging.info(f"[{self.name}] 换一个浏览器继续滚动: {reason}")
+                break
+        return None, scroll
+
+    def extract(self, page, parsed=None):
+        if parsed is None:
+            image_urls = extract_image_urls(page.html, self.size_filter)
+        else:
+            image_urls, hints = parsed
+            self.size_filter.merge_hints(hints)
+        records = [{'image_url': url, 'scroll': page.meta['scroll']} for url in image_urls]
+        return Extracted(records, [Asset(url, {'scroll': page.meta['scroll']}) for url in image_urls])
+
+    def should_fetch(self, asset, captured=False):
+        # 之前已判定为近似重复的URL无需再次下载；浏览器已加载的图片无需尺寸探测
+        if self.phash_index.lookup_url(asset.url):
+            return False
+        return captured or self.size_filter.allow(asset.url)
+
+    def save_asset(self, asset, content):
+        path = os.path.join(IMAGE_DIR, f"{uuid.uuid4().hex[:8]}.jpg")
+        return save_image(content, path, self.phash_index, asset.url, dict(asset.meta, site=self.name))
+
+    def log_report(self):
+        self.size_filter.log_report()
@@ -0,0 +1,65 @@
+"""命令行入口：在一个进程中并发运行多个站点任务"""
+import sys
+import logging
+import argparse
+
+from crawlers.scripts import SCRIPTS
+
+
+def run_site(site, log_file=None):
+    """站点脚本（Amazon.py 等）的入口：用共享的编排器运行一个站点任务，返回退出码"""
+    import metrics
+    import profiling
+    from crawlers.engine import run_jobs
+
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', handlers=handlers)
+    metrics.serve()
+    profiling.install(site)
+    results = run_jobs([site], browsers=1)
+    return 0 if results.get(site) else 1
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='并发运行多个站点爬虫（共享浏览器池和下载引擎）')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='列出可用站点')
+    run = commands.add_parser('run', help='并发运行站点任务')
+    run.add_argument('sites', nargs='+', choices=list(SCRIPTS))
+    run.add_argument('--browsers', type=int, default=2, help='共享浏览器数量上限')
+    run.add_argument('--download-workers', type=int, default=16, help='下载线程数（所有站点共用）')
+    run.add_argument('--max-pages', type=int, help='分页站点最多处理的页数（默认沿用插件的设置）')
+    run.add_argument('--max-scrolls', type=int, help='滚动站点最多滚动次数')
+    run.add_argument('--db', default='crawl_results.sqlite', help='结果库路径')
+    run.add_argument('--export-formats', help='导出格式，逗号分隔：excel,csv,parquet（默认读取 EXPORT_FORMATS）')
+    run.add_argument('--record', action='store_true', help='把抓到的页面录制到快照归档（见 snapshot_archive.py）')
+    run.add_argument('--profile', action='store_true', help='开启采样分析和内存快照（运行中也可发送 SIGUSR1 切换）')
+    run.add_argument('--metrics-port', type=int, help='在该端口提供 /metrics 和 /summary（默认读取 METRICS_PORT）')
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for site, script in SCRIPTS.items():
+            print(f"{site:<12}{script}")
+        return 0
+
+    import metrics
+    import profiling
+    import snapshot_archive
+    import result_store
+    from crawlers.engine import run_jobs
+    metrics.serve(args.metrics_port)
+    profiling.install('crawlers', enabled=args.profile or None)
+    snapshot_archive.RECORD = snapshot_archive.RECORD or args.record
+    if args.export_formats:
+        result_store.EXPORT_FORMATS = tuple(f.strip() for f in args.export_formats.split(',') if f.strip())
+    results = run_jobs(list(dict.fromkeys(args.sites)), browsers=args.browsers,
+                       download_workers=args.download_workers, db_path=args.db,
+                       options={'max_pages': args.max_pages, 'max_scrolls': args.max_scrolls})
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,663 @@
+"""编排器：在一个进程中并发运行多个站点的爬取任务
+
+所有任务共享：
+- DriverPool：固定数量的浏览器，任务按页面（分页站点）或按滚动会话（无限滚动站点）租用，
+  用完归还给其他任务，浏览器数量与任务数量无关。每个浏览器有自己的内存监督（超过阈值时在归还后回收）、
+  CDP 网络事件（截获已加载的图片，流量计入当前租用的任务）和后台预取标签页；
+- 一个 requests.Session（经过 politeness 限速的连接池），用于不需要浏览器的页面请求和资源下载；
+- DownloadEngine：一个下载线程池，按URL去重、重试，下载完成后交给插件保存；待下载的资源记录在
+  持久化队列（crawl_frontier）中，中断后下次运行从断点继续；
+- 一个 ResultStore。
+每个任务在自己的线程中执行 discover → extract → persist：页面交给解析进程后 discover 立即继续下一页，
+同时处理上一页的解析结果（写入结果库、把资源交给下载引擎），所有任务共用一个按CPU核数设定的解析进程池。
+分页站点在产出页面前归还浏览器；滚动站点在整个滚动会话中持有浏览器，每页交接期间（提交解析、
+处理上一页的结果）的占用时间记为 page_handoff 阶段，并在任务结束时汇总。站点脚本（Amazon.py 等）和分布式 worker 也通过这里运行插件。
+"""
+import os
+import time
+import random
+import logging
+import threading
+import concurrent.futures
+from contextlib import contextmanager
+
+import requests
+
+import metrics
+import profiling
+import snapshot_archive
+import shard_writer
+import politeness
+from crawl_frontier import CrawlFrontier, canonicalize_url
+from parse_pool import ParsePipeline
+from politeness import PoliteAdapter
+from result_store import ResultStore, TABLES
+from resource_blocking import BlockingProfile, TrafficMeter, apply_blocked_urls
+
+# 共享浏览器不按站点设置 prefs（图片由各站点的URL屏蔽规则控制），只关闭通知等内容设置
+SHARED_PROFILE = BlockingProfile('shared', [], [], False)
+
+# 在进程池中解析页面（插件设置了 parser 时），解析期间任务线程不占用 GIL
+PARSE_IN_PROCESS_POOL = os.environ.get('PARSE_IN_PROCESS_POOL', '1') != '0'
+
+# 解析进程数（所有任务共用一个进程池），默认为CPU核数
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', '0')) or (os.cpu_count() or 1)
+
+# 复用浏览器渲染时已加载的图片，只有页面未加载过的资源才另行下载
+CAPTURE_BROWSER_IMAGES = os.environ.get('CAPTURE_BROWSER_IMAGES', '1') != '0'
+
+# 浏览器内存阈值（MB），超过时在归还后回收该浏览器
+MAX_BROWSER_RSS_MB = int(os.environ.get('MAX_BROWSER_RSS_MB', '2048'))
+MAX_JS_HEAP_MB = int(os.environ.get('MAX_JS_HEAP_MB', '512'))
+
+# 下载结果攒够这么多条或距上次写入超过这么多秒时，才在一个事务中写回抓取队列
+FRONTIER_BATCH_SIZE = int(os.environ.get('FRONTIER_BATCH_SIZE', '32'))
+FRONTIER_BATCH_SECONDS = float(os.environ.get('FRONTIER_BATCH_SECONDS', '2'))
+
+
+def _parse_context():
+    """解析进程的启动方式：编排器是多线程进程，支持 forkserver 时不直接 fork"""
+    import multiprocessing
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else None
+    return multiprocessing.get_context(method)
+
+
+def open_parse_executor():
+    """所有任务共用的解析进程池（进程按需启动）；不在进程池中解析时返回 None"""
+    if not PARSE_IN_PROCESS_POOL:
+        return None
+    return concurrent.futures.ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=_parse_context())
+
+
+class _Browser:
+    """池中的一个浏览器及其附属状态"""
+
+    def __init__(self, launch, capture=None):
+        from driver_supervisor import DriverSupervisor
+        from browser_capture import NetworkEventTap
+
+        # 只做内存检查；回收在归还浏览器时进行
+        self.supervisor = DriverSupervisor(launch, max_rss_mb=MAX_BROWSER_RSS_MB, max_js_heap_mb=MAX_JS_HEAP_MB)
+        self.driver = self.supervisor.start()
+        self.tap = NetworkEventTap(self.driver)
+        self.tap.subscribe(self._dispatch)
+        if capture is not None:
+            capture.attach(self.tap)
+
+        # 当前租用任务的网络事件回调（流量统计）
+        self.listener = None
+        self.prefetcher = None
+        self.prepared = set()
+        self.crawler = None
+        self.retire_reason = None
+
+    def _dispatch(self, method, params):
+        listener = self.listener
+        if listener is not None:
+            listener(method, params)
+
+
+class DriverPool:
+    """固定上限的共享浏览器池（线程安全）
+
+    租用时按站点设置URL屏蔽规则，浏览器第一次用于某站点时调用插件的 prepare_driver；
+    租用期间抛出 WebDriverException 的浏览器视为损坏，关闭后不再归还；
+    check_budget() 发现内存超过阈值或任务调用 retire() 的浏览器在归还时回收，下一次租用重新创建。
+    """
+
+    def __init__(self, size=2, launcher=None, capture=None):
+        self.size = size
+        self.launcher = launcher
+        self.capture = capture
+        self._slots = threading.Semaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._entries = {}
+
+        # 统计
+        self.created = 0
+        self.discarded = 0
+        self.recycled = 0
+        self.leases = 0
+        self.wait_seconds = 0.0
+        self.peak_rss_mb = 0.0
+        self.peak_js_heap_mb = 0.0
+
+    def _launch(self):
+        from selenium import webdriver
+        from browser_daemon import open_browser, chrome_options
+
+        return open_browser(chrome_options(SHARED_PROFILE, performance_log=True), self.launcher or webdriver.Chrome)
+
+    def _open(self):
+        entry = _Browser(self._launch, self.capture)
+        with self._lock:
+            self.created += 1
+            self._entries[id(entry.driver)] = entry
+        return entry
+
+    def _entry(self, driver):
+        return self._entries[id(driver)]
+
+    def _quit(self, entry):
+        if entry.prefetcher is not None:
+            entry.prefetcher.close_all()
+            if entry.prefetcher.opened:
+                entry.prefetcher.log_report()
+        with self._lock:
+            self.peak_rss_mb = max(self.peak_rss_mb, entry.supervisor.peak_rss_mb)
+            self.peak_js_heap_mb = max(self.peak_js_heap_mb, entry.supervisor.peak_js_heap_mb)
+        # 守护浏览器内存超限时由 supervisor 重启守护浏览器或改为冷启动
+        entry.supervisor.quit()
+
+    def _discard(self, entry):
+        with self._lock:
+            self.discarded += 1
+            self._entries.pop(id(entry.driver), None)
+        try:
+            self._quit(entry)
+        except Exception:
+            pass
+
+    def _configure(self, entry, crawler):
+        """按站点设置URL屏蔽规则（预取的新标签页同样需要），再恢复网络事件的缓冲区设置"""
+        if crawler.profile:
+            apply_blocked_urls(entry.driver, crawler.profile, images_by_url=True)
+        entry.tap.enable()
+
+    @contextmanager
+    def lease(self, crawler, listener=None):
+        """租用一个浏览器，所有浏览器都在使用中时等待；listener 接收租用期间的网络事件"""
+        from selenium.common.exceptions import WebDriverException
+
+        started = time.perf_counter()
+        self._slots.acquire()
+        waited = time.perf_counter() - started
+        metrics.observe('browser_wait', waited, crawler.name)
+        with self._lock:
+            self.leases += 1
+            self.wait_seconds += waited
+            entry = self._idle.pop() if self._idle else None
+
+        try:
+            if entry is None:
+                entry = self._open()
+            self._configure(entry, crawler)
+            if entry.crawler != crawler.name and entry.prefetcher is not None:
+                # 其他站点预取的页面不会再用到
+                entry.prefetcher.close_all()
+            entry.crawler = crawler.name
+            if crawler.name not in entry.prepared:
+                crawler.prepare_driver(entry.driver)
+                entry.prepared.add(crawler.name)
+        except Exception:
+            if entry is not None:
+                self._discard(entry)
+            self._slots.release()
+            raise
+
+        entry.listener = listener
+        broken = False
+        try:
+            yield entry.driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            if not broken:
+                # 归还前处理本次租用期间的网络事件（截获图片、统计流量）
+                entry.tap.poll()
+            entry.listener = None
+            if broken:
+                logging.warning(f"[{crawler.name}] 浏览器出错，关闭后由下一次租用重新创建")
+                self._discard(entry)
+            elif entry.retire_reason:
+                logging.info(f"[{crawler.name}] 回收浏览器: {entry.retire_reason}")
+                with self._lock:
+                    self.recycled += 1
+                self._discard(entry)
+            else:
+                with self._lock:
+                    self._idle.append(entry)
+            self._slots.release()
+
+    def poll(self, driver):
+        """处理浏览器到目前为止的网络事件"""
+        self._entry(driver).tap.poll()
+
+    def check_budget(self, driver):
+        """每轮（一页或一次滚动）之后调用：内存超过阈值时返回原因，该浏览器在归还时回收"""
+        entry = self._entry(driver)
+        reason = entry.supervisor.check_budget()
+        if reason:
+            entry.retire_reason = reason
+        return reason
+
+    def retire(self, driver, reason):
+        """归还后回收该浏览器（例如达到每个浏览器实例的滚动预算或已经崩溃）"""
+        self._entry(driver).retire_reason = reason
+
+    def prefetch(self, driver, crawler, urls, depth=1):
+        """在后台标签页中打开后续页面，之后租用同一个浏览器时 advance() 直接切换过去"""
+        from page_prefetch import TabPrefetcher
+
+        entry = self._entry(driver)
+        if entry.prefetcher is None:
+            entry.prefetcher = TabPrefetcher(driver)
+        entry.prefetcher.depth = depth
+        entry.prefetcher.on_new_tab = lambda tab_driver: self._configure(entry, crawler)
+        entry.prefetcher.prefetch(urls)
+
+    def advance(self, driver, url):
+        """url 已在该浏览器中预取时切换过去并返回 True"""
+        prefetcher = self._entry(driver).prefetcher
+        return prefetcher is not None and bool(prefetcher.pending) and prefetcher.advance(url)
+
+    def log_report(self):
+        logging.info(f"浏览器池: 上限 {self.size} 个, 共创建 {self.created} 个 (关闭 {self.discarded} 个, "
+                     f"其中按内存或预算回收 {self.recycled} 个), 租用 {self.leases} 次, "
+                     f"等待浏览器共 {self.wait_seconds:.1f} 秒; 单个浏览器峰值内存 {self.peak_rss_mb:.0f} MB, "
+                     f"峰值 JS 堆 {self.peak_js_heap_mb:.0f} MB")
+
+    def close(self):
+        with self._lock:
+            entries, self._entries, self._idle = list(self._entries.values()), {}, []
+        for entry in entries:
+            try:
+                self._quit(entry)
+            except Exception:
+                pass
+
+
+def open_http_session(pool_size):
+    """所有任务共用的 Session，每个请求（包括重定向）都经过按域名限速"""
+    session = requests.Session()
+    for prefix in ('https://', 'http://'):
+        session.mount(prefix, PoliteAdapter(pool_connections=16, pool_maxsize=pool_size))
+    return session
+
+
+class DownloadEngine:
+    """所有站点共用的下载线程池：按URL去重，429 和 5xx 指数退避重试
+
+    传入 frontier 时提交的资源先写入持久化队列，只下载仍处于待处理的条目（之前的运行中已完成的跳过），
+    结果按批写回队列（wait/close 时写入剩余结果；进程中断时未写回的条目仍是处理中，下次运行由 recover 恢复）；
+    传入 capture 时优先使用浏览器已截获的字节。
+    """
+
+    def __init__(self, session, workers=16, retries=3, timeout=15, frontier=None, capture=None):
+        self.session = session
+        self.retries = retries
+        self.timeout = timeout
+        self.frontier = frontier
+        self.capture = capture
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='download')
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._futures = []
+        self._pending = 0
+        self._results = []
+        self._flushed = time.monotonic()
+        metrics.set_queue_depth('downloads', lambda: self._pending)
+
+        # 站点 -> [提交数, 保存数, 跳过数, 失败数, 字节数]
+        self._stats = {}
+
+    def _count(self, site, index, amount=1):
+        with self._lock:
+            self._stats.setdefault(site, [0, 0, 0, 0, 0])[index] += amount
+
+    def _enqueue(self, crawler, items):
+        with self._lock:
+            for key, asset in items:
+                self._pending += 1
+                self._futures.append(self._executor.submit(self._download, crawler, key, asset))
+        self._count(crawler.name, 0, len(items))
+        return len(items)
+
+    def submit(self, crawler, assets):
+        """提交资源，同一进程内相同（规范化后）URL只下载一次，返回新提交的数量"""
+        fresh = {}
+        with self._lock:
+            for asset in assets:
+                key = canonicalize_url(asset.url)
+                if key not in self._seen:
+                    self._seen.add(key)
+                    fresh.setdefault(key, asset)
+        if self.frontier is not None and fresh:
+            self.frontier.add(crawler.name, [(asset.url, asset.meta) for asset in fresh.values()])
+            claimed = set(self.frontier.claim_keys(crawler.name, fresh))
+            fresh = {key: asset for key, asset in fresh.items() if key in claimed}
+        return self._enqueue(crawler, list(fresh.items()))
+
+    def resume(self, crawler):
+        """重新提交上次运行中断或失败的下载，返回提交的数量"""
+        if self.frontier is None:
+            return 0
+        from crawlers.base import Asset
+
+        self.frontier.recover(crawler.name)
+        resumed = 0
+        while True:
+            items = self.frontier.claim(crawler.name, 256)
+            if not items:
+                return resumed
+            with self._lock:
+                self._seen.update(item.key for item in items)
+            resumed += self._enqueue(crawler, [(item.key, Asset(item.url, item.meta)) for item in items])
+
+    def fetch(self, url, headers, site=None):
+        """请求资源内容，失败时返回 None"""
+        for attempt in range(self.retries):
+            try:
+                with metrics.span(metrics.IMAGE_DOWNLOAD, site):
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+                    if response.status_code == 429 or response.status_code >= 500:
+                        raise requests.exceptions.HTTPError(f"HTTP {response.status_code}", response=response)
+                    response.raise_for_status()
+                metrics.add_bytes('image', len(response.content), site)
+                return response.content
+            except requests.exceptions.RequestException as e:
+                status = e.response.status_code if e.response is not None else None
+                if status is not None and status < 500 and status != 429:
+                    logging.error(f"下载失败: {url} - {str(e)}")
+                    return None
+                logging.warning(f"下载失败 (尝试 {attempt + 1}/{self.retries}): {url} - {str(e)}")
+                if attempt + 1 < self.retries:
+                    time.sleep(2 ** attempt + random.uniform(0, 1))
+        return None
+
+    def download(self, crawler, asset):
+        """下载并保存一个资源（在调用线程中执行）：返回保存位置，按规则跳过时返回空字符串，失败时返回 None"""
+        with crawler.downloading(asset):
+            content = self.capture.take(asset.url) if self.capture is not None else None
+            if not crawler.should_fetch(asset, captured=content is not None):
+                self._count(crawler.name, 2)
+                return ''
+            if content is None:
+                content = self.fetch(asset.url, crawler.asset_headers, crawler.name)
+                if content is None:
+                    self._count(crawler.name, 3)
+                    return None
+                crawler.fetched(asset, len(content))
+            self._count(crawler.name, 4, len(content))
+            with metrics.span(metrics.TRANSCODE, crawler.name):
+                path = crawler.save_asset(asset, content)
+            if path:
+                logging.info(f"[{crawler.name}] 下载成功: {path}")
+                self._count(crawler.name, 1)
+            else:
+                self._count(crawler.name, 2)
+            return path
+
+    def _download(self, crawler, key, asset):
+        try:
+            path = self.download(crawler, asset)
+            result = path
+        except Exception as e:
+            logging.error(f"[{crawler.name}] 处理资源出错: {asset.url} - {str(e)}")
+            self._count(crawler.name, 3)
+            path, result = None, str(e)
+        try:
+            if self.frontier is not None:
+                with self._lock:
+                    self._results.append((key, path is not None, result))
+                    due = (len(self._results) >= FRONTIER_BATCH_SIZE
+                           or time.monotonic() - self._flushed >= FRONTIER_BATCH_SECONDS)
+                if due:
+                    self.flush()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def flush(self):
+        """把攒下的下载结果在一个事务中写回抓取队列"""
+        with self._lock:
+            results, self._results = self._results, []
+            self._flushed = time.monotonic()
+        if results:
+            try:
+                self.frontier.complete(results)
+            except Exception as e:
+                # 这些条目保持处理中，下次运行时恢复
+                logging.error(f"写回 {len(results)} 个下载结果失败: {str(e)}")
+
+    def wait(self):
+        """等待所有已提交的下载完成（下载过程中提交的新任务也会等待）"""
+        while True:
+            with self._lock:
+                futures, self._futures = self._futures, []
+            if not futures:
+                if self.frontier is not None:
+                    self.flush()
+                return
+            concurrent.futures.wait(futures)
+            profiling.checkpoint('download_batch')
+
+    def log_report(self):
+        with self._lock:
+            stats = {site: list(values) for site, values in self._stats.items()}
+        for site, (submitted, saved, skipped, failed, size) in sorted(stats.items()):
+            logging.info(f"[{site}] 下载: 提交 {submitted} 个, 保存 {saved} 个, 跳过 {skipped} 个, "
+                         f"失败 {failed} 个, 共 {size / 1024 / 1024:.1f} MB")
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self.frontier is not None:
+            self.flush()
+
+
+class JobContext:
+    """一个站点任务在 discover 中可用的共享资源和进度"""
+
+    def __init__(self, crawler, pool, http, options=None, parse_executor=None):
+        self.crawler = crawler
+        self.pool = pool
+        self.http = http
+        self.options = dict(options or {})
+        self.traffic = TrafficMeter(crawler.profile) if crawler.profile else None
+        self.parser = ParsePipeline(max_workers=PARSE_WORKERS, enabled=PARSE_IN_PROCESS_POOL, site=crawler.name,
+                                    mp_context=_parse_context(), executor=parse_executor)
+
+        # 已处理结果的主键（推文ID、ASIN 等）、最近处理完的页面的新结果数、连续没有新结果的页面数（由编排器更新）。
+        # 页面解析与 discover 流水线进行，产出第 N 页后恢复 discover 时这些值反映的是第 N-1 页
+        self.seen_keys = set()
+        self.last_new = None
+        self.no_new_rounds = 0
+        self._drain = None
+
+    def option(self, name, default):
+        value = self.options.get(name)
+        return default if value is None else value
+
+    def browser(self):
+        """租用共享浏览器：with ctx.browser() as driver: ..."""
+        return self.pool.lease(self.crawler, self.traffic.on_event if self.traffic else None)
+
+    def open(self, driver, url):
+        """在租用的浏览器中打开页面：已在后台标签页预取时直接切换过去"""
+        if self.pool.advance(driver, url):
+            return
+        politeness.acquire(url)
+        with metrics.span(metrics.PAGE_LOAD, self.crawler.name):
+            driver.get(url)
+
+    def prefetch(self, driver, urls, depth=1):
+        """处理当前页期间在后台标签页中加载后续页面"""
+        self.pool.prefetch(driver, self.crawler, urls, depth)
+
+    def check_budget(self, driver):
+        """每页或每次滚动后调用：浏览器内存超过阈值时返回原因，归还后回收该浏览器"""
+        return self.pool.check_budget(driver)
+
+    def retire(self, driver, reason):
+        self.pool.retire(driver, reason)
+
+    def parse(self, fn, *args):
+        """在解析进程中执行提取函数并等待结果（等待期间其他任务的线程照常运行）"""
+        return self.parser.run(fn, *args)
+
+    def drain(self):
+        """等待已产出的页面全部处理完，之后 seen_keys 等包含所有已产出页面的结果（例如换浏览器前确定恢复位置）"""
+        if self._drain is not None:
+            self._drain()
+
+    def get_html(self, url, headers=None, timeout=15):
+        """不启动浏览器，直接请求页面HTML"""
+        with metrics.span(metrics.HTML_FETCH, self.crawler.name):
+            response = self.http.get(url, headers=headers, timeout=timeout)
+            response.raise_for_status()
+        metrics.add_bytes('html', len(response.content), self.crawler.name)
+        profiling.checkpoint('page_source', self.crawler.name)
+        return response.text
+
+    def page_source(self, driver):
+        """读取浏览器当前页面的HTML并计入 html_fetch 阶段（先处理已到达的网络事件）"""
+        self.pool.poll(driver)
+        with metrics.span(metrics.HTML_FETCH, self.crawler.name):
+            html = driver.page_source
+        metrics.add_bytes('html', len(html), self.crawler.name)
+        profiling.checkpoint('page_source', self.crawler.name)
+        return html
+
+    def close(self):
+        self.parser.close()
+        if self.traffic:
+            self.traffic.log_report()
+
+
+def run_job(crawler, ctx, store, downloads):
+    """执行一个站点任务，返回 (页面数, 新结果数)；downloads 提供 submit(crawler, assets)
+
+    插件设置了 parser 时，每个页面交给解析进程后只处理上一个页面的结果（results(keep=1)），
+    随即恢复 discover，浏览器不等待本页解析；结果仍按页面顺序处理。
+    """
+    key = TABLES[crawler.table]['key']
+    pages = records_total = 0
+    handoff = 0.0
+    started = time.time()
+
+    def handle(page, extracted):
+        nonlocal pages, records_total
+        new_records = []
+        for record in extracted.records:
+            if record.get(key) not in ctx.seen_keys:
+                ctx.seen_keys.add(record.get(key))
+                new_records.append(record)
+        with metrics.span(metrics.PERSIST, crawler.name):
+            crawler.persist(store, new_records)
+            store.flush()
+        submitted = downloads.submit(crawler, extracted.assets)
+
+        pages += 1
+        records_total += len(new_records)
+        ctx.last_new = len(new_records)
+        ctx.no_new_rounds = 0 if new_records else ctx.no_new_rounds + 1
+        logging.info(f"[{crawler.name}] 第 {pages} 页: 新结果 {len(new_records)} 条 (累计 {records_total} 条), "
+                     f"提交下载 {submitted} 个")
+        if ctx.traffic:
+            ctx.traffic.report_page(f"第 {pages} 页")
+
+    def drain(keep=0):
+        for parsed_page, parsed in ctx.parser.results(keep=keep):
+            handle(parsed_page, crawler.extract(parsed_page, parsed))
+
+    ctx._drain = drain
+    try:
+        try:
+            for page in crawler.discover(ctx):
+                received = time.perf_counter()
+                snapshot_archive.record(crawler.name, page.url, page.html, **page.meta)
+                if crawler.parser:
+                    ctx.parser.submit(crawler.parser, page.html, tag=page)
+                    drain(keep=1)
+                else:
+                    with metrics.span(metrics.PARSE, crawler.name):
+                        extracted = crawler.extract(page)
+                    profiling.checkpoint('parse', crawler.name)
+                    handle(page, extracted)
+                # 从收到页面到恢复 discover 的时间（滚动站点在此期间仍持有浏览器）
+                elapsed = time.perf_counter() - received
+                handoff += elapsed
+                metrics.observe('page_handoff', elapsed, crawler.name)
+        finally:
+            # discover 出错时也处理已产出页面的结果
+            drain()
+    finally:
+        ctx._drain = None
+        ctx.close()
+
+    logging.info(f"[{crawler.name}] 页面处理完成: {pages} 页, {records_total} 条结果, 耗时 {time.time() - started:.1f} 秒 "
+                 f"(页面交接共 {handoff:.2f} 秒)")
+    return pages, records_total
+
+
+def run_jobs(names, browsers=2, download_workers=16, options=None, launcher=None, db_path='crawl_results.sqlite'):
+    """在一个进程中并发运行多个站点任务，返回 {站点: (页面数, 结果数)}，失败的站点值为 None"""
+    from browser_capture import ImageCapture
+
+    # 插件模块在主线程中依次导入，避免多个任务线程同时导入
+    from crawlers.base import get_crawler
+    crawlers = [get_crawler(name) for name in names]
+
+    store = ResultStore(db_path)
+    capture = ImageCapture() if CAPTURE_BROWSER_IMAGES else None
+    pool = DriverPool(browsers, launcher, capture)
+    http = open_http_session(download_workers)
+    frontier = CrawlFrontier()
+    downloads = DownloadEngine(http, download_workers, frontier=frontier, capture=capture)
+    parse_executor = open_parse_executor()
+    results = {}
+    started = time.time()
+
+    try:
+        # 先提交上次运行中断或失败的下载
+        for crawler in crawlers:
+            downloads.resume(crawler)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(crawlers), thread_name_prefix='job') as executor:
+            futures = {
+                executor.submit(run_job, crawler, JobContext(crawler, pool, http, options, parse_executor),
+                                store, downloads): crawler
+                for crawler in crawlers
+            }
+            for future in concurrent.futures.as_completed(futures):
+                crawler = futures[future]
+                try:
+                    results[crawler.name] = future.result()
+                except Exception:
+                    logging.exception(f"[{crawler.name}] 任务失败")
+                    results[crawler.name] = None
+
+        # 页面都处理完后关闭浏览器，等待剩余下载
+        pool.close()
+        downloads.wait()
+
+        store.flush()
+        for crawler in crawlers:
+            if results.get(crawler.name):
+                paths = crawler.export(store)
+                logging.info(f"[{crawler.name}] 已导出: {', '.join(paths)}")
+    finally:
+        pool.close()
+        downloads.close()
+        if parse_executor is not None:
+            parse_executor.shutdown(wait=True, cancel_futures=True)
+        frontier.close()
+        http.close()
+        store.close()
+
+    logging.info("\n" + "=" * 50)
+    logging.info(f"{len(crawlers)} 个任务完成，耗时 {time.time() - started:.1f} 秒")
+    pool.log_report()
+    downloads.log_report()
+    if capture is not None:
+        capture.log_report()
+    for crawler in crawlers:
+        crawler.log_report()
+    politeness.log_report()
+    metrics.finish_run(names[0] if len(names) == 1 else 'crawlers')
+    profiling.finish()
+    snapshot_archive.close()
+    shard_writer.close()
+    return results
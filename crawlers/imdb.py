@@ -0,0 +1,559 @@
+"""IMDb 榜单插件：优先请求页面解析内嵌JSON，缺失时才租用浏览器滚动加载，再并发抓取详情页补全字段"""
+import os
+import re
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+import concurrent.futures
+from contextlib import contextmanager
+
+import requests
+
+import metrics
+from crawlers.base import Crawler, Extracted, Page, Asset, register, save_image
+from image_variants import select_variant, VariantReport
+from resource_blocking import PROFILES
+
+# 站点根地址，可通过环境变量指向本地替身服务器（benchmarks/standin_server.py）
+BASE_URL = os.environ.get('IMDB_BASE_URL', 'https://www.imdb.com').rstrip('/')
+
+# 动作片 Top 榜单
+TARGET_URL = f"{BASE_URL}/chart/top/?ref_=nv_mv_250&genres=action"
+
+# 优先从页面内嵌JSON获取榜单，缺失时才启动浏览器
+USE_JSON_FAST_PATH = True
+
+# 是否抓取电影详情页补全类型、导演、片长和评分人数
+ENRICH_TITLE_DETAILS = True
+ENRICH_WORKERS = 8
+
+# 屏蔽广告、字体、视频和第三方脚本（站点规则见 resource_blocking.PROFILES）
+BLOCK_RESOURCES = True
+
+# 海报保存目录
+IMAGE_DIR = 'imdb_movie_posters'
+
+# 设置请求头
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36',
+    'Accept': 'image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': f'{BASE_URL}/',
+    'Connection': 'keep-alive',
+    'Pragma': 'no-cache',
+    'Cache-Control': 'no-cache'
+}
+
+# 榜单页面请求头（JSON快速通道使用）
+PAGE_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+}
+
+# 海报目标宽度（选择满足该宽度的最小变体）
+POSTER_TARGET_WIDTH = 380
+
+
+class WorkTimer:
+    """线程安全的分阶段工作时间计时器
+
+    每个阶段分别统计墙钟时间、各工作线程忙碌时间之和以及主动等待（sleep）时间。
+    阶段的实际工作时间 = 墙钟时间 - 阶段线程自身的等待时间；
+    并发请求时线程忙碌时间之和可以大于墙钟时间。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def _get_stage(self, name):
+        stats = self._stages.get(name)
+        if stats is None:
+            stats = {'wall': 0.0, 'busy': 0.0, 'tasks': 0, 'sleep': 0.0, 'serial_sleep': 0.0, 'owner': None}
+            self._stages[name] = stats
+        return stats
+
+    @contextmanager
+    def stage(self, name):
+        """计量一个阶段的墙钟时间"""
+        with self._lock:
+            stats = self._get_stage(name)
+            stats['owner'] = threading.get_ident()
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            with self._lock:
+                stats['wall'] += elapsed
+                stats['owner'] = None
+
+    @contextmanager
+    def busy(self, name):
+        """计量工作线程在某个阶段中的忙碌时间"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            with self._lock:
+                stats = self._get_stage(name)
+                stats['busy'] += elapsed
+                stats['tasks'] += 1
+
+    def sleep(self, name, seconds):
+        """主动等待并记录，等待时间不计入工作时间"""
+        time.sleep(seconds)
+        with self._lock:
+            stats = self._get_stage(name)
+            stats['sleep'] += seconds
+            if stats['owner'] == threading.get_ident():
+                stats['serial_sleep'] += seconds
+
+    def get_work_time(self, name=None):
+        """获取某个阶段（或全部阶段）的实际工作时间"""
+        with self._lock:
+            names = [name] if name else list(self._stages)
+            return sum(max(0.0, self._stages[n]['wall'] - self._stages[n]['serial_sleep'])
+                       for n in names if n in self._stages)
+
+    def get_busy_time(self, name):
+        """获取某个阶段各工作线程的忙碌时间之和"""
+        with self._lock:
+            return self._stages[name]['busy'] if name in self._stages else 0.0
+
+    def log_report(self):
+        """按阶段输出计时结果，返回总实际工作时间"""
+        with self._lock:
+            stages = {name: dict(stats) for name, stats in self._stages.items()}
+        for name, stats in stages.items():
+            if not stats['wall'] and stats['tasks']:
+                # 只在工作线程中计时的阶段（例如海报下载）与其他阶段并行，不计入实际工作时间
+                logging.info(f"[{name}] 线程忙碌合计: {stats['busy']:.2f}秒 ({stats['tasks']} 个任务)，与其他阶段并行")
+                continue
+            work = max(0.0, stats['wall'] - stats['serial_sleep'])
+            message = f"[{name}] 墙钟时间: {stats['wall']:.2f}秒, 实际工作: {work:.2f}秒, 主动等待: {stats['sleep']:.2f}秒"
+            if stats['tasks']:
+                message += f", 线程忙碌合计: {stats['busy']:.2f}秒 ({stats['tasks']} 个任务)"
+            logging.info(message)
+        return self.get_work_time()
+
+
+def upgrade_poster_url(poster_url, srcset=None):
+    """按目标宽度选择海报变体"""
+    if not poster_url:
+        return poster_url
+    return select_variant(poster_url, POSTER_TARGET_WIDTH, srcset=srcset).url
+
+
+def format_runtime(seconds):
+    """将秒数格式化为页面上的时长格式，例如 2h 22m"""
+    if not seconds:
+        return "N/A"
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    if hours and minutes:
+        return f"{hours}h {minutes}m"
+    return f"{hours}h" if hours else f"{minutes}m"
+
+
+def parse_iso_duration(duration):
+    """将 ISO 8601 时长（如 PT2H22M）转换为秒数"""
+    match = re.match(r'^PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?$', duration or '')
+    if not match:
+        return None
+    hours, minutes, seconds = (int(v) if v else 0 for v in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def _find_title_edges(data):
+    """在 __NEXT_DATA__ 中递归查找榜单条目列表"""
+    if isinstance(data, dict):
+        edges = data.get('edges')
+        if isinstance(edges, list) and edges and isinstance(edges[0], dict) \
+                and isinstance(edges[0].get('node'), dict) and 'titleText' in edges[0]['node']:
+            return edges
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return None
+
+    for child in children:
+        edges = _find_title_edges(child)
+        if edges:
+            return edges
+    return None
+
+
+def _movies_from_next_data(data):
+    """把 __NEXT_DATA__ 中的榜单条目转换为 movie_data 字典"""
+    movies = []
+    for index, edge in enumerate(_find_title_edges(data) or [], 1):
+        node = edge['node']
+        title_id = node.get('id')
+        rating = (node.get('ratingsSummary') or {}).get('aggregateRating')
+        year = (node.get('releaseYear') or {}).get('year')
+        image = node.get('primaryImage') or {}
+
+        cast = []
+        for credit_group in node.get('principalCredits') or []:
+            for credit in credit_group.get('credits') or []:
+                name = ((credit.get('name') or {}).get('nameText') or {}).get('text')
+                if name:
+                    cast.append(name)
+
+        movies.append({
+            'rank': str(edge.get('currentRank') or index),
+            'title': (node.get('titleText') or {}).get('text') or "N/A",
+            'url': f"{BASE_URL}/title/{title_id}/" if title_id else "N/A",
+            'year': str(year) if year else "N/A",
+            'rating': str(rating) if rating else "N/A",
+            'duration': format_runtime((node.get('runtime') or {}).get('seconds')),
+            'cast': ", ".join(cast) if cast else "N/A",
+            'poster_url': upgrade_poster_url(image.get('url')) or "N/A",
+        })
+    return movies
+
+
+def _movies_from_json_ld(data):
+    """把 JSON-LD ItemList 转换为 movie_data 字典"""
+    if not isinstance(data, dict) or data.get('@type') != 'ItemList':
+        return []
+
+    movies = []
+    for index, element in enumerate(data.get('itemListElement') or [], 1):
+        item = element.get('item') or {}
+        url = item.get('url') or "N/A"
+        if url.startswith('/'):
+            url = BASE_URL + url
+        rating = (item.get('aggregateRating') or {}).get('ratingValue')
+        image = item.get('image')
+
+        movies.append({
+            'rank': str(element.get('position') or index),
+            'title': item.get('name') or "N/A",
+            'url': url,
+            'year': "N/A",
+            'rating': str(rating) if rating else "N/A",
+            'duration': format_runtime(parse_iso_duration(item.get('duration'))),
+            'cast': "N/A",
+            'poster_url': upgrade_poster_url(image) if isinstance(image, str) else "N/A",
+        })
+    return movies
+
+
+def parse_embedded_chart_json(html):
+    """从榜单页面内嵌的 __NEXT_DATA__ 或 JSON-LD 中解析电影数据"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+
+    next_data = soup.find('script', id='__NEXT_DATA__')
+    if next_data and next_data.string:
+        try:
+            movies = _movies_from_next_data(json.loads(next_data.string))
+            if movies:
+                logging.info(f"从 __NEXT_DATA__ 解析到 {len(movies)} 部电影")
+                return movies
+        except ValueError as e:
+            logging.warning(f"解析 __NEXT_DATA__ 失败: {str(e)}")
+
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            movies = _movies_from_json_ld(json.loads(script.string or ''))
+        except ValueError as e:
+            logging.warning(f"解析 JSON-LD 失败: {str(e)}")
+            continue
+        if movies:
+            logging.info(f"从 JSON-LD 解析到 {len(movies)} 部电影")
+            return movies
+
+    return []
+
+
+def _names(value):
+    """把 JSON-LD 中的人物/类型字段统一转换为逗号分隔的字符串"""
+    if not value:
+        return "N/A"
+    if not isinstance(value, list):
+        value = [value]
+    names = [v.get('name') if isinstance(v, dict) else str(v) for v in value]
+    names = [name for name in names if name]
+    return ", ".join(names) if names else "N/A"
+
+
+def parse_title_details(html):
+    """从电影详情页的 JSON-LD 中解析类型、导演、片长(分钟)和评分人数"""
+    details = {'genres': "N/A", 'directors': "N/A", 'runtime_minutes': "N/A", 'vote_count': "N/A"}
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string or '')
+        except ValueError:
+            continue
+        if not isinstance(data, dict) or 'name' not in data:
+            continue
+
+        details['genres'] = _names(data.get('genre'))
+        details['directors'] = _names(data.get('director'))
+        runtime = parse_iso_duration(data.get('duration'))
+        if runtime:
+            details['runtime_minutes'] = runtime // 60
+        vote_count = (data.get('aggregateRating') or {}).get('ratingCount')
+        if vote_count:
+            details['vote_count'] = vote_count
+        break
+
+    return details
+
+
+def parse_movie_list(html):
+    """从榜单页面HTML中解析电影数据"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    movies = []
+
+    # 查找所有电影条目
+    movie_items = soup.select('li.ipc-metadata-list-summary-item')
+    logging.info(f"找到 {len(movie_items)} 部电影")
+
+    for item in movie_items:
+        try:
+            movie_data = {}
+
+            # 提取排名
+            rank_element = item.select_one('div.ipc-title__text')
+            if rank_element:
+                rank_text = rank_element.text.strip()
+                if '.' in rank_text:
+                    movie_data['rank'] = rank_text.split('.')[0].strip()
+                else:
+                    movie_data['rank'] = "N/A"
+
+            # 提取标题
+            title_element = item.select_one('a[href*="/title/"]')
+            if title_element:
+                movie_data['title'] = title_element.text.strip()
+                movie_data['url'] = BASE_URL + title_element['href']
+            else:
+                movie_data['title'] = "N/A"
+                movie_data['url'] = "N/A"
+
+            # 提取年份
+            year_element = item.select_one('span.cli-title-metadata-item')
+            if year_element:
+                movie_data['year'] = year_element.text.strip()
+            else:
+                movie_data['year'] = "N/A"
+
+            # 提取评分
+            rating_element = item.select_one('span.ipc-rating-star')
+            if rating_element:
+                rating_text = rating_element.text.strip()
+                movie_data['rating'] = rating_text.split()[0] if rating_text else "N/A"
+            else:
+                movie_data['rating'] = "N/A"
+
+            # 提取海报URL
+            poster_element = item.select_one('img.ipc-image')
+            if poster_element:
+                poster_url = poster_element.get('src') or poster_element.get('data-src')
+                movie_data['poster_url'] = upgrade_poster_url(poster_url, poster_element.get('srcset'))
+            else:
+                movie_data['poster_url'] = "N/A"
+
+            # 提取类型和时长
+            metadata_items = item.select('span.cli-title-metadata-item')
+            if len(metadata_items) >= 2:
+                movie_data['duration'] = metadata_items[1].text.strip()
+            else:
+                movie_data['duration'] = "N/A"
+
+            # 提取演员
+            cast_element = item.select_one('div.ipc-title__subtext')
+            if cast_element:
+                movie_data['cast'] = cast_element.text.strip()
+            else:
+                movie_data['cast'] = "N/A"
+
+            movies.append(movie_data)
+            logging.info(f"提取电影: {movie_data['rank']}. {movie_data['title']} ({movie_data['year']})")
+
+        except Exception as e:
+            logging.error(f"提取电影数据时出错: {str(e)}")
+            continue
+
+    return movies
+
+
+def movie_rows(movies):
+    """把电影数据转换为结果库的行，以 IMDb 编号作为主键"""
+    rows = []
+    for movie in movies:
+        match = re.search(r'/title/(tt\d+)', movie.get('url') or '')
+        if match:
+            rows.append(dict(movie, title_id=match.group(1)))
+    return rows
+
+
+def scroll_to_load_more(driver, timer, max_scrolls=15):
+    """滚动页面以加载更多内容"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+
+    logging.info("开始滚动页面以加载所有电影...")
+
+    # 滚动到页面底部多次
+    with timer.stage('滚动加载'):
+        for scroll_count in range(1, max_scrolls + 1):
+            # 滚动到页面底部
+            driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.END)
+            logging.info(f"执行滚动 #{scroll_count}")
+
+            # 随机等待时间 (模拟人类浏览，不计时)
+            timer.sleep('滚动加载', random.uniform(1.5, 3.5))
+
+            # 检查是否已加载所有内容
+            try:
+                end_indicator = driver.find_element(By.CSS_SELECTOR, "div.ipc-error-message")
+                if end_indicator and "No results found" in end_indicator.text:
+                    logging.info("已加载所有电影内容")
+                    break
+            except:
+                pass
+
+    logging.info("页面滚动完成")
+
+
+@register
+class ImdbCrawler(Crawler):
+    name = 'imdb'
+    table = 'imdb_movies'
+    export_basename = 'imdb_top_action_movies'
+    profile = PROFILES['imdb'] if BLOCK_RESOURCES else None
+
+    def __init__(self):
+        from http_cache import ResponseCache
+
+        super().__init__()
+        self.asset_headers = HEADERS
+        self.timer = WorkTimer()
+        # 统计海报实际流量与固定放大方案的对比
+        self.variant_report = VariantReport(headers=HEADERS)
+        # 详情页原始响应缓存，有效期内重复运行不再请求
+        self.response_cache = ResponseCache('imdb_page_cache', ttl=3 * 24 * 3600)
+
+    def prepare_driver(self, driver):
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+    def discover(self, ctx):
+        movies = html = None
+        if USE_JSON_FAST_PATH:
+            logging.info(f"[imdb] 尝试从页面内嵌JSON获取榜单: {TARGET_URL}")
+            with self.timer.stage('JSON快速通道'):
+                try:
+                    html = ctx.get_html(TARGET_URL, {**HEADERS, **PAGE_HEADERS})
+                    movies = ctx.parse(parse_embedded_chart_json, html)
+                except requests.exceptions.RequestException as e:
+                    logging.warning(f"[imdb] 请求榜单页面失败: {str(e)}")
+            if not movies:
+                logging.info("[imdb] 页面内嵌JSON不可用，改用浏览器抓取")
+
+        json_path = bool(movies)
+        if not movies:
+            html = self.render_chart(ctx)
+            with self.timer.stage('数据提取'):
+                movies = ctx.parse(parse_movie_list, html)
+        if not movies:
+            logging.warning("[imdb] 没有找到电影数据")
+            return
+
+        if ENRICH_TITLE_DETAILS:
+            logging.info(f"[imdb] 开始补全电影详情 (并发线程数: {ENRICH_WORKERS})...")
+            self.enrich_movies(ctx, movies)
+        yield Page(TARGET_URL, html, {'movies': movies, 'json': json_path})
+
+    def render_chart(self, ctx):
+        """使用浏览器加载榜单页面、滚动并返回页面HTML"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        with ctx.browser() as driver:
+            logging.info(f"[imdb] 访问URL: {TARGET_URL}")
+            with self.timer.stage('页面加载'):
+                ctx.open(driver, TARGET_URL)
+                with metrics.span(metrics.READY_WAIT, self.name):
+                    WebDriverWait(driver, 20).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "li.ipc-metadata-list-summary-item"))
+                    )
+                # 随机等待，避免被检测（不计时）
+                self.timer.sleep('页面加载', random.uniform(2, 4))
+            scroll_to_load_more(driver, self.timer)
+            return ctx.page_source(driver)
+
+    def fetch_title_details(self, ctx, title_url):
+        """获取单个电影详情页（优先读缓存）并解析"""
+        with self.timer.busy('详情补全'):
+            with metrics.span(metrics.HTML_FETCH, self.name):
+                html = self.response_cache.fetch(ctx.http, title_url, headers={**HEADERS, **PAGE_HEADERS})
+            with metrics.span(metrics.PARSE, self.name):
+                return parse_title_details(html)
+
+    def enrich_movies(self, ctx, movies):
+        """并发抓取电影详情页，把补全字段合并到电影数据中"""
+        # 去掉 ref_ 等跟踪参数，同一部电影只请求一次
+        url_to_movies = {}
+        for movie in movies:
+            url = movie.get('url')
+            if url and url != "N/A":
+                url_to_movies.setdefault(url.split('?')[0], []).append(movie)
+
+        enriched_count = 0
+        with self.timer.stage('详情补全'):
+            with concurrent.futures.ThreadPoolExecutor(max_workers=ENRICH_WORKERS) as executor:
+                future_to_url = {executor.submit(self.fetch_title_details, ctx, url): url for url in url_to_movies}
+                for future in concurrent.futures.as_completed(future_to_url):
+                    url = future_to_url[future]
+                    try:
+                        details = future.result()
+                    except Exception as e:
+                        logging.warning(f"[imdb] 获取电影详情失败: {url} - {str(e)}")
+                        continue
+                    for movie in url_to_movies[url]:
+                        movie.update(details)
+                    enriched_count += 1
+        logging.info(f"[imdb] 电影详情补全完成: {enriched_count}/{len(url_to_movies)} 部")
+
+    def extract(self, page, parsed=None):
+        movies = page.meta.get('movies')
+        if movies is None:
+            # 回放录制的页面时只有HTML，按抓取方式重新解析
+            parse = parse_embedded_chart_json if page.meta.get('json') else parse_movie_list
+            movies = parse(page.html)
+        records = movie_rows(movies)
+        assets = [Asset(row['poster_url'], {'title': row['title'], 'rank': row.get('rank')})
+                  for row in records if row.get('poster_url') not in (None, '', 'N/A')]
+        return Extracted(records, assets)
+
+    def downloading(self, asset):
+        # 海报由下载引擎在下载线程中处理，与榜单抓取并行，只统计线程忙碌时间
+        return self.timer.busy('海报下载')
+
+    def fetched(self, asset, size):
+        self.variant_report.record(asset.url, size)
+
+    def save_asset(self, asset, content):
+        safe_title = "".join(c if c.isalnum() else "_" for c in asset.meta['title'])[:50]
+        return save_image(content, os.path.join(IMAGE_DIR, f"{safe_title}_{uuid.uuid4().hex[:4]}.jpg"),
+                          url=asset.url, meta=dict(asset.meta, site=self.name))
+
+    def log_report(self):
+        self.variant_report.log_report()
+        self.response_cache.log_report()
+        work_time = self.timer.log_report()
+        logging.info(f"[imdb] 实际工作时间: {work_time:.2f}秒 ({work_time / 60:.2f}分钟), "
+                     f"海报下载线程忙碌合计 {self.timer.get_busy_time('海报下载'):.2f}秒")
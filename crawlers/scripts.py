@@ -0,0 +1,10 @@
+"""站点 -> 站点脚本（文件名可能含空格）。脚本只是运行插件的入口，常量和页面操作都在 crawlers/<站点>.py 中"""
+
+# 站点 -> 爬虫脚本
+SCRIPTS = {
+    'amazon': 'Amazon.py',
+    'twitter': 'Twitter.py',
+    'booking': 'Booking com.py',
+    'imdb': 'IMDB.py',
+    'allrecipes': 'Pizza.py',
+}
@@ -0,0 +1,184 @@
+"""X（Twitter）搜索插件：滚动会话占用一个浏览器，连续若干次没有新推文时停止
+
+每个浏览器实例最多滚动 SCROLLS_PER_BROWSER 次；达到预算、内存超过阈值或浏览器崩溃后换一个浏览器，
+用 max_id 游标从已抓取的最早一条推文之后继续搜索，不重放之前的滚动。
+"""
+import os
+import json
+import time
+import random
+import logging
+from urllib.parse import urlsplit, quote
+
+import politeness
+from crawlers.base import Crawler, Extracted, Page, register
+from resource_blocking import PROFILES
+
+# 站点根地址，可通过环境变量指向本地替身服务器（benchmarks/standin_server.py）
+BASE_URL = os.environ.get('TWITTER_BASE_URL', 'https://twitter.com').rstrip('/')
+
+SEARCH_QUERY = 'smoke'
+
+# 登录后保存的 Cookies（见 Twitter.py）
+COOKIES_FILE = 'twitter_cookies.json'
+
+# 只需要推文文本：屏蔽图片、视频、广告和统计脚本
+BLOCK_RESOURCES = True
+
+MAX_SCROLLS = 100
+MAX_NO_NEW_ROUNDS = 3
+
+# 每个浏览器实例最多滚动的次数；崩溃后最多重启次数
+SCROLLS_PER_BROWSER = 40
+MAX_BROWSER_RESTARTS = 3
+
+# 推文字段（与 get_tweet_data 返回的每行数据顺序一致）
+TWEET_FIELDS = ['tweet_id', 'username', 'content', 'timestamp', 'replies', 'retweets', 'likes']
+
+
+def get_tweet_data(html, seen_tweets):
+    """解析推文数据并返回新数据及更新后的已见集合"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    tweets = soup.find_all('article')  # 修正后的选择器
+    datalist = []
+    
+    for tweet in tweets:
+        try:
+            # 获取推文唯一ID
+            tweet_id_tag = tweet.find('a', {'href': lambda x: x and '/status/' in x})
+            tweet_id = tweet_id_tag['href'].split('/')[-1] if tweet_id_tag else None
+
+            if not tweet_id or tweet_id in seen_tweets:
+                continue
+            seen_tweets.add(tweet_id)
+
+            data = [tweet_id]
+
+            # 用户名
+            username_div = tweet.find('div', {'data-testid': 'User-Name'})
+            username = username_div.text.strip() if username_div else "N/A"
+            data.append(username)
+
+            # 内容
+            content_div = tweet.find('div', {'data-testid': 'tweetText'})
+            content = content_div.text.strip() if content_div else "N/A"
+            data.append(content)
+
+            # 时间
+            time_tag = tweet.find('time')
+            timestamp = time_tag['datetime'] if time_tag else ""
+            data.append(timestamp)
+
+            # 互动数据
+            interactions = tweet.find_all('span', {'data-testid': True})
+            replies = interactions[0].text if len(interactions) > 0 else "0"
+            retweets = interactions[1].text if len(interactions) > 1 else "0"
+            likes = interactions[2].text if len(interactions) > 2 else "0"
+            data.extend([replies, retweets, likes])
+
+            datalist.append(data)
+            print("实时抓取到推文:", data)  # 实时打印
+        except Exception as e:
+            print(f"解析推文时出错: {str(e)}")
+            continue
+    
+    return datalist, seen_tweets
+
+
+def parse_tweets(html):
+    """在解析进程中提取推文（已见推文的去重由编排器按推文ID完成）"""
+    datalist, _ = get_tweet_data(html, set())
+    return datalist
+
+
+def search_url(query):
+    # f=live 为“最新”时间线（按时间倒序），max_id 游标依赖这一顺序；默认的“热门”排序不按时间
+    return f"{BASE_URL}/search?q={quote(query)}&src=typed_query&f=live"
+
+
+SEARCH_URL = search_url(SEARCH_QUERY)
+
+
+def resume_url(seen_tweets, query=SEARCH_QUERY):
+    """从已抓取的最早一条推文之后继续的搜索URL（max_id 游标，推文ID随时间递增）；还没有推文时为搜索页"""
+    ids = [int(tweet_id) for tweet_id in seen_tweets if tweet_id and tweet_id.isdigit()]
+    return search_url(f"{query} max_id:{min(ids) - 1}" if ids else query)
+
+
+def load_cookies(driver):
+    """加载存储的Cookies"""
+    politeness.acquire(BASE_URL)
+    driver.get(BASE_URL)  # 必须先访问域名
+    time.sleep(2)
+
+    with open(COOKIES_FILE, "r") as f:
+        cookies = json.load(f)
+
+    # 指向其他站点（例如本地替身服务器）时，Cookies 改为作用于当前域名
+    host = urlsplit(BASE_URL).hostname or ''
+    for cookie in cookies:
+        if not host.endswith(cookie.get('domain', host).lstrip('.')):
+            cookie = {k: v for k, v in cookie.items() if k != 'domain'}
+        driver.add_cookie(cookie)
+
+    politeness.acquire(BASE_URL)
+    driver.refresh()
+    time.sleep(3)
+    logging.info("[twitter] Cookies加载成功")
+
+
+@register
+class TwitterCrawler(Crawler):
+    name = 'twitter'
+    table = 'tweets'
+    export_basename = 'twitter_data'
+    profile = PROFILES['twitter'] if BLOCK_RESOURCES else None
+    parser = staticmethod(parse_tweets)
+
+    def prepare_driver(self, driver):
+        load_cookies(driver)
+
+    def discover(self, ctx):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+        from selenium.common.exceptions import WebDriverException
+        from driver_supervisor import is_browser_crash
+
+        query = ctx.option('query', SEARCH_QUERY)
+        max_scrolls = ctx.option('max_scrolls', MAX_SCROLLS)
+        scrolls = restarts = 0
+        while scrolls < max_scrolls:
+            # 第一个浏览器打开搜索页，之后的浏览器从已抓取的最早一条推文之后继续
+            # （先等已产出的页面处理完，ctx.seen_keys 才包含全部已抓取的推文）
+            if scrolls:
+                ctx.drain()
+            url = resume_url(ctx.seen_keys, query)
+            try:
+                with ctx.browser() as driver:
+                    if scrolls:
+                        logging.info(f"[twitter] 恢复位置：已滚动 {scrolls} 次，从 {url} 继续")
+                    ctx.open(driver, url)
+                    time.sleep(5)
+                    for _ in range(SCROLLS_PER_BROWSER):
+                        politeness.acquire(url)
+                        driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.END)
+                        time.sleep(random.uniform(5, 8))
+                        scrolls += 1
+                        yield Page(url, ctx.page_source(driver), {'scroll': scrolls})
+                        if scrolls >= max_scrolls or ctx.no_new_rounds >= MAX_NO_NEW_ROUNDS:
+                            return
+                        if ctx.check_budget(driver):
+                            break
+                    else:
+                        ctx.retire(driver, f"达到每个浏览器实例 {SCROLLS_PER_BROWSER} 次滚动的预算")
+            except WebDriverException as e:
+                if not is_browser_crash(e) or restarts >= MAX_BROWSER_RESTARTS:
+                    raise
+                restarts += 1
+                logging.warning(f"[twitter] 浏览器崩溃，第 {restarts} 次重启: "
+                                f"{str(e).splitlines()[0] if str(e) else e}")
+
+    def extract(self, page, parsed=None):
+        rows = parse_tweets(page.html) if parsed is None else parsed
+        return Extracted([dict(zip(TWEET_FIELDS, data)) for data in rows], [])
@@ -0,0 +1,275 @@
+"""分布式爬取：协调者（coordinator）+ 多个 worker 进程/机器共享一个工作队列
+
+协调者把任务拆成工作条目放入共享队列，worker 租用条目、用站点插件（crawlers/<站点>.py）
+处理并确认，页面抓取和图片下载与单机运行走同一套代码（crawlers/engine.py）。队列有两个：
+- pages：一页搜索结果（Amazon 第 N 页）或一个 X 查询时间窗口（since:/until: 限定的若干天）；
+- images：一张图片，由处理页面的 worker 放入，任意 worker 都可以下载。
+worker 定期心跳并延长自己的租约；worker 死亡后协调者回收其租约，未确认的条目在租约
+到期后也会自动回到队列。结果写入各 worker 本地的结果库和图片目录。
+
+    # 单机：SQLite 队列
+    python distributed.py coordinator --site amazon --pages 20
+    python distributed.py worker            # 可启动多个
+    # 多机：Redis 兼容服务器
+    python distributed.py coordinator --queue redis://10.0.0.5:6379/0 --site twitter --since 2024-01-01 --until 2024-03-01
+    python distributed.py worker --queue redis://10.0.0.5:6379/0
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+from datetime import date, timedelta
+
+import metrics
+import profiling
+import snapshot_archive
+import shard_writer
+import politeness
+from crawlers.base import Asset, get_crawler
+from crawlers.engine import (DriverPool, DownloadEngine, JobContext, open_http_session, open_parse_executor,
+                             run_job)
+from crawl_frontier import canonicalize_url
+from result_store import ResultStore
+from work_queue import open_work_queue, default_worker_id, LeaseKeeper, PENDING, LEASED
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PAGE_QUEUE = 'pages'
+IMAGE_QUEUE = 'images'
+QUEUES = (PAGE_QUEUE, IMAGE_QUEUE)
+
+
+# ====================
+# 协调者
+# ====================
+
+def amazon_page_items(pages):
+    from crawlers.amazon import SEARCH_URL
+
+    for page in range(1, pages + 1):
+        url = f"{SEARCH_URL}&page={page}"
+        yield f"amazon:{page}", {'site': 'amazon', 'page': page, 'url': url}
+
+
+def twitter_window_items(query, since, until, window_days):
+    """把 [since, until) 按 window_days 天切分成多个搜索窗口"""
+    start = since
+    while start < until:
+        end = min(start + timedelta(days=window_days), until)
+        yield f"twitter:{query}:{start}:{end}", {
+            'site': 'twitter', 'query': query, 'since': start.isoformat(), 'until': end.isoformat(),
+        }
+        start = end
+
+
+def log_progress(queue):
+    for name in QUEUES:
+        logging.info(f"队列 {name}: {queue.stats(name)}")
+    for worker_id, (info, idle) in sorted(queue.workers().items()):
+        logging.info(f"  worker {worker_id}: 持有租约 {info.get('leases', 0)}, 已完成 {info.get('done', 0)}, "
+                     f"失败 {info.get('failed', 0)}, {idle:.0f} 秒前心跳")
+
+
+def run_coordinator(args):
+    queue = open_work_queue(args.queue, visibility_timeout=args.visibility_timeout, max_attempts=args.max_attempts)
+    try:
+        if args.site == 'amazon':
+            items = list(amazon_page_items(args.pages))
+        else:
+            items = list(twitter_window_items(args.query, date.fromisoformat(args.since),
+                                              date.fromisoformat(args.until), args.window_days))
+        added = queue.put(PAGE_QUEUE, items)
+        logging.info(f"加入 {added} 个页面任务（已存在 {len(items) - added} 个）")
+        if args.no_wait:
+            return
+
+        # 定期回收失联 worker 的租约，直到两个队列都没有待处理和租用中的条目
+        while True:
+            time.sleep(args.interval)
+            queue.reclaim_dead(args.dead_after, QUEUES)
+            log_progress(queue)
+            if not any(queue.stats(name).get(PENDING) or queue.stats(name).get(LEASED) for name in QUEUES):
+                logging.info("所有工作条目已处理完毕")
+                break
+    finally:
+        queue.close()
+
+
+# ====================
+# worker
+# ====================
+
+class QueuedDownloads:
+    """run_job 的下载目标：资源放入共享的图片队列，由任意 worker 下载"""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def submit(self, crawler, assets):
+        return self.queue.put(IMAGE_QUEUE, [
+            (canonicalize_url(asset.url), {'site': crawler.name, 'url': asset.url, 'meta': asset.meta})
+            for asset in assets
+        ])
+
+
+class Worker:
+    """租用并处理工作条目；浏览器、HTTP 连接池和站点插件在 worker 内复用"""
+
+    def __init__(self, queue, worker_id, image_batch=8):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.image_batch = image_batch
+        self.keeper = LeaseKeeper(queue, worker_id, info={'pid': os.getpid()})
+        self.keeper.info.update(done=0, failed=0)
+        self.store = ResultStore()
+        self.pool = DriverPool(1)
+        self.http = open_http_session(image_batch)
+        self.downloads = DownloadEngine(self.http, 1)
+        # 各页面条目共用一个解析进程池，不必每个条目重新启动进程
+        self.parse_executor = open_parse_executor()
+        self.queued = QueuedDownloads(queue)
+        self._crawlers = {}
+        for name in QUEUES:
+            metrics.set_queue_depth(name, lambda name=name: self.queue.stats(name).get(PENDING, 0))
+
+    def crawler(self, site):
+        if site not in self._crawlers:
+            self._crawlers[site] = get_crawler(site)
+        return self._crawlers[site]
+
+    # 页面条目
+
+    def crawl_page(self, payload):
+        """用站点插件处理一页 Amazon 搜索结果或一个 X 搜索窗口，图片放入图片队列"""
+        site = payload['site']
+        if site == 'amazon':
+            options = {'start_url': payload['url'], 'first_page': payload['page'], 'max_pages': 1}
+        else:
+            options = {'query': f"{payload['query']} since:{payload['since']} until:{payload['until']}"}
+        crawler = self.crawler(site)
+        ctx = JobContext(crawler, self.pool, self.http, options, parse_executor=self.parse_executor)
+        pages, records = run_job(crawler, ctx, self.store, self.queued)
+        logging.info(f"[{site}] 页面条目完成: {pages} 页, {records} 条结果")
+
+    # 图片条目
+
+    def download_image(self, payload):
+        """用站点插件的过滤和保存规则下载一张图片；返回 None 表示失败，空字符串表示按规则跳过"""
+        meta = payload.get('meta')
+        if meta is None:
+            # 旧版 worker 放入的条目把元数据直接放在 payload 中
+            meta = {key: value for key, value in payload.items() if key not in ('site', 'url')}
+        return self.downloads.download(self.crawler(payload['site']), Asset(payload['url'], meta))
+
+    def process(self, item, handler):
+        self.keeper.hold(item)
+        try:
+            if handler(item.payload) is None and item.queue == IMAGE_QUEUE:
+                raise RuntimeError("下载失败")
+        except Exception as e:
+            logging.error(f"处理工作条目失败 {item.queue}/{item.id} (第 {item.attempts} 次): {str(e)}")
+            self.keeper.info['failed'] += 1
+            self.queue.nack(item, e)
+        else:
+            if not self.queue.ack(item):
+                logging.warning(f"租约已失效，条目 {item.queue}/{item.id} 可能被重复处理")
+            self.keeper.info['done'] += 1
+        finally:
+            self.keeper.release(item)
+
+    def run_once(self):
+        """先处理页面条目（需要浏览器，一次一个），没有时批量下载图片；返回处理的条目数量"""
+        for item in self.queue.lease(PAGE_QUEUE, self.worker_id, 1):
+            self.process(item, self.crawl_page)
+            return 1
+        items = self.queue.lease(IMAGE_QUEUE, self.worker_id, self.image_batch)
+        for item in items:
+            self.keeper.hold(item)
+        for item in items:
+            self.process(item, self.download_image)
+        if items:
+            profiling.checkpoint('download_batch')
+        return len(items)
+
+    def run(self, idle_exit=60, poll_interval=2):
+        self.keeper.start()
+        idle_since = time.time()
+        try:
+            while True:
+                if self.run_once():
+                    idle_since = time.time()
+                elif idle_exit and time.time() - idle_since > idle_exit:
+                    logging.info(f"队列空闲 {idle_exit} 秒，worker 退出")
+                    break
+                else:
+                    time.sleep(poll_interval)
+        finally:
+            self.keeper.stop()
+            self.pool.close()
+            self.downloads.close()
+            if self.parse_executor is not None:
+                self.parse_executor.shutdown(wait=True, cancel_futures=True)
+            self.http.close()
+            self.store.close()
+            self.pool.log_report()
+            self.downloads.log_report()
+            for crawler in self._crawlers.values():
+                crawler.log_report()
+            politeness.log_report()
+            logging.info(f"worker {self.worker_id}: 完成 {self.keeper.info['done']} 个条目, "
+                         f"失败 {self.keeper.info['failed']} 个")
+            metrics.finish_run(f"worker_{self.worker_id}")
+            profiling.finish()
+            snapshot_archive.close()
+            shard_writer.close()
+
+
+def run_worker(args):
+    queue = open_work_queue(args.queue, visibility_timeout=args.visibility_timeout, max_attempts=args.max_attempts)
+    metrics.serve(args.metrics_port)
+    profiling.install('worker', enabled=args.profile or None)
+    snapshot_archive.RECORD = snapshot_archive.RECORD or args.record
+    try:
+        Worker(queue, args.worker_id or default_worker_id(), args.image_batch).run(args.idle_exit)
+    finally:
+        queue.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='分布式爬取：协调者和 worker')
+    parser.add_argument('--queue', default='sqlite:///work_queue.sqlite',
+                        help='sqlite:///路径、redis://主机:端口/库 或 memory://（仅单进程调试）')
+    parser.add_argument('--visibility-timeout', type=float, default=300, help='租约时长（秒）')
+    parser.add_argument('--max-attempts', type=int, default=3)
+    modes = parser.add_subparsers(dest='mode', required=True)
+
+    coordinator = modes.add_parser('coordinator', help='放入工作条目并回收失联 worker 的租约')
+    coordinator.add_argument('--site', choices=['amazon', 'twitter'], default='amazon')
+    coordinator.add_argument('--pages', type=int, default=9, help='Amazon 搜索结果页数')
+    coordinator.add_argument('--query', default='smoke', help='X 搜索词')
+    coordinator.add_argument('--since', default=(date.today() - timedelta(days=7)).isoformat())
+    coordinator.add_argument('--until', default=date.today().isoformat())
+    coordinator.add_argument('--window-days', type=int, default=1, help='每个 X 搜索窗口的天数')
+    coordinator.add_argument('--interval', type=float, default=30, help='回收和汇报的间隔（秒）')
+    coordinator.add_argument('--dead-after', type=float, default=120, help='超过该秒数未心跳的 worker 视为死亡')
+    coordinator.add_argument('--no-wait', action='store_true', help='放入条目后立即退出')
+
+    worker = modes.add_parser('worker', help='租用并处理工作条目')
+    worker.add_argument('--worker-id')
+    worker.add_argument('--image-batch', type=int, default=8, help='每次租用的图片条目数')
+    worker.add_argument('--idle-exit', type=float, default=60, help='队列空闲该秒数后退出，0 表示不退出')
+    worker.add_argument('--record', action='store_true', help='把抓到的页面录制到快照归档（见 snapshot_archive.py）')
+    worker.add_argument('--profile', action='store_true', help='开启采样分析和内存快照（运行中也可发送 SIGUSR1 切换）')
+    worker.add_argument('--metrics-port', type=int, help='在该端口提供 /metrics 和 /summary（默认读取 METRICS_PORT）')
+
+    args = parser.parse_args(argv)
+    if args.mode == 'coordinator':
+        run_coordinator(args)
+    else:
+        run_worker(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
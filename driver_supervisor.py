@@ -0,0 +1,143 @@
+"""长时间爬取的浏览器内存看门狗
+
+滚动上百次后单个 Chrome 实例会涨到数GB。DriverSupervisor 每隔几轮（一次滚动或一页）检查浏览器进程树的
+常驻内存（RSS）和页面的 JS 堆，超过阈值时返回原因；是否回收、如何恢复爬取位置由浏览器池
+（crawlers.engine.DriverPool）和站点插件决定，浏览器崩溃用 is_browser_crash() 判断。
+连接守护浏览器（browser_daemon）时统计的是守护浏览器的进程树，超过内存阈值的会话结束时重启守护浏览器
+或改为冷启动，只关闭本次爬取的上下文并不能释放内存。
+"""
+import logging
+
+from selenium.common.exceptions import WebDriverException, InvalidSessionIdException, NoSuchWindowException
+
+import browser_daemon
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 表示浏览器已崩溃或会话已失效的错误信息
+CRASH_MESSAGES = (
+    'chrome not reachable', 'tab crashed', 'session deleted', 'disconnected', 'no such session',
+    'target window already closed', 'page crash', 'invalid session id', 'connection refused',
+)
+
+
+def is_browser_crash(error):
+    """判断异常是否表示浏览器崩溃（而不是普通的元素查找失败等）"""
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+        return True
+    if isinstance(error, (ConnectionError, OSError)):
+        return True
+    message = str(error).lower()
+    return isinstance(error, WebDriverException) and any(text in message for text in CRASH_MESSAGES)
+
+
+def browser_rss_mb(driver):
+    """chromedriver 及其全部子进程（Chrome 浏览器、渲染进程等）的常驻内存之和；连接守护浏览器时
+    加上守护浏览器进程树（不是 chromedriver 的子进程）。未安装 psutil 时返回 None"""
+    if psutil is None:
+        return None
+    pids = [getattr(getattr(getattr(driver, 'service', None), 'process', None), 'pid', None),
+            getattr(driver, 'daemon_pid', None)]
+    processes = {}
+    for pid in filter(None, pids):
+        try:
+            root = psutil.Process(pid)
+            for process in [root] + root.children(recursive=True):
+                processes[process.pid] = process
+        except psutil.Error:
+            continue
+    if not processes:
+        return None
+
+    total = 0
+    for process in processes.values():
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / 1024 / 1024
+
+
+def js_heap_mb(driver):
+    """当前页面已使用的 JS 堆大小，无法获取时返回 None"""
+    try:
+        usage = driver.execute_cdp_cmd('Runtime.getHeapUsage', {})
+        return usage['usedSize'] / 1024 / 1024
+    except (WebDriverException, KeyError, TypeError):
+        pass
+    try:
+        used = driver.execute_script("return performance.memory ? performance.memory.usedJSHeapSize : null")
+        return used / 1024 / 1024 if used else None
+    except WebDriverException:
+        return None
+
+
+class DriverSupervisor:
+    """浏览器内存监督：记录峰值内存，每 check_every 轮检查一次是否超过阈值
+
+    start() 返回新的 WebDriver（包含 CDP 配置等准备工作）；quit() 关闭浏览器。
+    """
+
+    def __init__(self, start, max_rss_mb=2048, max_js_heap_mb=512, check_every=5):
+        self._start = start
+        self.max_rss_mb = max_rss_mb
+        self.max_js_heap_mb = max_js_heap_mb
+        self.check_every = check_every
+        self.driver = None
+
+        self.rounds = 0
+        self.memory_exceeded = False
+        self.peak_rss_mb = 0.0
+        self.peak_js_heap_mb = 0.0
+
+        if psutil is None:
+            logging.warning("未安装 psutil，浏览器内存监控只检查 JS 堆")
+
+    def start(self):
+        self.driver = self._start()
+        self.rounds = 0
+        return self.driver
+
+    def check_memory(self):
+        """返回 (RSS MB, JS堆 MB)，任一项无法获取时为 None"""
+        rss = browser_rss_mb(self.driver)
+        heap = js_heap_mb(self.driver)
+        if rss:
+            self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        if heap:
+            self.peak_js_heap_mb = max(self.peak_js_heap_mb, heap)
+        return rss, heap
+
+    def check_budget(self):
+        """每轮结束后调用：返回需要回收浏览器的原因（超过内存阈值），不需要时返回 None。
+        只检查不回收；浏览器内存超限时记录在 memory_exceeded 中"""
+        self.rounds += 1
+        reason = None
+        if self.rounds % self.check_every == 0:
+            rss, heap = self.check_memory()
+            if rss and self.max_rss_mb and rss > self.max_rss_mb:
+                reason = f"浏览器内存 {rss:.0f} MB 超过 {self.max_rss_mb} MB"
+                self.memory_exceeded = True
+            elif heap and self.max_js_heap_mb and heap > self.max_js_heap_mb:
+                reason = f"JS 堆 {heap:.0f} MB 超过 {self.max_js_heap_mb} MB"
+            else:
+                logging.info(f"浏览器内存检查: RSS {rss if rss is None else f'{rss:.0f} MB'}, "
+                             f"JS 堆 {heap if heap is None else f'{heap:.0f} MB'}")
+        return reason
+
+    def quit(self):
+        """关闭浏览器；本次会话中守护浏览器内存超限时同时重启守护浏览器或改为冷启动"""
+        if self.memory_exceeded and getattr(self.driver, 'daemon_pid', None):
+            browser_daemon.recycle_daemon(self.driver)
+            self.driver = None
+        self.memory_exceeded = False
+        if self.driver is None:
+            return
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logging.warning(f"关闭浏览器时出错: {str(e)}")
+        self.driver = None
@@ -0,0 +1,72 @@
+"""带过期时间的HTTP响应磁盘缓存
+
+以URL的SHA1为键，把原始响应正文压缩保存到磁盘，重复运行或不同榜单中
+重叠的页面在有效期内直接从缓存读取，不再重复请求。
+"""
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import threading
+
+
+class ResponseCache:
+    """HTTP响应磁盘缓存（线程安全）"""
+
+    def __init__(self, cache_dir, ttl=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + '.json.gz')
+
+    def get(self, url):
+        """读取未过期的缓存正文，不存在或已过期时返回 None"""
+        path = self._path(url)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - entry.get('fetched_at', 0) > self.ttl or entry.get('url') != url:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return entry['body']
+
+    def put(self, url, body, status=200):
+        """写入缓存（先写临时文件再替换，避免并发读到半个文件）"""
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        entry = {'url': url, 'status': status, 'fetched_at': time.time(), 'body': body}
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def fetch(self, session, url, headers=None, timeout=15):
+        """优先从缓存读取，未命中时通过 session 请求并写入缓存"""
+        body = self.get(url)
+        if body is not None:
+            return body
+
+        response = session.get(url, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        self.put(url, response.text, response.status_code)
+        return response.text
+
+    def log_report(self):
+        total = self.hits + self.misses
+        logging.info(f"响应缓存: 命中 {self.hits}/{total} 次 (缓存目录: {self.cache_dir})")
@@ -0,0 +1,196 @@
+"""感知哈希近似重复图片过滤
+
+对每张入库图片计算 64 位 dHash，并在 SQLite 中建立多索引哈希（multi-index hashing）：
+哈希被切成 max_distance + 1 段，每段单独建索引。根据鸽巢原理，汉明距离不超过
+max_distance 的两个哈希至少有一段完全相同，所以查询只需按段精确查找候选，
+再逐个计算汉明距离，不必扫描全部图片。索引保存在磁盘上，跨运行持续有效。
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import namedtuple
+
+HASH_BITS = 64
+
+# 近似重复匹配结果
+DuplicateMatch = namedtuple('DuplicateMatch', ['image_id', 'path', 'distance'])
+
+
+def dhash(image, hash_size=8):
+    """计算图片的差异哈希（dHash），返回 64 位整数"""
+    from PIL import Image
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a, b):
+    """计算两个哈希的汉明距离"""
+    return bin(a ^ b).count('1')
+
+
+def _to_signed(value):
+    """SQLite 整数为有符号 64 位，存储前转换"""
+    return value - (1 << HASH_BITS) if value >= (1 << (HASH_BITS - 1)) else value
+
+
+def _to_unsigned(value):
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def _chunk_layout(chunk_count):
+    """将 64 位切成 chunk_count 段，返回每段的 (位移, 掩码)"""
+    base, extra = divmod(HASH_BITS, chunk_count)
+    layout = []
+    shift = 0
+    for i in range(chunk_count):
+        width = base + (1 if i < extra else 0)
+        layout.append((shift, (1 << width) - 1))
+        shift += width
+    return layout
+
+
+class NearDuplicateIndex:
+    """基于多索引哈希的持久化近似重复索引（线程安全）"""
+
+    def __init__(self, db_path, max_distance=5):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS images (
+                id INTEGER PRIMARY KEY,
+                hash INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                url TEXT,
+                created REAL
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                chunk_no INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                image_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks ON chunks (chunk_no, value);
+            CREATE TABLE IF NOT EXISTS links (
+                url TEXT PRIMARY KEY,
+                image_id INTEGER NOT NULL,
+                distance INTEGER NOT NULL,
+                created REAL
+            );
+        """)
+
+        # 分段数在首次建库时确定，之后沿用
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'chunk_count'").fetchone()
+        if row is None:
+            chunk_count = max_distance + 1
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('chunk_count', ?)", (str(chunk_count),))
+            self._conn.commit()
+        else:
+            chunk_count = int(row[0])
+        if max_distance >= chunk_count:
+            raise ValueError(f"索引按 {chunk_count} 段建立，最大支持汉明距离 {chunk_count - 1}，"
+                             f"请求的距离为 {max_distance}")
+
+        self.max_distance = max_distance
+        self._layout = _chunk_layout(chunk_count)
+
+    def _chunks(self, image_hash):
+        return [(image_hash >> shift) & mask for shift, mask in self._layout]
+
+    def _find(self, image_hash):
+        candidates = set()
+        for chunk_no, value in enumerate(self._chunks(image_hash)):
+            rows = self._conn.execute(
+                "SELECT image_id FROM chunks WHERE chunk_no = ? AND value = ?", (chunk_no, value)
+            )
+            candidates.update(r[0] for r in rows)
+
+        best = None
+        for image_id in candidates:
+            stored_hash, path = self._conn.execute(
+                "SELECT hash, path FROM images WHERE id = ?", (image_id,)
+            ).fetchone()
+            distance = hamming_distance(image_hash, _to_unsigned(stored_hash))
+            if distance <= self.max_distance and (best is None or distance < best.distance):
+                best = DuplicateMatch(image_id, path, distance)
+        return best
+
+    def find(self, image_hash):
+        """查找近似重复图片，未找到时返回 None"""
+        with self._lock:
+            return self._find(image_hash)
+
+    def lookup_url(self, url):
+        """查询某个 URL 是否已被记录为近似重复，返回对应的已保存路径"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT images.path FROM links JOIN images ON images.id = links.image_id WHERE links.url = ?",
+                (url,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def register(self, image_hash, path, url=None):
+        """原子地检查并登记图片
+
+        若已有近似重复图片，则把 url 链接到已有图片并返回匹配结果；
+        否则登记为新图片并返回 None，调用方随后保存文件。
+        """
+        with self._lock:
+            match = self._find(image_hash)
+            now = time.time()
+            if match:
+                if url:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO links (url, image_id, distance, created) VALUES (?, ?, ?, ?)",
+                        (url, match.image_id, match.distance, now)
+                    )
+                    self._conn.commit()
+                return match
+
+            cursor = self._conn.execute(
+                "INSERT INTO images (hash, path, url, created) VALUES (?, ?, ?, ?)",
+                (_to_signed(image_hash), path, url, now)
+            )
+            image_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO chunks (chunk_no, value, image_id) VALUES (?, ?, ?)",
+                [(chunk_no, value, image_id) for chunk_no, value in enumerate(self._chunks(image_hash))]
+            )
+            self._conn.commit()
+            return None
+
+    def unregister(self, path):
+        """移除登记（用于保存文件失败时回滚）"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM images WHERE path = ?", (path,)).fetchall()
+            for (image_id,) in rows:
+                self._conn.execute("DELETE FROM chunks WHERE image_id = ?", (image_id,))
+                self._conn.execute("DELETE FROM links WHERE image_id = ?", (image_id,))
+                self._conn.execute("DELETE FROM images WHERE id = ?", (image_id,))
+            self._conn.commit()
+
+    def count(self):
+        """已登记的图片数量"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_index(image_dir, max_distance=5):
+    """打开图片目录下的近似重复索引（目录不存在时创建）"""
+    os.makedirs(image_dir, exist_ok=True)
+    index = NearDuplicateIndex(os.path.join(image_dir, 'phash_index.sqlite'), max_distance)
+    logging.info(f"近似重复索引已加载: {index.count()} 张图片")
+    return index
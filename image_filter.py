@@ -0,0 +1,280 @@
+"""下载前的图片尺寸过滤
+
+在完整下载之前剔除图标、雪碧图、追踪像素、国旗等小图：
+1. 优先使用HTML中已有的 width/height/srcset 属性；
+2. 属性缺失时，用 Range 请求只取前几KB，读取图片头部获得尺寸（只解析头部，不解码像素）。
+"""
+import re
+import struct
+import logging
+import threading
+from io import BytesIO
+
+import requests
+
+import politeness
+
+CONTENT_RANGE_RE = re.compile(r'bytes\s+\d+-\d+/(\d+)')
+
+# 还没有探测到小图的文件大小时，按属性跳过的每张小图估计节省的字节数
+DEFAULT_SMALL_IMAGE_SIZE = 4 * 1024
+
+
+def _parse_dimension(value):
+    """解析 width/height 属性值，只接受纯数字或 px 单位"""
+    if not value:
+        return None
+    value = str(value).strip().lower()
+    if value.endswith('px'):
+        value = value[:-2].strip()
+    if not value.isdigit():
+        return None
+    return int(value)
+
+
+def parse_srcset(srcset):
+    """解析 srcset，返回 [(url, 描述符)] 列表
+
+    按 HTML 规范解析：URL 一直到空白为止（URL 中可以有逗号，例如 IMDb 的 _CR0,0,380,562_），
+    逗号只在描述符之后（或紧跟在URL末尾）才分隔候选项。
+    """
+    candidates = []
+    if not srcset:
+        return candidates
+    position, length = 0, len(srcset)
+    while position < length:
+        # 跳过候选项之间的空白和逗号
+        while position < length and (srcset[position].isspace() or srcset[position] == ','):
+            position += 1
+        if position >= length:
+            break
+        start = position
+        while position < length and not srcset[position].isspace():
+            position += 1
+        url = srcset[start:position]
+        descriptor = ''
+        if url.endswith(','):
+            # URL 末尾的逗号结束本候选项（没有描述符）
+            url = url.rstrip(',')
+        else:
+            # 描述符到括号外的下一个逗号为止
+            start, depth = position, 0
+            while position < length:
+                char = srcset[position]
+                if char == '(':
+                    depth += 1
+                elif char == ')':
+                    depth = max(depth - 1, 0)
+                elif char == ',' and depth == 0:
+                    break
+                position += 1
+            descriptor = srcset[start:position].strip()
+            position += 1
+        if url:
+            candidates.append((url, descriptor.split()[0] if descriptor else '1x'))
+    return candidates
+
+
+def size_hint_from_tag(img_tag):
+    """从 <img> 标签属性中推断尺寸，返回 (宽, 高)，未知的维度为 None"""
+    width = _parse_dimension(img_tag.get('width'))
+    height = _parse_dimension(img_tag.get('height'))
+
+    # srcset 的 w 描述符是候选图片的真实宽度，取最大值；height 属性是显示高度，
+    # 按同一来源的宽高比换算到该宽度，无法换算时高度视为未知，避免用不同来源的宽和高判断
+    srcset = img_tag.get('data-srcset') or img_tag.get('srcset')
+    srcset_widths = [int(d[:-1]) for _, d in parse_srcset(srcset) if d.endswith('w') and d[:-1].isdigit()]
+    if srcset_widths:
+        largest = max(srcset_widths)
+        if not width or largest > width:
+            height = round(height * largest / width) if width and height else None
+            width = largest
+
+    return width, height
+
+
+def _jpeg_size(data):
+    """扫描JPEG标记段，读取SOF中的尺寸"""
+    index = 2
+    while index + 9 < len(data):
+        if data[index] != 0xFF:
+            return None
+        marker = data[index + 1]
+        if marker == 0xFF:
+            index += 1
+            continue
+        length = struct.unpack('>H', data[index + 2:index + 4])[0]
+        # SOF0-SOF15，排除 DHT(C4)、JPG(C8)、DAC(CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>HH', data[index + 5:index + 9])
+            return width, height
+        index += 2 + length
+    return None
+
+
+def read_image_header_size(data):
+    """从图片开头的若干字节读取尺寸，无法识别时返回 None"""
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+    if data[:2] == b'\xff\xd8':
+        size = _jpeg_size(data)
+        if size:
+            return size
+
+    # 其他格式交给 PIL 识别
+    from PIL import Image
+    try:
+        # Image.open 只读取头部，像素数据在 load() 时才会解码
+        with Image.open(BytesIO(data)) as image:
+            return image.size
+    except Exception:
+        return None
+
+
+class ImageSizeFilter:
+    """下载前按尺寸过滤图片，并统计跳过数量和节省的流量（线程安全）"""
+
+    def __init__(self, min_width=100, min_height=100, probe_bytes=8192, headers=None, timeout=10):
+        self.min_width = min_width
+        self.min_height = min_height
+        self.probe_bytes = probe_bytes
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+
+        self._hints = {}
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.checked = 0
+        self.skipped_by_attributes = 0
+        self.skipped_by_probe = 0
+        self.probes = 0
+        self.probe_bytes_received = 0
+        self.bytes_saved = 0
+        # 头部探测到的小图文件大小，用于估计按属性跳过的小图大小
+        self._small_bytes = 0
+        self._small_count = 0
+
+    def note_tag(self, url, img_tag):
+        """记录 <img> 标签提供的尺寸提示"""
+        width, height = size_hint_from_tag(img_tag)
+        if width is None and height is None:
+            return
+        with self._lock:
+            self._hints[url] = (width, height)
+
+    def merge_hints(self, hints):
+        """合并其他进程/阶段收集的尺寸提示"""
+        with self._lock:
+            self._hints.update(hints)
+
+    def export_hints(self):
+        with self._lock:
+            return dict(self._hints)
+
+    def _too_small(self, width, height):
+        if width is not None and width < self.min_width:
+            return True
+        if height is not None and height < self.min_height:
+            return True
+        return False
+
+    def probe(self, url):
+        """用 Range 请求读取图片头部，返回 (尺寸, 文件总大小, 已接收字节数)"""
+        headers = dict(self.headers)
+        headers['Range'] = f'bytes=0-{self.probe_bytes - 1}'
+        politeness.acquire(url)
+        with requests.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+
+            total_size = None
+            content_range = response.headers.get('Content-Range', '')
+            match = CONTENT_RANGE_RE.search(content_range)
+            if match:
+                total_size = int(match.group(1))
+            elif response.status_code == 200 and response.headers.get('Content-Length', '').isdigit():
+                # 服务器忽略了 Range，只读前几KB后断开
+                total_size = int(response.headers['Content-Length'])
+
+            data = b''
+            for chunk in response.iter_content(chunk_size=self.probe_bytes):
+                data += chunk
+                if len(data) >= self.probe_bytes:
+                    break
+            data = data[:self.probe_bytes]
+
+        return read_image_header_size(data), total_size, len(data)
+
+    def allow(self, url):
+        """判断图片是否值得下载；尺寸无法确定时放行"""
+        with self._lock:
+            self.checked += 1
+            hint = self._hints.get(url)
+
+        if hint and self._too_small(*hint):
+            with self._lock:
+                self.skipped_by_attributes += 1
+            logging.info(f"根据HTML属性跳过小图片 {hint[0]}x{hint[1]}: {url}")
+            return False
+        if hint and hint[0] is not None and hint[1] is not None:
+            return True
+
+        try:
+            size, total_size, received = self.probe(url)
+        except requests.exceptions.RequestException as e:
+            logging.warning(f"探测图片尺寸失败: {url} - {str(e)}")
+            return True
+
+        with self._lock:
+            self.probes += 1
+            self.probe_bytes_received += received
+
+        if size and self._too_small(*size):
+            with self._lock:
+                self.skipped_by_probe += 1
+                if total_size:
+                    self.bytes_saved += max(0, total_size - received)
+                    self._small_bytes += total_size
+                    self._small_count += 1
+            logging.info(f"根据图片头部跳过小图片 {size[0]}x{size[1]}: {url}")
+            return False
+        return True
+
+    @property
+    def skipped(self):
+        return self.skipped_by_attributes + self.skipped_by_probe
+
+    def _estimate(self):
+        """一张小图的估计大小：探测到的小图平均大小，没有探测数据时用默认值"""
+        if self._small_count:
+            return self._small_bytes / self._small_count
+        return DEFAULT_SMALL_IMAGE_SIZE
+
+    @property
+    def estimated_attribute_bytes_saved(self):
+        """按属性跳过的小图估计节省的字节数（没有发出请求，大小未知）"""
+        with self._lock:
+            return self.skipped_by_attributes * self._estimate()
+
+    def log_report(self):
+        """输出过滤统计"""
+        estimated = self.estimated_attribute_bytes_saved
+        logging.info(
+            f"尺寸过滤: 检查 {self.checked} 张, 跳过 {self.skipped} 张 "
+            f"(HTML属性 {self.skipped_by_attributes}, 头部探测 {self.skipped_by_probe}), "
+            f"探测请求 {self.probes} 次共 {self.probe_bytes_received / 1024:.1f} KB, "
+            f"节省下载: 头部探测实测 {self.bytes_saved / 1024 / 1024:.2f} MB, "
+            f"按属性跳过估计 {estimated / 1024 / 1024:.2f} MB"
+        )
@@ -0,0 +1,296 @@
+"""按目标分辨率选择图片变体
+
+各站点的图片CDN都在URL中编码尺寸（亚马逊的 ._AC_UL320_.、IMDb 的 @._V1_UX380_、
+Allrecipes 的 /282x188/ 等）。这里按CDN注册URL规则，结合 srcset 中已有的候选，
+选出满足目标分辨率的最小变体，并统计相对于原先固定放大规则节省的流量。
+"""
+import os
+import re
+import random
+import logging
+import threading
+from collections import namedtuple
+
+import requests
+
+import politeness
+from image_filter import parse_srcset
+
+# 选中的变体：URL、宽度（未知为 None）、来源（srcset / rule / original）
+Variant = namedtuple('Variant', ['url', 'width', 'source'])
+
+# 用 HEAD 请求测量固定放大方案文件大小的图片比例；每次 HEAD 都占用一个礼貌令牌，
+# 只抽样少量图片估算节省比例，设为 0 则不测量
+NAIVE_SAMPLE_RATE = float(os.environ.get('VARIANT_NAIVE_SAMPLE_RATE', '0.02'))
+
+
+class VariantRule:
+    """CDN URL 尺寸规则"""
+
+    name = 'base'
+    # 可用的离散宽度；为 None 时表示可请求任意宽度
+    widths = None
+    # 原先脚本中固定放大使用的宽度，用于估算朴素方案的流量
+    legacy_width = None
+
+    def matches(self, url):
+        raise NotImplementedError
+
+    def width_of(self, url):
+        """从URL中读取当前宽度"""
+        raise NotImplementedError
+
+    def build(self, url, width):
+        """构造指定宽度的变体URL；URL带签名等不能改写尺寸时返回 None，只从 srcset 中选择"""
+        return None
+
+    def pick_width(self, target_width):
+        if not self.widths:
+            return target_width
+        fitting = [w for w in self.widths if w >= target_width]
+        return min(fitting) if fitting else max(self.widths)
+
+    def legacy(self, url):
+        """原先固定放大规则得到的URL；不能改写尺寸时返回 None"""
+        return self.build(url, self.legacy_width) if self.legacy_width else url
+
+    def canonical(self, url):
+        """去掉尺寸标记，同一图片的不同变体得到相同的URL"""
+        raise NotImplementedError
+
+
+class ImdbRule(VariantRule):
+    """IMDb 海报：.../M/<id>@._V1_QL75_UX380_CR0,0,380,562_.jpg"""
+
+    name = 'imdb'
+    legacy_width = 380
+    WIDTH_RE = re.compile(r'[_.](?:UX|SX)(\d+)')
+
+    def matches(self, url):
+        return '/images/M/' in url and '@' in url
+
+    def width_of(self, url):
+        match = self.WIDTH_RE.search(url.split('@', 1)[-1])
+        return int(match.group(1)) if match else None
+
+    def build(self, url, width):
+        base = url.split('@._')[0] if '@._' in url else url.rsplit('@', 1)[0]
+        return f"{base}@._V1_QL75_UX{width}_.jpg"
+
+    def legacy(self, url):
+        base = url.split('@._')[0] if '@._' in url else url.rsplit('@', 1)[0]
+        return base + '@._V1_QL75_UX380_CR0,0,380,562_.jpg'
+
+    def canonical(self, url):
+        base = url.split('@._')[0] if '@._' in url else url.rsplit('@', 1)[0]
+        return base + '@.jpg'
+
+
+class AmazonRule(VariantRule):
+    """亚马逊商品图：.../I/<id>._AC_UL320_.jpg"""
+
+    name = 'amazon'
+    legacy_width = 1500
+    TOKEN_RE = re.compile(r'\._([A-Z0-9_,]+)_\.')
+    WIDTH_RE = re.compile(r'(?:UL|SX|SL|UX)(\d+)')
+
+    def matches(self, url):
+        return '/images/I/' in url and self.TOKEN_RE.search(url) is not None
+
+    def width_of(self, url):
+        match = self.TOKEN_RE.search(url)
+        size = self.WIDTH_RE.search(match.group(1)) if match else None
+        return int(size.group(1)) if size else None
+
+    def build(self, url, width):
+        return self.TOKEN_RE.sub(f'._AC_UL{width}_.', url, count=1)
+
+    def canonical(self, url):
+        return self.TOKEN_RE.sub('.', url, count=1)
+
+
+class DotdashThumbRule(VariantRule):
+    """Allrecipes（Dotdash Meredith）缩略图：/thmb/<sig>=/282x188/filters:.../img.jpg
+
+    thumbor 签名覆盖尺寸和滤镜，改写 /WxH/ 后返回 403，因此不提供 build，只从 srcset 中选择变体。
+    """
+
+    name = 'allrecipes-thmb'
+    legacy_width = 2000
+    SIZE_RE = re.compile(r'/(\d+)x(\d+)/')
+
+    def matches(self, url):
+        return '/thmb/' in url and self.SIZE_RE.search(url) is not None
+
+    def width_of(self, url):
+        return int(self.SIZE_RE.search(url).group(1))
+
+    def canonical(self, url):
+        return self.SIZE_RE.sub('/', url, count=1)
+
+
+class DotdashLegacyRule(VariantRule):
+    """Allrecipes 旧版图片：..._720_... / ..._960_..."""
+
+    name = 'allrecipes-legacy'
+    widths = [720, 960, 2000]
+    legacy_width = 2000
+    SIZE_RE = re.compile(r'_(720|960|2000)_')
+
+    def matches(self, url):
+        return 'allrecipes' in url and self.SIZE_RE.search(url) is not None
+
+    def width_of(self, url):
+        return int(self.SIZE_RE.search(url).group(1))
+
+    def build(self, url, width):
+        return self.SIZE_RE.sub(f'_{width}_', url, count=1)
+
+    def canonical(self, url):
+        return self.SIZE_RE.sub('_', url, count=1)
+
+
+class BookingRule(VariantRule):
+    """Booking 图片：cf.bstatic.com/.../max500/... 或 /square240/..."""
+
+    name = 'booking'
+    TOKENS = {300: 'max300', 500: 'max500', 1024: 'max1024x768', 1280: 'max1280x900'}
+    widths = sorted(TOKENS)
+    SIZE_RE = re.compile(r'/(max|square)(\d+)(?:x\d+)?/')
+
+    def matches(self, url):
+        return 'bstatic.com' in url and self.SIZE_RE.search(url) is not None
+
+    def width_of(self, url):
+        return int(self.SIZE_RE.search(url).group(2))
+
+    def build(self, url, width):
+        return self.SIZE_RE.sub(f'/{self.TOKENS[width]}/', url, count=1)
+
+    def canonical(self, url):
+        return self.SIZE_RE.sub('/', url, count=1)
+
+
+# CDN 规则注册表，按顺序匹配
+RULES = []
+
+
+def register_rule(rule):
+    """注册CDN规则（后注册的规则优先匹配）"""
+    RULES.insert(0, rule)
+    return rule
+
+
+for _rule in (BookingRule(), DotdashLegacyRule(), DotdashThumbRule(), AmazonRule(), ImdbRule()):
+    register_rule(_rule)
+
+
+def find_rule(url):
+    for rule in RULES:
+        if url and rule.matches(url):
+            return rule
+    return None
+
+
+def srcset_candidates(srcset, base_width=None):
+    """把 srcset 转换为 [(url, 宽度)]；x 描述符按基础宽度换算"""
+    candidates = []
+    for url, descriptor in parse_srcset(srcset):
+        try:
+            if descriptor.endswith('w'):
+                candidates.append((url, int(descriptor[:-1])))
+            elif descriptor.endswith('x') and base_width:
+                candidates.append((url, int(float(descriptor[:-1]) * base_width)))
+        except ValueError:
+            continue
+    return candidates
+
+
+def select_variant(url, target_width, srcset=None, base_width=None):
+    """选出宽度不小于目标的最小变体；都不满足时选最大的"""
+    rule = find_rule(url)
+    if base_width is None and rule:
+        base_width = rule.width_of(url)
+
+    candidates = [Variant(u, w, 'srcset') for u, w in srcset_candidates(srcset, base_width)]
+    if rule:
+        width = rule.pick_width(target_width)
+        variant_url = rule.build(url, width)
+        if variant_url:
+            candidates.append(Variant(variant_url, width, 'rule'))
+    if not candidates:
+        return Variant(url, base_width, 'original')
+
+    fitting = [c for c in candidates if c.width >= target_width]
+    if fitting:
+        # 宽度相同时优先使用 srcset 中的现成URL（浏览器可能已缓存）
+        return min(fitting, key=lambda c: (c.width, c.source != 'srcset'))
+    return max(candidates, key=lambda c: c.width)
+
+
+def strip_size_tokens(url):
+    """去掉URL中的CDN尺寸标记，无匹配规则时原样返回"""
+    rule = find_rule(url)
+    return rule.canonical(url) if rule else url
+
+
+def legacy_variant(url):
+    """原先脚本中固定放大规则对应的URL"""
+    rule = find_rule(url)
+    return rule.legacy(url) if rule else url
+
+
+class VariantReport:
+    """统计实际传输字节数与固定放大方案的对比（线程安全）"""
+
+    def __init__(self, naive_sample_rate=NAIVE_SAMPLE_RATE, headers=None, timeout=10):
+        self.naive_sample_rate = naive_sample_rate
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.images = 0
+        self.bytes_transferred = 0
+        self.comparable_bytes = 0
+        self.naive_bytes = 0
+        self.naive_unknown = 0
+
+    def _naive_size(self, naive_url):
+        try:
+            politeness.acquire(naive_url)
+            response = requests.head(naive_url, headers=self.headers, timeout=self.timeout, allow_redirects=True)
+            length = response.headers.get('Content-Length', '')
+            return int(length) if response.ok and length.isdigit() else None
+        except requests.exceptions.RequestException:
+            return None
+
+    def record(self, url, nbytes):
+        """记录一次下载；按抽样比例用 HEAD 请求获取朴素方案的文件大小"""
+        naive_url = legacy_variant(url)
+        if naive_url is None:
+            naive_size = None
+        elif naive_url == url:
+            naive_size = nbytes
+        elif self.naive_sample_rate and random.random() < self.naive_sample_rate:
+            naive_size = self._naive_size(naive_url)
+        else:
+            naive_size = None
+
+        with self._lock:
+            self.images += 1
+            self.bytes_transferred += nbytes
+            if naive_size is None:
+                self.naive_unknown += 1
+            else:
+                self.comparable_bytes += nbytes
+                self.naive_bytes += naive_size
+
+    def log_report(self):
+        if not self.images:
+            return
+        known = self.images - self.naive_unknown
+        message = (f"图片变体: 下载 {self.images} 张共 {self.bytes_transferred / 1024 / 1024:.2f} MB; "
+                   f"其中 {known} 张可比较, 实际 {self.comparable_bytes / 1024 / 1024:.2f} MB, "
+                   f"固定放大方案 {self.naive_bytes / 1024 / 1024:.2f} MB")
+        if self.naive_bytes:
+            message += f", 节省 {(1 - self.comparable_bytes / self.naive_bytes) * 100:.1f}%"
+        logging.info(message)
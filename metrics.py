@@ -0,0 +1,340 @@
+"""分阶段计时、字节数和队列深度指标
+
+爬取时间花在哪里：用 span(阶段, 站点) 包住一次页面加载、就绪等待、取HTML、解析、图片下载、
+转码或写入结果库，耗时记入按 (阶段, 站点) 区分的直方图；下载的字节数和各队列的深度也一并记录。
+
+- 运行中：设置环境变量 METRICS_PORT（或调用 serve(port)）后，本地 HTTP 端点提供
+  /metrics（Prometheus 文本格式）和 /summary（JSON）；
+- 运行结束：finish_run(名称) 把 JSON 汇总写入 METRICS_DIR 目录，并按总耗时输出各阶段的
+  次数、p50/p95/p99 和吞吐量。
+
+直方图按固定桶计数（供 Prometheus 聚合），分位数取自每个直方图的定长随机样本（蓄水池抽样），
+内存占用与运行时长无关。
+"""
+import os
+import json
+import time
+import random
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 阶段名
+PAGE_LOAD = 'page_load'
+READY_WAIT = 'ready_wait'
+HTML_FETCH = 'html_fetch'
+PARSE = 'parse'
+IMAGE_DOWNLOAD = 'image_download'
+TRANSCODE = 'transcode'
+PERSIST = 'persist'
+
+# 设为 False 时 span 等函数不记录
+ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+
+# 运行汇总的保存目录
+SUMMARY_DIR = os.environ.get('METRICS_DIR', 'metrics_runs')
+
+# 直方图的桶上限（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# 每个直方图保留的样本数（用于计算分位数）
+RESERVOIR_SIZE = 2048
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+STAGE_METRIC = 'crawler_stage_seconds'
+BYTES_METRIC = 'crawler_bytes_total'
+QUEUE_METRIC = 'crawler_queue_depth'
+
+HELP = {
+    STAGE_METRIC: '各阶段耗时（秒）',
+    BYTES_METRIC: '传输的字节数',
+    QUEUE_METRIC: '队列中的条目数',
+}
+
+
+class Histogram:
+    """固定桶直方图 + 蓄水池样本（线程安全）"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, reservoir_size=RESERVOIR_SIZE):
+        self.buckets = tuple(buckets)
+        self.reservoir_size = reservoir_size
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._samples = []
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+            if len(self._samples) < self.reservoir_size:
+                self._samples.append(value)
+            else:
+                index = random.randrange(self.count)
+                if index < self.reservoir_size:
+                    self._samples[index] = value
+
+    def snapshot(self):
+        """返回 {count, sum, max, mean, p50, p95, p99, buckets: [(上限, 累计数)]}"""
+        with self._lock:
+            samples = sorted(self._samples)
+            counts = list(self._counts)
+            count, total, maximum = self.count, self.sum, self.max
+        result = {'count': count, 'sum': total, 'max': maximum, 'mean': total / count if count else 0.0}
+        for q in QUANTILES:
+            result[f'p{round(q * 100)}'] = samples[min(len(samples) - 1, int(q * len(samples)))] if samples else 0.0
+        cumulative = 0
+        result['buckets'] = []
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            result['buckets'].append((bound, cumulative))
+        return result
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items() if value is not None))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (f'{name}="{_escape(value)}"' for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class MetricsRegistry:
+    """按名称和标签保存直方图、计数器和仪表（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self.started = time.time()
+
+    def histogram(self, name, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            return histogram
+
+    def observe(self, name, value, **labels):
+        self.histogram(name, **labels).observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        """设置仪表的值；value 可以是函数，在读取指标时调用"""
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def remove_gauge(self, name, **labels):
+        with self._lock:
+            self._gauges.pop((name, _label_key(labels)), None)
+
+    def _read_gauges(self):
+        with self._lock:
+            gauges = dict(self._gauges)
+        values = {}
+        for key, value in gauges.items():
+            try:
+                values[key] = value() if callable(value) else value
+            except Exception as e:
+                logging.debug(f"读取指标 {key[0]} 失败: {str(e)}")
+        return values
+
+    def prometheus_text(self):
+        """Prometheus 文本格式（0.0.4）"""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        gauges = sorted(self._read_gauges().items())
+
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                if name in HELP:
+                    lines.append(f'# HELP {name} {HELP[name]}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        for (name, key), histogram in histograms:
+            declare(name, 'histogram')
+            snapshot = histogram.snapshot()
+            for bound, cumulative in snapshot['buckets']:
+                lines.append(f'{name}_bucket{_format_labels(key, [("le", _format_bound(bound))])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(key)} {snapshot["sum"]}')
+            lines.append(f'{name}_count{_format_labels(key)} {snapshot["count"]}')
+        # 分位数另作为 summary 类型输出，不需要在 Prometheus 端计算
+        for (name, key), histogram in histograms:
+            quantile_name = name.replace('_seconds', '_quantile_seconds')
+            declare(quantile_name, 'summary')
+            snapshot = histogram.snapshot()
+            for q in QUANTILES:
+                lines.append(f'{quantile_name}{_format_labels(key, [("quantile", str(q))])} '
+                             f'{snapshot[f"p{round(q * 100)}"]}')
+            lines.append(f'{quantile_name}_sum{_format_labels(key)} {snapshot["sum"]}')
+            lines.append(f'{quantile_name}_count{_format_labels(key)} {snapshot["count"]}')
+        for (name, key), value in counters:
+            declare(name, 'counter')
+            lines.append(f'{name}{_format_labels(key)} {value}')
+        for (name, key), value in gauges:
+            declare(name, 'gauge')
+            lines.append(f'{name}{_format_labels(key)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """JSON 汇总：各阶段的分位数和吞吐量、字节数、队列深度"""
+        elapsed = max(time.time() - self.started, 1e-9)
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        stages = []
+        for (name, key), histogram in histograms:
+            snapshot = histogram.snapshot()
+            snapshot.pop('buckets')
+            snapshot.update(dict(key), metric=name, per_second=snapshot['count'] / elapsed)
+            stages.append(snapshot)
+        stages.sort(key=lambda row: row['sum'], reverse=True)
+        return {
+            'started': self.started,
+            'elapsed': elapsed,
+            'stages': stages,
+            'counters': [dict(key, metric=name, value=value, per_second=value / elapsed)
+                         for (name, key), value in counters],
+            'gauges': [dict(key, metric=name, value=value) for (name, key), value in self._read_gauges().items()],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started = time.time()
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def span(stage, site=None):
+    """计量一个阶段：with metrics.span(metrics.PAGE_LOAD, 'amazon'): driver.get(url)"""
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(STAGE_METRIC, time.perf_counter() - started, stage=stage, site=site)
+
+
+def observe(stage, seconds, site=None):
+    """记录在别处测得的阶段耗时（例如解析进程中的解析时间）"""
+    if ENABLED:
+        registry.observe(STAGE_METRIC, seconds, stage=stage, site=site)
+
+
+def add_bytes(kind, amount, site=None):
+    """记录传输的字节数，kind 为 html 或 image"""
+    if ENABLED and amount:
+        registry.inc(BYTES_METRIC, amount, kind=kind, site=site)
+
+
+def set_queue_depth(queue, depth, site=None):
+    """记录队列深度；depth 可以是返回当前深度的函数"""
+    if ENABLED:
+        registry.set_gauge(QUEUE_METRIC, depth, queue=queue, site=site)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path in ('/', '/metrics'):
+            body = registry.prometheus_text().encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        elif path == '/summary':
+            body = json.dumps(registry.summary(), ensure_ascii=False, indent=2).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve(port=None, host='127.0.0.1'):
+    """在后台线程中提供指标端点；未指定端口且没有设置 METRICS_PORT 时不启动，返回 server 或 None"""
+    global _server
+    port = port if port is not None else os.environ.get('METRICS_PORT')
+    if port in (None, ''):
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), _Handler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name='metrics', daemon=True).start()
+            logging.info(f"指标端点: http://{host}:{_server.server_address[1]}/metrics (JSON: /summary)")
+        return _server
+
+
+def log_summary(summary=None):
+    summary = summary or registry.summary()
+    for row in summary['stages']:
+        if row['metric'] != STAGE_METRIC:
+            continue
+        logging.info(f"[{row.get('site', '-')}] {row.get('stage')}: {row['count']} 次, 共 {row['sum']:.2f} 秒, "
+                     f"p50 {row['p50'] * 1000:.0f} ms, p95 {row['p95'] * 1000:.0f} ms, p99 {row['p99'] * 1000:.0f} ms, "
+                     f"{row['per_second']:.2f} 次/秒")
+    for row in summary['counters']:
+        if row['metric'] == BYTES_METRIC:
+            logging.info(f"[{row.get('site', '-')}] {row.get('kind')} 字节数: {row['value'] / 1024 / 1024:.2f} MB "
+                         f"({row['per_second'] / 1024:.1f} KB/秒)")
+
+
+def finish_run(name, directory=None):
+    """运行结束时输出各阶段汇总并写入 JSON 文件，返回文件路径"""
+    if not ENABLED:
+        return None
+    summary = registry.summary()
+    summary['run'] = name
+    log_summary(summary)
+    directory = directory or SUMMARY_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    logging.info(f"指标汇总已保存到 {path}")
+    return path
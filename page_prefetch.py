@@ -0,0 +1,131 @@
+"""在第二个标签页中预取下一页
+
+处理第 N 页（解析、下载图片）时浏览器是空闲的，随后翻页又要整段等待页面加载。
+TabPrefetcher 在处理当前页之前就把后续页面在后台标签页中打开，处理完后直接切换过去，
+把翻页的加载时间隐藏在处理时间之后；提取逻辑不变。
+"""
+import logging
+from collections import OrderedDict
+
+from selenium.common.exceptions import WebDriverException
+
+import politeness
+
+
+class TabPrefetcher:
+    """后台标签页预取（只在驱动浏览器的线程中使用）
+
+    depth 为最多同时预取的页面数。on_new_tab(driver) 在新标签页导航之前调用，
+    用于给新标签页设置URL屏蔽、网络缓冲区等按标签页生效的 CDP 配置。
+    """
+
+    def __init__(self, driver, depth=1, on_new_tab=None):
+        self.driver = driver
+        self.depth = depth
+        self.on_new_tab = on_new_tab
+        self._tabs = OrderedDict()
+
+        # 统计信息
+        self.opened = 0
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    @property
+    def pending(self):
+        """已预取、尚未切换过去的URL"""
+        return list(self._tabs)
+
+    def prefetch(self, urls):
+        """在后台标签页中打开尚未预取的URL（不超过 depth 个），焦点留在当前标签页"""
+        home = self.driver.current_window_handle
+        for url in urls:
+            if len(self._tabs) >= self.depth:
+                break
+            if not url or url in self._tabs:
+                continue
+
+            handle = None
+            try:
+                self.driver.switch_to.new_window('tab')
+                handle = self.driver.current_window_handle
+                if self.on_new_tab:
+                    self.on_new_tab(self.driver)
+                # 不等待加载完成，立即返回
+                politeness.acquire(url)
+                self.driver.execute_script("window.location.href = arguments[0];", url)
+                self._tabs[url] = handle
+                self.opened += 1
+                logging.info(f"后台预取: {url}")
+            except WebDriverException as e:
+                self.failures += 1
+                logging.warning(f"预取页面失败: {url} - {str(e)}")
+                if handle:
+                    self._close(handle)
+            finally:
+                self._switch(home)
+
+    def advance(self, url):
+        """切换到已预取的页面并关闭当前标签页，成功返回 True
+
+        url 未被预取（或标签页已失效）时返回 False，并关闭所有预取的标签页，
+        调用方按原来的方式翻页。
+        """
+        handle = self._tabs.pop(url, None)
+        if handle is None or handle not in self._window_handles():
+            self.misses += 1
+            self.close_all()
+            return False
+
+        try:
+            self.driver.close()
+            self.driver.switch_to.window(handle)
+        except WebDriverException as e:
+            self.failures += 1
+            logging.warning(f"切换到预取页面失败: {url} - {str(e)}")
+            self.close_all()
+            return False
+
+        self.hits += 1
+        logging.info(f"切换到预取的页面: {url}")
+        return True
+
+    def close_all(self):
+        """关闭所有预取的标签页，焦点回到当前标签页"""
+        if not self._tabs:
+            return
+        try:
+            home = self.driver.current_window_handle
+        except WebDriverException:
+            self._tabs.clear()
+            return
+        for handle in list(self._tabs.values()):
+            self._close(handle)
+        self._tabs.clear()
+        self._switch(home)
+
+    def _window_handles(self):
+        try:
+            return self.driver.window_handles
+        except WebDriverException:
+            return []
+
+    def _close(self, handle):
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        except WebDriverException:
+            pass
+
+    def _switch(self, handle):
+        try:
+            self.driver.switch_to.window(handle)
+        except WebDriverException:
+            # 原标签页已不存在时切换到任意剩余的标签页
+            handles = self._window_handles()
+            if handles:
+                self.driver.switch_to.window(handles[0])
+
+    def log_report(self):
+        logging.info(f"页面预取: 打开 {self.opened} 个标签页, 命中 {self.hits} 次, "
+                     f"未命中 {self.misses} 次, 失败 {self.failures} 次")
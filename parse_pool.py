@@ -0,0 +1,116 @@
+"""在进程池中解析页面HTML
+
+每次滚动或翻页后，对 page_source 做完整的 BeautifulSoup 解析会阻塞爬取循环。
+ParsePipeline 把原始HTML字符串交给 ProcessPoolExecutor 中的提取函数，浏览器立即继续
+下一步操作；解析结果通过 future 按提交顺序交还给爬取循环，解析的CPU开销分散到多个核心。
+
+提取函数及其参数、返回值都必须可以 pickle。工作进程中对全局对象的修改（例如尺寸提示）
+不会回到主进程，需要由提取函数随结果一起返回。使用 spawn/forkserver 启动方式的平台上，工作进程会
+重新执行主脚本的顶层代码（不执行 __main__ 部分），因此提取函数定义在没有导入副作用的插件模块
+（crawlers/<站点>.py）中。多线程的进程（例如编排器）应传入 forkserver 的 mp_context，
+在有其他线程持有锁时 fork 出的工作进程可能死锁。多个流水线可以共用一个进程池（executor），各自按提交顺序取回结果。
+每次解析的耗时在工作进程中测量，取回结果时记入 metrics 的 parse 阶段；待取回的数量记为队列深度。
+"""
+import os
+import time
+import pickle
+import logging
+import concurrent.futures
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+import profiling
+
+
+def _timed(fn, *args):
+    """在工作进程中执行提取函数，返回 (结果, 耗时秒数)"""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class ParsePipeline:
+    """按提交顺序返回结果的解析流水线；进程池不可用时在主进程中解析"""
+
+    def __init__(self, max_workers=None, enabled=True, site=None, mp_context=None, executor=None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.enabled = enabled
+        self.site = site
+        self.mp_context = mp_context
+        # 外部传入的进程池由创建者关闭
+        self._executor = executor
+        self._shared = executor is not None
+        self._pending = deque()
+        metrics.set_queue_depth('parse', lambda: len(self._pending), site)
+
+    def _get_executor(self):
+        if self._executor is None and self.enabled:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers,
+                                                                    mp_context=self.mp_context)
+        return self._executor
+
+    def _submit(self, fn, args):
+        executor = self._get_executor()
+        if executor is not None:
+            try:
+                return executor.submit(_timed, fn, *args)
+            except (BrokenProcessPool, RuntimeError) as e:
+                self._disable(e)
+        return None
+
+    def submit(self, fn, *args, tag=None):
+        """提交一次解析；tag 原样随结果返回（例如页码）"""
+        self._pending.append((tag, fn, args, self._submit(fn, args)))
+
+    def run(self, fn, *args):
+        """在进程池中执行一次解析并等待结果，不经过按顺序取回的队列"""
+        return self._result(fn, args, self._submit(fn, args))
+
+    def _disable(self, error):
+        logging.warning(f"解析进程池不可用，改为在主进程中解析: {str(error)}")
+        self.enabled = False
+        if self._executor is not None and not self._shared:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def _result(self, fn, args, future):
+        if future is None:
+            result, seconds = _timed(fn, *args)
+        else:
+            try:
+                result, seconds = future.result()
+            except (BrokenProcessPool, pickle.PicklingError, AttributeError) as e:
+                # 进程崩溃或提取函数无法在工作进程中使用，改在主进程中重新解析
+                self._disable(e)
+                result, seconds = _timed(fn, *args)
+        metrics.observe(metrics.PARSE, seconds, self.site)
+        profiling.checkpoint('parse', self.site)
+        return result
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def results(self, keep=0):
+        """按提交顺序等待并返回 (tag, 结果)，直到只剩 keep 个未取出的解析任务"""
+        while len(self._pending) > keep:
+            tag, fn, args, future = self._pending.popleft()
+            yield tag, self._result(fn, args, future)
+
+    def close(self):
+        """取消尚未开始的解析并关闭进程池"""
+        for _, _, _, future in self._pending:
+            if future is not None:
+                future.cancel()
+        self._pending.clear()
+        metrics.set_queue_depth('parse', 0, self.site)
+        if self._executor is not None and not self._shared:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,233 @@
+"""跨进程的按域名限速（令牌桶）
+
+以前的礼貌等待是各进程内零散的 random.uniform 休眠，并行运行多个爬虫进程时它们互不知道
+对方的请求速率。这里每个域名一个令牌桶，状态保存在 SQLite 文件中，同一台机器上的所有进程
+在同一个事务里取令牌：每次页面导航和资源请求前调用 acquire(url)，令牌不足时预约下一个令牌
+并在事务外休眠，因此多个进程会按速率依次排队而不是同时醒来。
+
+速率（每秒请求数）和突发量按域名后缀配置，见 DEFAULT_POLICIES；也可以用环境变量覆盖：
+    POLITENESS_RATES="amazon.com=0.5:2,bstatic.com=8:16"
+rate 为 0 表示不限速。每个进程记录本进程的等待时间，所有进程的累计等待保存在同一个文件中：
+    python politeness.py            # 查看各域名的请求数和等待时间
+"""
+import os
+import sys
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+DomainPolicy = namedtuple('DomainPolicy', ['rate', 'burst'])
+
+# 域名后缀 -> (每秒请求数, 突发量)；页面比图片CDN更保守
+DEFAULT_POLICIES = {
+    'amazon.com': DomainPolicy(0.5, 2),
+    'media-amazon.com': DomainPolicy(8, 16),
+    'ssl-images-amazon.com': DomainPolicy(8, 16),
+    'booking.com': DomainPolicy(0.5, 2),
+    'bstatic.com': DomainPolicy(8, 16),
+    'twitter.com': DomainPolicy(0.3, 2),
+    'x.com': DomainPolicy(0.3, 2),
+    'twimg.com': DomainPolicy(4, 8),
+    'imdb.com': DomainPolicy(1, 4),
+    'allrecipes.com': DomainPolicy(1, 4),
+    'mdpcdn.com': DomainPolicy(8, 16),
+    # 本地替身服务器和测试不限速
+    'localhost': DomainPolicy(0, 0),
+    '127.0.0.1': DomainPolicy(0, 0),
+}
+
+# 未配置的域名
+FALLBACK_POLICY = DomainPolicy(2, 5)
+
+# 设为 False 时 acquire 直接返回（例如基准测试）
+ENABLED = os.environ.get('POLITENESS_ENABLED', '1') != '0'
+
+DB_PATH = os.environ.get('POLITENESS_DB', 'politeness.sqlite')
+
+
+def parse_rates(text):
+    """解析 'amazon.com=0.5:2,bstatic.com=8' 形式的配置，突发量缺省为 1"""
+    policies = {}
+    for part in filter(None, (p.strip() for p in (text or '').split(','))):
+        domain, _, spec = part.partition('=')
+        rate, _, burst = spec.partition(':')
+        policies[domain.strip().lower()] = DomainPolicy(float(rate), float(burst or 1))
+    return policies
+
+
+class PolitenessGovernor:
+    """按域名的令牌桶，状态在 SQLite 文件中跨进程共享（线程安全）"""
+
+    def __init__(self, db_path=DB_PATH, policies=None):
+        self.db_path = db_path
+        self.policies = dict(DEFAULT_POLICIES)
+        self.policies.update(policies or {})
+        self.policies.update(parse_rates(os.environ.get('POLITENESS_RATES')))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # 令牌桶状态丢失无关紧要，不需要每次落盘
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                domain TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS wait_stats (
+                domain TEXT PRIMARY KEY,
+                requests INTEGER NOT NULL DEFAULT 0,
+                waited INTEGER NOT NULL DEFAULT 0,
+                wait_seconds REAL NOT NULL DEFAULT 0,
+                max_wait REAL NOT NULL DEFAULT 0
+            );
+        """)
+
+        # 本进程的统计：域名 -> [请求数, 等待次数, 等待总秒数, 最长等待秒数]
+        self._stats = {}
+
+    def set_policy(self, domain, rate, burst=1):
+        self.policies[domain.lower()] = DomainPolicy(rate, burst)
+
+    def domain_of(self, url):
+        """按配置的后缀归并域名（www.amazon.com 和 amazon.com 共用一个桶），未配置时取主域名"""
+        host = (urlsplit(url).hostname or '').lower()
+        labels = host.split('.')
+        for i in range(len(labels)):
+            suffix = '.'.join(labels[i:])
+            if suffix in self.policies:
+                return suffix
+        return '.'.join(labels[-2:]) if len(labels) > 2 and not host.replace('.', '').isdigit() else host
+
+    def _reserve(self, domain, policy):
+        """取一个令牌，令牌不足时预约（桶可以为负），返回需要等待的秒数"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE domain = ?", (domain,)).fetchone()
+                tokens = policy.burst if row is None else min(policy.burst, row[0] + (now - row[1]) * policy.rate)
+                tokens -= 1
+                wait = max(0.0, -tokens / policy.rate)
+                self._conn.execute("INSERT OR REPLACE INTO buckets (domain, tokens, updated) VALUES (?, ?, ?)",
+                                   (domain, tokens, now))
+                self._conn.execute(
+                    "INSERT INTO wait_stats (domain, requests, waited, wait_seconds, max_wait) VALUES (?, 1, ?, ?, ?) "
+                    "ON CONFLICT(domain) DO UPDATE SET requests = requests + 1, waited = waited + excluded.waited, "
+                    "wait_seconds = wait_seconds + excluded.wait_seconds, max_wait = MAX(max_wait, excluded.max_wait)",
+                    (domain, 1 if wait > 0 else 0, wait, wait)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            stats = self._stats.setdefault(domain, [0, 0, 0.0, 0.0])
+            stats[0] += 1
+            if wait > 0:
+                stats[1] += 1
+                stats[2] += wait
+                stats[3] = max(stats[3], wait)
+        return wait
+
+    def acquire(self, url):
+        """请求 url 之前调用，按该域名的速率等待，返回等待的秒数"""
+        domain = self.domain_of(url)
+        policy = self.policies.get(domain, FALLBACK_POLICY)
+        if not domain or policy.rate <= 0:
+            return 0.0
+        wait = self._reserve(domain, policy)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def stats(self):
+        """本进程的统计：{域名: (请求数, 等待次数, 等待总秒数, 最长等待秒数)}"""
+        with self._lock:
+            return {domain: tuple(values) for domain, values in self._stats.items()}
+
+    def shared_stats(self):
+        """所有进程的累计统计，格式同 stats()"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT domain, requests, waited, wait_seconds, max_wait FROM wait_stats ORDER BY domain"
+            ).fetchall()
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def reset(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM buckets")
+            self._conn.execute("DELETE FROM wait_stats")
+
+    def log_report(self):
+        for domain, (requests_count, waited, seconds, max_wait) in sorted(self.stats().items()):
+            logging.info(f"限速 {domain}: 请求 {requests_count} 次, 其中等待 {waited} 次, "
+                         f"共等待 {seconds:.1f} 秒 (平均 {seconds / requests_count:.2f} 秒, 最长 {max_wait:.1f} 秒)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor():
+    """本进程共用的限速器，第一次使用时创建"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = PolitenessGovernor()
+        return _governor
+
+
+def acquire(url):
+    """页面导航和资源请求前调用：按域名限速，返回等待的秒数"""
+    if not ENABLED or not url:
+        return 0.0
+    return get_governor().acquire(url)
+
+
+def log_report():
+    if _governor is not None:
+        _governor.log_report()
+
+
+class PoliteAdapter(HTTPAdapter):
+    """requests 传输适配器：经过该 Session 的每个请求（包括重定向）都先取令牌"""
+
+    def send(self, request, **kwargs):
+        acquire(request.url)
+        return super().send(request, **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='各域名的请求数和限速等待时间（所有进程累计）')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--reset', action='store_true', help='清空令牌桶和统计')
+    args = parser.parse_args(argv)
+
+    governor = PolitenessGovernor(args.db)
+    try:
+        if args.reset:
+            governor.reset()
+            return 0
+        print(f"{'域名':<24}{'速率/s':>8}{'突发':>6}{'请求':>8}{'等待次数':>10}{'等待总秒数':>12}{'平均秒':>8}{'最长秒':>8}")
+        for domain, (requests_count, waited, seconds, max_wait) in governor.shared_stats().items():
+            policy = governor.policies.get(domain, FALLBACK_POLICY)
+            print(f"{domain:<24}{policy.rate:>8g}{policy.burst:>6g}{requests_count:>8}{waited:>10}"
+                  f"{seconds:>12.1f}{seconds / requests_count:>8.2f}{max_wait:>8.1f}")
+    finally:
+        governor.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""按需开启的采样分析器和内存快照
+
+生产爬取变慢或内存膨胀时，不重启进程就能看到时间和内存花在哪里：
+- 采样分析器：后台线程每隔 SAMPLE_INTERVAL 秒读取所有线程的调用栈（sys._current_frames），
+  按"线程;最外层函数;...;最内层函数 次数"的折叠栈格式累计，停止时写入 PROFILE_DIR/<名称>_<时间>.folded，
+  可以直接交给 flamegraph.pl、inferno 或 speedscope 生成火焰图。采样不修改被测代码的执行，
+  开销与线程数和采样频率成正比，与调用次数无关；
+- 内存快照：分析期间同时开启 tracemalloc，爬虫在阶段边界（取到页面HTML后、解析完成后、
+  一批下载完成后）调用 checkpoint(阶段, 站点)，与上一个快照比较并输出分配增长最多的代码行，
+  同时追加到同名的 _memory.txt 文件。没有开启分析时 checkpoint 只做一次判断。
+
+开启方式：
+    python Amazon.py --profile                  # 从启动开始分析，运行结束时写出
+    CRAWLER_PROFILE=1 python Amazon.py          # 同上
+    kill -USR1 <pid>                            # 运行中切换：第一次开始，第二次停止并写出
+解析进程池中的子进程不在采样范围内（在主进程中解析时会被采到），内存快照只统计当前进程。
+"""
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+
+# 采样间隔（秒）
+SAMPLE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', '0.01'))
+
+# 输出目录
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+
+# 分析期间是否开启 tracemalloc；tracemalloc 会让分配变慢，只关心CPU时可设为 0
+TRACE_MEMORY = os.environ.get('PROFILE_MEMORY', '1') != '0'
+
+# tracemalloc 保留的栈深度（1 表示只按分配所在的代码行统计）
+TRACE_FRAMES = int(os.environ.get('PROFILE_MEMORY_FRAMES', '1'))
+
+# 两次内存快照的最小间隔（秒），避免每页都做快照拖慢爬取
+CHECKPOINT_INTERVAL = float(os.environ.get('PROFILE_CHECKPOINT_INTERVAL', '5'))
+
+# 每次比较输出的分配位置数量
+TOP_ALLOCATIONS = 10
+
+# 不计入内存比较的模块（快照和采样本身、导入机制的分配）
+_IGNORED_FILES = (tracemalloc.__file__, __file__, '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>',
+                  '<unknown>')
+
+
+class SamplingProfiler:
+    """后台线程定期采集所有线程的调用栈，累计为折叠栈"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _frame_name(code):
+        return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def write(self, path):
+        """写入折叠栈文件（每行"栈 次数"），按次数从多到少排列"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class MemoryTracker:
+    """tracemalloc 快照：每个检查点与上一个快照比较，报告增长最多的分配位置"""
+
+    def __init__(self, path, frames=TRACE_FRAMES, min_interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.frames = frames
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._previous = None
+        self._previous_label = None
+        self._last_time = 0.0
+        self._started_here = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_here = True
+        self._previous, self._previous_label = self._snapshot(), 'start'
+        self._last_time = time.monotonic()
+
+    def stop(self):
+        if self._started_here:
+            tracemalloc.stop()
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in _IGNORED_FILES]
+        )
+
+    def checkpoint(self, label):
+        """返回本次比较的报告行；距上次快照不足 min_interval 秒时跳过并返回 None"""
+        now = time.monotonic()
+        if now - self._last_time < self.min_interval or not self._lock.acquire(blocking=False):
+            return None
+        try:
+            if not tracemalloc.is_tracing():
+                return None
+            snapshot = self._snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [f"{time.strftime('%H:%M:%S')} {self._previous_label} -> {label}: "
+                     f"当前 {current / 1024 / 1024:.1f} MB, 峰值 {peak / 1024 / 1024:.1f} MB"]
+            for stat in snapshot.compare_to(self._previous, 'lineno')[:TOP_ALLOCATIONS]:
+                if not stat.size_diff:
+                    break
+                frame = stat.traceback[0]
+                lines.append(f"    {stat.size_diff / 1024:+10.1f} KB {stat.count_diff:+8d} 块  "
+                             f"{frame.filename}:{frame.lineno}")
+            self._previous, self._previous_label = snapshot, label
+            self._last_time = time.monotonic()
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+            return lines
+        finally:
+            self._lock.release()
+
+
+class Session:
+    """一次分析：采样分析器 + 可选的内存跟踪，stop() 时写出结果"""
+
+    def __init__(self, name, directory=None, interval=SAMPLE_INTERVAL, memory=TRACE_MEMORY):
+        directory = directory or PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.base = os.path.join(directory, f"{name}_{time.strftime('%Y%m%d-%H%M%S')}")
+        self.profiler = SamplingProfiler(interval)
+        self.memory = MemoryTracker(f"{self.base}_memory.txt") if memory else None
+
+    def start(self):
+        if self.memory:
+            self.memory.start()
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+        if self.memory:
+            self.memory.stop()
+        path = self.profiler.write(f"{self.base}.folded")
+        elapsed = time.time() - self.profiler.started
+        logging.info(f"采样分析结束: {elapsed:.1f} 秒, {self.profiler.samples} 次采样, 折叠栈已保存到 {path}")
+        if self.memory and os.path.exists(self.memory.path):
+            logging.info(f"内存快照比较见 {self.memory.path}")
+        return path
+
+
+_session = None
+_session_lock = threading.Lock()
+_name = 'crawler'
+
+
+def active():
+    return _session is not None
+
+
+def start(name=None):
+    """开始分析；已经在分析时什么也不做"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = Session(name or _name)
+            _session.start()
+            logging.info(f"采样分析已开始（间隔 {_session.profiler.interval * 1000:.0f} ms"
+                         f"{'，内存跟踪已开启' if _session.memory else ''}）")
+        return _session
+
+
+def stop():
+    """停止分析并写出结果，返回折叠栈文件路径；没有在分析时返回 None"""
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    return session.stop() if session else None
+
+
+def toggle(*_):
+    """信号处理函数：没有在分析时开始，否则停止并写出（在新线程中执行，不阻塞被中断的爬取循环）"""
+    threading.Thread(target=stop if active() else start, name='profiler-toggle', daemon=True).start()
+
+
+def checkpoint(stage, site=None):
+    """阶段边界的内存快照；没有开启分析或内存跟踪时立即返回"""
+    session = _session
+    if session is None or session.memory is None:
+        return
+    lines = session.memory.checkpoint(f"{site}:{stage}" if site else stage)
+    if lines:
+        logging.info('内存快照 ' + '\n'.join(lines))
+
+
+def install(name, argv=None, enabled=None):
+    """爬虫启动时调用：注册 SIGUSR1 切换分析；命令行带 --profile 或设置 CRAWLER_PROFILE=1 时立即开始"""
+    global _name
+    _name = name
+    if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, toggle)
+    if enabled is None:
+        argv = sys.argv[1:] if argv is None else argv
+        enabled = '--profile' in argv or os.environ.get('CRAWLER_PROFILE', '0') != '0'
+    if enabled:
+        start(name)
+
+
+def finish():
+    """爬虫结束时调用：仍在分析时停止并写出结果"""
+    return stop()
@@ -0,0 +1,185 @@
+"""精简浏览配置：屏蔽渲染结果页面不需要的资源
+
+爬虫只用浏览器渲染结果页面的HTML，广告、字体、视频、统计和第三方脚本都不需要。
+屏蔽分两层：
+1. Chrome 首选项（prefs）：关闭图片、通知、地理位置等，被关闭的资源根本不会发出请求；
+2. CDP Network.setBlockedURLs：按URL通配符屏蔽请求，被屏蔽的请求会以
+   Network.loadingFailed（blockedReason）出现在网络事件中，可以计数。
+每个站点有自己的屏蔽/放行列表；TrafficMeter 统计每页实际传输量和节省的请求数、估计字节数。
+"""
+import logging
+import threading
+from collections import namedtuple
+
+from selenium.common.exceptions import WebDriverException
+
+# 所有站点默认屏蔽：广告、统计、第三方追踪、字体和视频
+COMMON_BLOCK_PATTERNS = [
+    # 广告
+    '*doubleclick.net*', '*googlesyndication.com*', '*googleadservices.com*', '*adservice.google.*',
+    '*amazon-adsystem.com*', '*adnxs.com*', '*criteo.*', '*taboola.com*', '*outbrain.com*',
+    '*pubmatic.com*', '*rubiconproject.com*', '*casalemedia.com*', '*moatads.com*',
+    # 统计和追踪
+    '*google-analytics.com*', '*googletagmanager.com*', '*scorecardresearch.com*', '*hotjar.com*',
+    '*facebook.net*', '*connect.facebook.com*', '*nr-data.net*', '*newrelic.com*', '*segment.io*',
+    '*quantserve.com*', '*chartbeat.*', '*optimizely.com*', '*branch.io*',
+    # 字体
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot', '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+    # 视频和音频
+    '*.mp4', '*.webm', '*.m3u8', '*.ts', '*.m4s', '*.mp3',
+]
+
+# 连接到已运行的浏览器时 prefs 无效，改用URL规则屏蔽图片
+IMAGE_BLOCK_PATTERNS = ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico']
+
+# 被 prefs 关闭的内容设置（2 = 阻止）
+CONTENT_SETTINGS = {
+    'notifications': 2,
+    'geolocation': 2,
+    'media_stream': 2,
+    'automatic_downloads': 2,
+}
+
+# 屏蔽配置：站点名、额外屏蔽、放行（从默认列表中移除的规则）、是否屏蔽图片
+BlockingProfile = namedtuple('BlockingProfile', ['name', 'block', 'allow', 'block_images'])
+
+PROFILES = {
+    # 商品图变体URL由DOM中的地址推导，页面本身的图片不需要加载
+    'amazon': BlockingProfile('amazon', [
+        '*fls-na.amazon.com*', '*unagi.amazon.com*', '*aax-us-east.amazon-adsystem.com*',
+        '*images-na.ssl-images-amazon.com/images/G/01/ad-*',
+    ], [], True),
+    # 图片需要加载以便截获复用
+    'booking': BlockingProfile('booking', [
+        '*booking.com/fresa/*', '*px.ads.linkedin.com*', '*bat.bing.com*',
+    ], [], False),
+    'imdb': BlockingProfile('imdb', [
+        '*imdb-video.media-imdb.com*', '*fls-na.amazon.com*', '*unagi.amazon.com*', '*aiv-cdn.net*',
+    ], [], False),
+    'allrecipes': BlockingProfile('allrecipes', [
+        '*dotdashmeredith.com/ads*', '*jwplayer.com*', '*jwpcdn.com*', '*pinimg.com*',
+    ], [], False),
+    # 只需要推文文本，图片和视频都不加载
+    'twitter': BlockingProfile('twitter', [
+        '*video.twimg.com*', '*ads-api.twitter.com*', '*ads-twitter.com*', '*analytics.twitter.com*',
+    ], [], True),
+}
+
+# 无法统计字节数时各资源类型的估计大小
+DEFAULT_RESOURCE_SIZES = {
+    'Script': 40 * 1024, 'Stylesheet': 20 * 1024, 'Font': 40 * 1024, 'Media': 500 * 1024,
+    'Image': 30 * 1024, 'XHR': 5 * 1024, 'Fetch': 5 * 1024, 'Document': 30 * 1024,
+}
+DEFAULT_RESOURCE_SIZE = 10 * 1024
+
+
+def blocked_patterns(profile):
+    """站点最终使用的屏蔽列表：默认列表 + 额外屏蔽 - 放行"""
+    patterns = COMMON_BLOCK_PATTERNS + [p for p in profile.block if p not in COMMON_BLOCK_PATTERNS]
+    return [p for p in patterns if p not in profile.allow]
+
+
+def apply_blocking_prefs(options, profile):
+    """在 ChromeOptions 中写入屏蔽用的首选项"""
+    settings = dict(CONTENT_SETTINGS)
+    if profile.block_images:
+        settings['images'] = 2
+    options.add_experimental_option('prefs', {
+        f'profile.managed_default_content_settings.{name}': value for name, value in settings.items()
+    })
+    return options
+
+
+def apply_blocked_urls(driver, profile, images_by_url=False):
+    """通过 CDP 设置URL屏蔽列表（替换之前的列表），返回规则数量
+
+    应在创建 NetworkEventTap 之前调用，以免这里的 Network.enable 覆盖其缓冲区设置。
+    连接到守护浏览器的 driver（browser_daemon.AttachedChrome）不受 prefs 控制，图片也按URL屏蔽；
+    多个站点共用的浏览器没有按站点设置 prefs，传入 images_by_url=True 同样按URL屏蔽图片。
+    """
+    patterns = blocked_patterns(profile)
+    if profile.block_images and (images_by_url or getattr(driver, 'attached', False)):
+        patterns += IMAGE_BLOCK_PATTERNS
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    except WebDriverException as e:
+        logging.warning(f"[{profile.name}] 设置URL屏蔽失败: {str(e)}")
+        return 0
+    logging.info(f"[{profile.name}] 已屏蔽 {len(patterns)} 类URL"
+                 f"{'，并关闭图片加载' if profile.block_images else ''}")
+    return len(patterns)
+
+
+class TrafficMeter:
+    """统计每页的请求数、传输字节数以及被屏蔽的请求（线程安全）
+
+    被屏蔽请求的大小无从得知，按本次运行中同类型资源的平均大小估计，
+    尚无样本时使用 DEFAULT_RESOURCE_SIZES；被 prefs 关闭的图片不会发出请求，不计入。
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self._lock = threading.Lock()
+        self._types = {}
+        self._type_bytes = {}
+        self._type_counts = {}
+        self._page = self._new_counters()
+        self._total = self._new_counters()
+        self.pages = 0
+
+    @staticmethod
+    def _new_counters():
+        return {'requests': 0, 'bytes': 0, 'blocked': 0, 'blocked_bytes': 0}
+
+    def attach(self, tap):
+        tap.subscribe(self.on_event)
+        return self
+
+    def _estimate(self, resource_type):
+        count = self._type_counts.get(resource_type)
+        if count:
+            return self._type_bytes[resource_type] / count
+        return DEFAULT_RESOURCE_SIZES.get(resource_type, DEFAULT_RESOURCE_SIZE)
+
+    def on_event(self, method, params):
+        """网络事件回调（tap.subscribe，或由共享浏览器池转发给当前租用浏览器的任务）"""
+        with self._lock:
+            if method == 'Network.requestWillBeSent':
+                self._types[params.get('requestId')] = params.get('type', 'Other')
+            elif method == 'Network.loadingFinished':
+                resource_type = self._types.pop(params.get('requestId'), 'Other')
+                size = int(params.get('encodedDataLength') or 0)
+                self._type_bytes[resource_type] = self._type_bytes.get(resource_type, 0) + size
+                self._type_counts[resource_type] = self._type_counts.get(resource_type, 0) + 1
+                for counters in (self._page, self._total):
+                    counters['requests'] += 1
+                    counters['bytes'] += size
+            elif method == 'Network.loadingFailed':
+                resource_type = self._types.pop(params.get('requestId'), params.get('type', 'Other'))
+                if params.get('blockedReason'):
+                    estimate = self._estimate(resource_type)
+                    for counters in (self._page, self._total):
+                        counters['blocked'] += 1
+                        counters['blocked_bytes'] += estimate
+
+    @staticmethod
+    def _format(counters):
+        return (f"请求 {counters['requests']} 个共 {counters['bytes'] / 1024:.1f} KB, "
+                f"屏蔽 {counters['blocked']} 个请求 (估计节省 {counters['blocked_bytes'] / 1024:.1f} KB)")
+
+    def report_page(self, label):
+        """输出并重置当前页面的统计，返回统计文本"""
+        with self._lock:
+            page, self._page = self._page, self._new_counters()
+            self.pages += 1
+        message = f"[{self.profile.name}] {label}: {self._format(page)}"
+        logging.info(message)
+        return message
+
+    def log_report(self):
+        with self._lock:
+            total = dict(self._total)
+        message = f"[{self.profile.name}] 流量合计 ({self.pages} 页): {self._format(total)}"
+        logging.info(message)
+        return message
@@ -0,0 +1,261 @@
+"""共享的 SQLite 结果库
+
+所有爬虫把结果写入同一个 SQLite 数据库（WAL 模式），每个数据源一张表，
+以自然键（推文ID、ASIN、IMDb 编号、图片URL）为主键。爬取过程中批量 upsert，
+程序中途崩溃也不会丢失已写入的数据；Excel / CSV / Parquet 从库中流式导出。
+"""
+import os
+import csv
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+
+# 表结构：主键列和 (列名, 导出表头) 列表
+TABLES = {
+    'tweets': {
+        'key': 'tweet_id',
+        'columns': [
+            ('tweet_id', '推文ID'), ('username', '用户名'), ('content', '内容'), ('timestamp', '发布时间'),
+            ('replies', '回复数'), ('retweets', '转发数'), ('likes', '点赞数'),
+        ],
+    },
+    'amazon_products': {
+        'key': 'asin',
+        'columns': [('asin', 'ASIN'), ('image_url', '图片URL'), ('page', '页码')],
+    },
+    'imdb_movies': {
+        'key': 'title_id',
+        'columns': [
+            ('title_id', 'IMDb编号'), ('rank', '排名'), ('title', '标题'), ('year', '年份'), ('rating', '评分'),
+            ('duration', '时长'), ('cast', '演员'), ('poster_url', '海报URL'), ('url', '电影URL'),
+            ('genres', '类型'), ('directors', '导演'), ('runtime_minutes', '片长(分钟)'), ('vote_count', '评分人数'),
+        ],
+    },
+    'booking_images': {
+        'key': 'image_url',
+        'columns': [('image_url', '图片URL'), ('scroll', '滚动次数')],
+    },
+    'allrecipes_images': {
+        'key': 'image_url',
+        'columns': [('image_url', '图片URL'), ('offset', '搜索页offset')],
+    },
+}
+
+# xls 格式单个工作表的最大行数
+XLS_MAX_ROWS = 65536
+
+# 默认导出格式（逗号分隔）；未安装 pyarrow 时跳过 Parquet 并提示一次
+EXPORT_FORMATS = tuple(f.strip() for f in os.environ.get('EXPORT_FORMATS', 'excel,csv,parquet').split(',') if f.strip())
+
+_pyarrow_warned = False
+
+
+def _quoted(names):
+    return ', '.join(f'"{name}"' for name in names)
+
+
+class ResultStore:
+    """SQLite 结果库（线程安全），写入先进入缓冲区，按批次提交"""
+
+    def __init__(self, db_path='crawl_results.sqlite', batch_size=200):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.run_id = time.strftime('%Y%m%d%H%M%S') + '-' + uuid.uuid4().hex[:6]
+        self._lock = threading.Lock()
+        self._buffers = {}
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        for table, spec in TABLES.items():
+            columns = ', '.join(
+                f'"{name}" TEXT PRIMARY KEY' if name == spec['key'] else f'"{name}"'
+                for name, _ in spec['columns']
+            )
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({columns}, run_id TEXT, updated REAL)')
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_run ON {table} (run_id)')
+        self._conn.commit()
+
+    def upsert(self, table, rows):
+        """加入待写入的行（字典），缓冲区满时批量提交"""
+        spec = TABLES[table]
+        with self._lock:
+            buffer = self._buffers.setdefault(table, [])
+            for row in rows:
+                if row.get(spec['key']) in (None, '', 'N/A'):
+                    continue
+                buffer.append(row)
+            if len(buffer) >= self.batch_size:
+                self._flush_table(table)
+
+    def _flush_table(self, table):
+        buffer = self._buffers.get(table)
+        if not buffer:
+            return
+        spec = TABLES[table]
+        names = [name for name, _ in spec['columns']]
+        # 只更新本次提供的非空字段，保留之前运行补全的数据
+        updates = ', '.join(
+            f'"{name}" = COALESCE(excluded."{name}", "{name}")' for name in names if name != spec['key']
+        )
+        sql = (f'INSERT INTO {table} ({_quoted(names)}, run_id, updated) '
+               f'VALUES ({", ".join("?" for _ in names)}, ?, ?) '
+               f'ON CONFLICT("{spec["key"]}") DO UPDATE SET {updates}, run_id = excluded.run_id, '
+               f'updated = excluded.updated')
+        now = time.time()
+        self._conn.executemany(sql, [[row.get(name) for name in names] + [self.run_id, now] for row in buffer])
+        self._conn.commit()
+        buffer.clear()
+
+    def flush(self):
+        """提交所有缓冲区"""
+        with self._lock:
+            for table in list(self._buffers):
+                self._flush_table(table)
+
+    def count(self, table, run_id=None):
+        self.flush()
+        with self._lock:
+            if run_id:
+                return self._conn.execute(f'SELECT COUNT(*) FROM {table} WHERE run_id = ?', (run_id,)).fetchone()[0]
+            return self._conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+    def iter_rows(self, table, run_id=None, chunk_size=1000):
+        """按批次流式读取表中的行（元组），不把整张表读入内存"""
+        self.flush()
+        names = [name for name, _ in TABLES[table]['columns']]
+        sql = f'SELECT {_quoted(names)} FROM {table}'
+        params = ()
+        if run_id:
+            sql += ' WHERE run_id = ?'
+            params = (run_id,)
+        sql += ' ORDER BY rowid'
+
+        # 使用独立连接读取，避免长时间占用写入锁
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def headers(self, table):
+        return [header for _, header in TABLES[table]['columns']]
+
+    def export_csv(self, table, path, run_id=None):
+        """流式导出为 CSV（UTF-8 BOM，Excel 可直接打开）"""
+        count = 0
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.headers(table))
+            for row in self.iter_rows(table, run_id):
+                writer.writerow(row)
+                count += 1
+        logging.info(f"已导出 {count} 行到 {path}")
+        return path
+
+    def export_excel(self, table, path, run_id=None, sheet_name=None):
+        """导出为 Excel：优先使用 openpyxl 只写模式流式生成 xlsx，否则退回 xlwt 并按行数分表"""
+        sheet_name = sheet_name or table
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            return self._export_xls(table, os.path.splitext(path)[0] + '.xls', run_id, sheet_name)
+
+        path = os.path.splitext(path)[0] + '.xlsx'
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(self.headers(table))
+        count = 0
+        for row in self.iter_rows(table, run_id):
+            sheet.append(list(row))
+            count += 1
+        workbook.save(path)
+        logging.info(f"已导出 {count} 行到 {path}")
+        return path
+
+    def _export_xls(self, table, path, run_id, sheet_name):
+        import xlwt
+
+        workbook = xlwt.Workbook()
+        headers = self.headers(table)
+        sheet = None
+        row_index = XLS_MAX_ROWS
+        count = 0
+        for row in self.iter_rows(table, run_id):
+            # 超过单表行数上限时新建工作表
+            if row_index >= XLS_MAX_ROWS:
+                sheet = workbook.add_sheet(f"{sheet_name}_{count // (XLS_MAX_ROWS - 1) + 1}"[:31])
+                for col, header in enumerate(headers):
+                    sheet.write(0, col, header)
+                row_index = 1
+            for col, value in enumerate(row):
+                sheet.write(row_index, col, value)
+            row_index += 1
+            count += 1
+        if sheet is None:
+            sheet = workbook.add_sheet(sheet_name[:31])
+            for col, header in enumerate(headers):
+                sheet.write(0, col, header)
+        workbook.save(path)
+        logging.info(f"已导出 {count} 行到 {path}")
+        return path
+
+    def export_parquet(self, table, path, run_id=None, chunk_size=10000):
+        """按批次流式导出为 Parquet（需要安装 pyarrow）"""
+        global _pyarrow_warned
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            if not _pyarrow_warned:
+                _pyarrow_warned = True
+                logging.warning("未安装 pyarrow，跳过 Parquet 导出（pip install pyarrow）")
+            return None
+
+        names = [name for name, _ in TABLES[table]['columns']]
+        schema = pa.schema([(name, pa.string()) for name in names])
+        count = 0
+        with pq.ParquetWriter(path, schema) as writer:
+            batch = []
+            for row in self.iter_rows(table, run_id):
+                batch.append(row)
+                if len(batch) >= chunk_size:
+                    writer.write_table(self._to_arrow(pa, schema, names, batch))
+                    count += len(batch)
+                    batch = []
+            if batch:
+                writer.write_table(self._to_arrow(pa, schema, names, batch))
+                count += len(batch)
+        logging.info(f"已导出 {count} 行到 {path}")
+        return path
+
+    @staticmethod
+    def _to_arrow(pa, schema, names, rows):
+        columns = list(zip(*rows))
+        return pa.table(
+            [[None if v is None else str(v) for v in column] for column in columns], schema=schema
+        )
+
+    def export(self, table, basename, run_id=None, formats=None):
+        """按指定格式导出（默认为 EXPORT_FORMATS），返回生成的文件列表"""
+        formats = EXPORT_FORMATS if formats is None else formats
+        paths = []
+        if 'excel' in formats:
+            paths.append(self.export_excel(table, basename + '.xlsx', run_id))
+        if 'csv' in formats:
+            paths.append(self.export_csv(table, basename + '.csv', run_id))
+        if 'parquet' in formats:
+            paths.append(self.export_parquet(table, basename + '.parquet', run_id))
+        return [path for path in paths if path]
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
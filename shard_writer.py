@@ -0,0 +1,239 @@
+"""图片分片输出（WebDataset 风格的 tar 分片）
+
+几十万张图片以单个文件放在一个目录里时，列目录、备份和传输到训练集群都很慢。
+设置 IMAGE_OUTPUT=shards 后，各爬虫把图片写入 SHARD_DIR/<图片目录名>/<图片目录名>-000000.tar：
+- 每个样本两个成员：<键>.jpg 和 <键>.json（来源URL、站点、尺寸以及 ASIN、排名、页码等元数据），
+  键取原来的文件名去掉扩展名，例如 amazon_images/B0XXXX_1a2b3c.jpg 的键为 B0XXXX_1a2b3c；
+- 分片只追加写入，超过 SHARD_MAX_MB 后换下一个分片，不修改已写完的分片；
+  每 FSYNC_EVERY 个样本（或 FSYNC_INTERVAL 秒）统一 fsync 一次；
+- 每个分片旁边有同名的 .idx 索引（JSON lines，每行一个样本各成员的偏移量和长度），
+  读取单张图片时直接定位，不需要解开分片。索引行先留在内存中，fsync 分片之后才写入索引文件，
+  因此索引中出现的样本一定已经落盘。
+
+进程异常退出时，最后一个分片缺少 tar 结束块，但索引中的样本都已经写入并可以读取。
+    python shard_writer.py list shards/amazon_images
+    python shard_writer.py cat shards/amazon_images/amazon_images-000000.tar B0XXXX_1a2b3c > image.jpg
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import tarfile
+import logging
+import argparse
+import threading
+
+# 图片输出方式：files（逐个文件，默认）或 shards（tar 分片）
+IMAGE_OUTPUT = os.environ.get('IMAGE_OUTPUT', 'files')
+
+# 分片目录
+SHARD_DIR = os.environ.get('SHARD_DIR', 'shards')
+
+# 单个分片的大小上限（MB）
+SHARD_MAX_MB = float(os.environ.get('SHARD_MAX_MB', '512'))
+
+# 每写入多少个样本或经过多少秒 fsync 一次
+FSYNC_EVERY = int(os.environ.get('SHARD_FSYNC_EVERY', '64'))
+FSYNC_INTERVAL = float(os.environ.get('SHARD_FSYNC_INTERVAL', '5'))
+
+BLOCK_SIZE = tarfile.BLOCKSIZE
+
+
+def sharded():
+    return IMAGE_OUTPUT == 'shards'
+
+
+class ShardWriter:
+    """把样本追加写入 <目录>/<前缀>-NNNNNN.tar，并维护每个分片的偏移量索引（线程安全）"""
+
+    def __init__(self, directory, prefix=None, max_bytes=None, fsync_every=FSYNC_EVERY,
+                 fsync_interval=FSYNC_INTERVAL):
+        self.directory = directory
+        self.prefix = prefix or os.path.basename(os.path.normpath(directory))
+        self.max_bytes = max_bytes or int(SHARD_MAX_MB * 1024 * 1024)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._tar = None
+        self._index = None
+        self._index_lines = []
+        self.path = None
+        self.size = 0
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+        self.samples = 0
+        self.shards = 0
+
+    def _open_next(self):
+        """创建下一个编号的分片；多个进程写同一目录时用独占创建避免编号冲突"""
+        os.makedirs(self.directory, exist_ok=True)
+        pattern = re.compile(rf'^{re.escape(self.prefix)}-(\d{{6}})\.tar$')
+        numbers = [int(m.group(1)) for m in map(pattern.match, os.listdir(self.directory)) if m]
+        number = max(numbers) + 1 if numbers else 0
+        while True:
+            path = os.path.join(self.directory, f"{self.prefix}-{number:06d}.tar")
+            try:
+                self._tar = open(path, 'xb')
+                break
+            except FileExistsError:
+                number += 1
+        self._index = open(os.path.splitext(path)[0] + '.idx', 'a', encoding='utf-8')
+        self.path = path
+        self.size = 0
+        self.shards += 1
+        logging.info(f"新分片: {path}")
+
+    def _sync(self):
+        self._tar.flush()
+        os.fsync(self._tar.fileno())
+        # 样本数据落盘后才写入对应的索引行
+        self._index.writelines(self._index_lines)
+        self._index_lines = []
+        self._index.flush()
+        os.fsync(self._index.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def _finish_shard(self):
+        # tar 结束标记：两个全零块
+        self._tar.write(b'\0' * BLOCK_SIZE * 2)
+        self._sync()
+        self._tar.close()
+        self._index.close()
+        self._tar = self._index = None
+
+    def _write_member(self, name, data, mtime):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = mtime
+        info.mode = 0o644
+        header = info.tobuf(format=tarfile.PAX_FORMAT, encoding='utf-8')
+        offset = self.size + len(header)
+        self._tar.write(header)
+        self._tar.write(data)
+        padding = -len(data) % BLOCK_SIZE
+        if padding:
+            self._tar.write(b'\0' * padding)
+        self.size = offset + len(data) + padding
+        return [offset, len(data)]
+
+    def add(self, key, members):
+        """写入一个样本：members 为 {扩展名: bytes}，返回 (分片路径, 键)"""
+        needed = sum(len(data) + 3 * BLOCK_SIZE for data in members.values())
+        mtime = int(time.time())
+        with self._lock:
+            if self._tar is not None and self.size and self.size + needed > self.max_bytes:
+                self._finish_shard()
+            if self._tar is None:
+                self._open_next()
+            entry = {'key': key}
+            for ext, data in members.items():
+                entry[ext] = self._write_member(f"{key}.{ext}", data, mtime)
+            self._index_lines.append(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.samples += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._synced_at >= self.fsync_interval:
+                self._sync()
+            return self.path, key
+
+    def close(self):
+        with self._lock:
+            if self._tar is not None:
+                self._finish_shard()
+        if self.samples:
+            logging.info(f"分片输出 {self.directory}: {self.samples} 个样本, {self.shards} 个分片")
+
+
+class ShardReader:
+    """按 .idx 索引随机读取一个分片中的样本"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        with open(os.path.splitext(path)[0] + '.idx', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries[entry['key']] = entry
+
+    def keys(self):
+        return list(self.entries)
+
+    def read(self, key, ext='jpg'):
+        offset, size = self.entries[key][ext]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def meta(self, key):
+        return json.loads(self.read(key, 'json'))
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def writer_for(image_dir):
+    """图片目录对应的分片写入器（每个目录一个，同一进程内共用）"""
+    with _writers_lock:
+        if image_dir not in _writers:
+            name = os.path.basename(os.path.normpath(image_dir))
+            _writers[image_dir] = ShardWriter(os.path.join(SHARD_DIR, name), name)
+        return _writers[image_dir]
+
+
+def save_image(image, path, meta=None):
+    """保存 PIL 图片：files 模式写入 path；shards 模式编码为 JPEG 写入 path 所在目录对应的分片，
+    样本键为文件名去掉扩展名，meta 写入 JSON 附带文件。返回保存位置（文件路径或 分片路径#键）"""
+    if not sharded():
+        image.save(path, "JPEG")
+        return path
+
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG")
+    key = os.path.splitext(os.path.basename(path))[0]
+    sidecar = {'key': key, 'width': image.width, 'height': image.height, 'saved': time.time()}
+    sidecar.update({name: value for name, value in (meta or {}).items() if value is not None})
+    shard, key = writer_for(os.path.dirname(path)).add(key, {
+        'jpg': buffer.getvalue(),
+        'json': json.dumps(sidecar, ensure_ascii=False).encode('utf-8'),
+    })
+    return f"{shard}#{key}"
+
+
+def close():
+    """爬虫结束时调用：写完所有分片的结束标记并 fsync"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='查看图片分片')
+    commands = parser.add_subparsers(dest='command', required=True)
+    list_parser = commands.add_parser('list', help='列出目录中各分片的样本数和大小')
+    list_parser.add_argument('directory')
+    cat_parser = commands.add_parser('cat', help='把一个样本的成员写到标准输出')
+    cat_parser.add_argument('shard')
+    cat_parser.add_argument('key')
+    cat_parser.add_argument('--ext', default='jpg', help='成员扩展名（jpg 或 json）')
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for name in sorted(os.listdir(args.directory)):
+            if name.endswith('.tar'):
+                path = os.path.join(args.directory, name)
+                reader = ShardReader(path)
+                print(f"{name:<40}{len(reader.entries):>8} 个样本{os.path.getsize(path) / 1024 / 1024:>10.1f} MB")
+        return 0
+
+    sys.stdout.buffer.write(ShardReader(args.shard).read(args.key, args.ext))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,333 @@
+"""页面快照归档：录制抓到的每个页面，之后不开浏览器、不联网重新提取
+
+每个 driver.page_source（以及直接请求的页面HTML）以前解析一次就丢弃了，修改选择器或提取函数
+只能重新爬取线上网站。录制模式下，爬虫在取到HTML后调用 record(站点, URL, HTML, scroll=..., **附加信息)：
+- 正文按 SHA-256 去重，相同内容只保存一次（无限滚动页面的 HTML 往往相同，重复运行同一页也是）；
+- 正文逐条压缩（安装了 zstandard 时用 zstd，否则用 zlib），追加写入本次录制的 pack 文件，
+  每条单独压缩，因此可以按偏移量随机读取；
+- 索引（SQLite）记录每个页面的站点、URL、抓取时间、滚动序号、附加信息和正文哈希，
+  以及每个哈希所在的 pack 文件、偏移量、长度和压缩方式。
+
+回放模式按索引读取页面，用多个进程通过各站点插件的 extract() 重新提取，写入单独的结果库：
+    SNAPSHOT_RECORD=1 python Amazon.py                    # 录制（也可以用 --record 参数）
+    python snapshot_archive.py list                       # 查看录制的运行、页面数和压缩率
+    python snapshot_archive.py replay amazon --workers 8  # 重新提取全部录制的 Amazon 页面
+    python snapshot_archive.py replay booking --run <run_id> --export
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import zlib
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+import concurrent.futures
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 是否录制：设置 SNAPSHOT_RECORD=1 或爬虫命令行带 --record
+RECORD = os.environ.get('SNAPSHOT_RECORD', '0') != '0' or '--record' in sys.argv[1:]
+
+# 归档目录（索引和 pack 文件）
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', 'snapshots')
+
+# zstd 压缩级别；HTML 重复度高，较低级别已经有很好的压缩率
+ZSTD_LEVEL = int(os.environ.get('SNAPSHOT_ZSTD_LEVEL', '6'))
+
+# 累计多少个页面提交一次索引
+COMMIT_EVERY = 20
+
+
+def _compressor():
+    """返回 (压缩方式, 压缩函数)"""
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress
+    logging.warning("未安装 zstandard，页面快照改用 zlib 压缩")
+    return 'zlib', lambda data: zlib.compress(data, 6)
+
+
+def decompress(codec, data):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("该快照使用 zstd 压缩，需要安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    raise ValueError(f"未知的压缩方式: {codec}")
+
+
+def _scalar_meta(meta):
+    """只保留可以写入 JSON 的标量附加信息（例如 page、offset），跳过解析结果等对象"""
+    return {key: value for key, value in meta.items()
+            if value is None or isinstance(value, (str, int, float, bool))}
+
+
+class SnapshotArchive:
+    """快照索引（SQLite），录制和回放共用"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or SNAPSHOT_DIR
+        os.makedirs(os.path.join(self.directory, 'packs'), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(self.directory, 'index.sqlite'), timeout=30,
+                                     check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY, pack TEXT, offset INTEGER, length INTEGER, size INTEGER, codec TEXT
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT, site TEXT, url TEXT, captured REAL,
+                scroll INTEGER, meta TEXT, hash TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_site_run ON pages (site, run_id);
+        ''')
+        self._conn.commit()
+
+    def has_blob(self, content_hash):
+        return self._conn.execute('SELECT 1 FROM blobs WHERE hash = ?', (content_hash,)).fetchone() is not None
+
+    def runs(self):
+        """每次录制（run_id + 站点）的页面数、不同正文数、原始和压缩后的字节数"""
+        return self._conn.execute('''
+            SELECT p.run_id, p.site, COUNT(*), COUNT(DISTINCT p.hash), MIN(p.captured), MAX(p.captured),
+                   (SELECT SUM(b.size) FROM blobs b WHERE b.hash IN (SELECT hash FROM pages q
+                        WHERE q.run_id = p.run_id AND q.site = p.site)),
+                   (SELECT SUM(b.length) FROM blobs b WHERE b.hash IN (SELECT hash FROM pages q
+                        WHERE q.run_id = p.run_id AND q.site = p.site))
+            FROM pages p GROUP BY p.run_id, p.site ORDER BY MIN(p.captured)
+        ''').fetchall()
+
+    def pages(self, site, run_id=None):
+        """按录制顺序返回页面及正文位置：(id, url, captured, scroll, meta, pack, offset, length, codec)"""
+        sql = ('SELECT p.id, p.url, p.captured, p.scroll, p.meta, b.pack, b.offset, b.length, b.codec '
+               'FROM pages p JOIN blobs b ON b.hash = p.hash WHERE p.site = ?')
+        params = [site]
+        if run_id:
+            sql += ' AND p.run_id = ?'
+            params.append(run_id)
+        return self._conn.execute(sql + ' ORDER BY p.id', params).fetchall()
+
+    def read(self, pack, offset, length, codec):
+        with open(os.path.join(self.directory, 'packs', pack), 'rb') as f:
+            f.seek(offset)
+            return decompress(codec, f.read(length)).decode('utf-8')
+
+    def close(self):
+        self._conn.close()
+
+
+class SnapshotRecorder:
+    """录制一次运行的页面：正文去重后追加到本次的 pack 文件，索引批量提交（线程安全）"""
+
+    def __init__(self, directory=None):
+        self.archive = SnapshotArchive(directory)
+        self.run_id = time.strftime('%Y%m%d%H%M%S') + '-' + uuid.uuid4().hex[:6]
+        self.pack = f"{self.run_id}.pack"
+        self.codec, self._compress = _compressor()
+        self._lock = threading.Lock()
+        self._file = open(os.path.join(self.archive.directory, 'packs', self.pack), 'ab')
+        self._known = set()
+        self._blobs = []
+        self._pages = []
+        self.pages = 0
+        self.stored = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    def record(self, site, url, html, scroll=None, **meta):
+        data = html.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if content_hash not in self._known and not self.archive.has_blob(content_hash):
+                compressed = self._compress(data)
+                offset = self._file.tell()
+                self._file.write(compressed)
+                self._blobs.append((content_hash, self.pack, offset, len(compressed), len(data), self.codec))
+                self.stored += 1
+                self.stored_bytes += len(compressed)
+            self._known.add(content_hash)
+            self._pages.append((self.run_id, site, url, time.time(), scroll,
+                                json.dumps(_scalar_meta(meta), ensure_ascii=False), content_hash))
+            self.pages += 1
+            self.raw_bytes += len(data)
+            if len(self._pages) >= COMMIT_EVERY:
+                self._commit()
+
+    def _commit(self):
+        # 先写出正文再提交索引，索引里的位置总是可读的
+        self._file.flush()
+        conn = self.archive._conn
+        with conn:
+            conn.executemany('INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?, ?, ?)', self._blobs)
+            conn.executemany('INSERT INTO pages (run_id, site, url, captured, scroll, meta, hash) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)', self._pages)
+        self._blobs, self._pages = [], []
+
+    def close(self):
+        with self._lock:
+            self._commit()
+            self._file.close()
+        self.archive.close()
+        if self.pages:
+            ratio = self.stored_bytes / self.raw_bytes * 100 if self.raw_bytes else 0
+            logging.info(f"页面快照: 录制 {self.pages} 个页面（运行 {self.run_id}），新保存 {self.stored} 个正文，"
+                         f"{self.raw_bytes / 1024 / 1024:.1f} MB -> {self.stored_bytes / 1024 / 1024:.1f} MB ({ratio:.1f}%)")
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def record(site, url, html, scroll=None, **meta):
+    """录制一个页面；没有开启录制时立即返回"""
+    global _recorder
+    if not RECORD or not html:
+        return
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = SnapshotRecorder()
+                logging.info(f"页面快照录制到 {_recorder.archive.directory}（运行 {_recorder.run_id}，{_recorder.codec}）")
+    _recorder.record(site, url, html, scroll, **meta)
+
+
+def close():
+    """爬虫结束时调用：提交索引并关闭 pack 文件"""
+    global _recorder
+    with _recorder_lock:
+        recorder, _recorder = _recorder, None
+    if recorder:
+        recorder.close()
+
+
+# 回放（在工作进程中执行）
+
+_worker = {}
+
+
+def _init_replay_worker(directory, site):
+    from crawlers.base import get_crawler
+    _worker['directory'] = directory
+    _worker['crawler'] = get_crawler(site)
+    # 站点脚本导入时会配置日志，工作进程只输出警告和错误
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def _extract_chunk(rows):
+    """读取并提取一批页面，返回 [(页面id, 结果行, 资源数)]"""
+    from crawlers.base import Page
+    directory, crawler = _worker['directory'], _worker['crawler']
+    results = []
+    handles = {}
+    try:
+        for page_id, url, captured, scroll, meta, pack, offset, length, codec in rows:
+            f = handles.get(pack)
+            if f is None:
+                f = handles[pack] = open(os.path.join(directory, 'packs', pack), 'rb')
+            f.seek(offset)
+            html = decompress(codec, f.read(length)).decode('utf-8')
+            meta = json.loads(meta)
+            if scroll is not None:
+                meta.setdefault('scroll', scroll)
+            try:
+                extracted = crawler.extract(Page(url, html, meta))
+            except Exception as e:
+                logging.error(f"回放提取失败: 页面 {page_id} {url} - {str(e)}")
+                results.append((page_id, None, 0))
+                continue
+            results.append((page_id, extracted.records, len(extracted.assets)))
+    finally:
+        for f in handles.values():
+            f.close()
+    return results
+
+
+def replay(site, run_id=None, workers=None, db_path='replay_results.sqlite', export=False,
+           directory=None, chunk_size=16):
+    """用站点插件的 extract() 重新提取录制的页面，结果写入 db_path，返回 (页面数, 新结果数, 失败页数)"""
+    from crawlers.base import get_crawler
+    from result_store import ResultStore, TABLES
+
+    directory = directory or SNAPSHOT_DIR
+    archive = SnapshotArchive(directory)
+    rows = archive.pages(site, run_id)
+    archive.close()
+    if not rows:
+        logging.info(f"没有 {site} 的页面快照" + (f"（运行 {run_id}）" if run_id else ''))
+        return 0, 0, 0
+
+    crawler = get_crawler(site)
+    key = TABLES[crawler.table]['key']
+    store = ResultStore(db_path)
+    workers = workers or os.cpu_count() or 1
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    seen_keys = set()
+    records_total = failed = assets = 0
+    started = time.time()
+
+    # 按录制顺序合并（与爬取时相同的去重结果），提取在工作进程中并行
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_replay_worker,
+                                                initargs=(directory, site)) as executor:
+        for chunk_results in executor.map(_extract_chunk, chunks):
+            for page_id, records, asset_count in chunk_results:
+                if records is None:
+                    failed += 1
+                    continue
+                new_records = []
+                for record in records:
+                    if record.get(key) not in seen_keys:
+                        seen_keys.add(record.get(key))
+                        new_records.append(record)
+                crawler.persist(store, new_records)
+                records_total += len(new_records)
+                assets += asset_count
+    store.flush()
+
+    elapsed = time.time() - started
+    logging.info(f"[{site}] 回放 {len(rows)} 个页面, 新结果 {records_total} 条, 资源 {assets} 个, 失败 {failed} 页, "
+                 f"用时 {elapsed:.1f} 秒 ({len(rows) / max(elapsed, 1e-9):.1f} 页/秒, {workers} 个进程)")
+    if export:
+        paths = store.export(crawler.table, f"{crawler.export_basename}_replay", run_id=store.run_id)
+        logging.info(f"[{site}] 回放结果已导出到 {', '.join(paths)}")
+    store.close()
+    return len(rows), records_total, failed
+
+
+def main(argv=None):
+    from crawlers.scripts import SCRIPTS
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='页面快照归档：查看录制的运行、回放提取')
+    parser.add_argument('--dir', default=SNAPSHOT_DIR, help='归档目录')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='列出录制的运行')
+    replay_parser = commands.add_parser('replay', help='用站点插件重新提取录制的页面')
+    replay_parser.add_argument('site', choices=list(SCRIPTS))
+    replay_parser.add_argument('--run', help='只回放该次录制（默认全部）')
+    replay_parser.add_argument('--workers', type=int, help='提取进程数（默认CPU核数）')
+    replay_parser.add_argument('--db', default='replay_results.sqlite', help='回放结果库路径')
+    replay_parser.add_argument('--export', action='store_true', help='回放后导出 Excel/CSV')
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        archive = SnapshotArchive(args.dir)
+        print(f"{'运行':<24}{'站点':<12}{'页面':>7}{'正文':>7}{'原始 MB':>10}{'压缩 MB':>10}  时间")
+        for run_id, site, pages, blobs, first, last, size, length in archive.runs():
+            print(f"{run_id:<24}{site:<12}{pages:>7}{blobs:>7}{(size or 0) / 1024 / 1024:>10.1f}"
+                  f"{(length or 0) / 1024 / 1024:>10.1f}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(first))}")
+        archive.close()
+        return 0
+
+    _, _, failed = replay(args.site, args.run, args.workers, args.db, args.export, args.dir)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
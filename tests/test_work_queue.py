@@ -0,0 +1,145 @@
+"""工作队列的租约、到期和回收语义（SQLite 和 MemoryRedis 两种后端）
+
+    python -m pytest tests
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from work_queue import SQLiteWorkQueue, RedisWorkQueue, MemoryRedis, PENDING, LEASED, DONE, FAILED
+
+TIMEOUT = 0.05
+
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def make_queue(request, tmp_path):
+    queues = []
+
+    def make(visibility_timeout=TIMEOUT, max_attempts=3):
+        if request.param == 'sqlite':
+            queue = SQLiteWorkQueue(str(tmp_path / 'queue.sqlite'), visibility_timeout, max_attempts)
+        else:
+            queue = RedisWorkQueue(MemoryRedis(), visibility_timeout=visibility_timeout, max_attempts=max_attempts)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.close()
+
+
+def expire():
+    time.sleep(TIMEOUT * 2)
+
+
+def test_put_deduplicates_keys(make_queue):
+    queue = make_queue()
+    assert queue.put('pages', [('a', {'page': 1}), ('b', {'page': 2})]) == 2
+    assert queue.put('pages', [('a', {'page': 1}), ('c', {'page': 3})]) == 1
+    assert queue.stats('pages') == {PENDING: 3}
+
+
+def test_leased_items_are_invisible_until_acked(make_queue):
+    queue = make_queue(visibility_timeout=60)
+    queue.put('pages', [('a', {'page': 1}), ('b', {'page': 2})])
+
+    first = queue.lease('pages', 'w1')
+    second = queue.lease('pages', 'w2', limit=5)
+    assert [item.payload for item in first] == [{'page': 1}]
+    assert [item.payload for item in second] == [{'page': 2}]
+    assert first[0].attempts == 1
+    assert queue.lease('pages', 'w3') == []
+    assert queue.stats('pages') == {LEASED: 2}
+
+    assert queue.ack(first[0])
+    assert queue.nack(second[0], 'boom', retry=False)
+    assert queue.stats('pages') == {DONE: 1, FAILED: 1}
+
+
+def test_nack_requeues_until_max_attempts(make_queue):
+    queue = make_queue(visibility_timeout=60, max_attempts=2)
+    queue.put('pages', [('a', {'page': 1})])
+
+    item = queue.lease('pages', 'w1')[0]
+    assert queue.nack(item, 'boom')
+    item = queue.lease('pages', 'w1')[0]
+    assert item.attempts == 2
+    assert queue.nack(item, 'boom')
+    assert queue.lease('pages', 'w1') == []
+    assert queue.stats('pages') == {FAILED: 1}
+
+
+def test_expired_lease_is_released_to_another_worker(make_queue):
+    queue = make_queue()
+    queue.put('pages', [('a', {'page': 1})])
+
+    stale = queue.lease('pages', 'w1')[0]
+    expire()
+    fresh = queue.lease('pages', 'w2')
+    assert len(fresh) == 1 and fresh[0].attempts == 2
+
+    # 过期租约的持有者不能再确认、退回或延长
+    assert not queue.ack(stale)
+    assert not queue.nack(stale)
+    assert queue.extend([stale]) == 0
+    assert queue.ack(fresh[0])
+    assert queue.stats('pages') == {DONE: 1}
+
+
+def test_expired_lease_fails_after_max_attempts(make_queue):
+    queue = make_queue(max_attempts=2)
+    queue.put('pages', [('a', {'page': 1})])
+
+    queue.lease('pages', 'w1')
+    expire()
+    assert queue.lease('pages', 'w1')[0].attempts == 2
+    expire()
+    assert queue.lease('pages', 'w1') == []
+    assert queue.stats('pages') == {FAILED: 1}
+
+
+def test_extend_keeps_lease_past_visibility_timeout(make_queue):
+    queue = make_queue()
+    queue.put('pages', [('a', {'page': 1})])
+
+    item = queue.lease('pages', 'w1')[0]
+    for _ in range(3):
+        time.sleep(TIMEOUT / 2)
+        assert queue.extend([item]) == 1
+    assert queue.lease('pages', 'w2') == []
+    assert queue.ack(item)
+
+
+def test_reclaim_dead_returns_leases_to_queue(make_queue):
+    queue = make_queue(visibility_timeout=60)
+    queue.put('pages', [('a', {'page': 1})])
+    queue.put('images', [('x', {'url': 'x'})])
+
+    queue.heartbeat('dead')
+    dead_items = queue.lease('pages', 'dead') + queue.lease('images', 'dead')
+    time.sleep(0.02)
+    queue.heartbeat('alive')
+
+    assert queue.reclaim_dead(0.01, ['pages', 'images']) == 2
+    assert set(queue.workers()) == {'alive'}
+    for item in dead_items:
+        assert not queue.ack(item)
+    leased = queue.lease('pages', 'alive') + queue.lease('images', 'alive')
+    assert [item.attempts for item in leased] == [2, 2]
+
+
+def test_reclaim_dead_fails_items_at_max_attempts(make_queue):
+    queue = make_queue(visibility_timeout=60, max_attempts=1)
+    queue.put('pages', [('a', {'page': 1})])
+
+    queue.heartbeat('dead')
+    queue.lease('pages', 'dead')
+    time.sleep(0.02)
+
+    assert queue.reclaim_dead(0.01, ['pages']) == 1
+    assert queue.lease('pages', 'alive') == []
+    assert queue.stats('pages') == {FAILED: 1}
@@ -0,0 +1,607 @@
+"""多进程、多机器共享的工作队列（租约 + 确认）
+
+工作条目（一页搜索结果、一个 X 查询时间窗口、一张图片）由 worker 租用（lease）：
+租用后在可见性超时之前对其他 worker 不可见，处理成功后确认（ack），失败时退回（nack）
+并按尝试次数决定是否重试。worker 定期发送心跳并延长自己持有的租约；worker 进程或机器
+死亡后，其租约在心跳超时（reclaim_dead）或租约到期时自动回到队列。租约到期或被回收时，
+已租用 max_attempts 次的条目不再回到队列，而是标记为失败（反复使 worker 崩溃的条目不会无限重试）。
+
+两种后端接口相同：
+- SQLiteWorkQueue：单机多进程，基于 SQLite 的锁和事务；
+- RedisWorkQueue：多机器，使用支持 Lua 脚本（EVALSHA）的 Redis 兼容服务器，每次状态转换是一个脚本，
+  单进程调试时可以换成本地替身 MemoryRedis。
+open_work_queue('sqlite:///path' | 'redis://host:port/db' | 'memory://') 按地址创建。
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+from collections import namedtuple
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+# 租用到的工作条目：lease 为租约令牌，ack/nack/extend 时用于确认仍持有租约
+WorkItem = namedtuple('WorkItem', ['id', 'queue', 'payload', 'attempts', 'lease'])
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+
+
+class SQLiteWorkQueue:
+    """SQLite 工作队列（线程安全，多进程通过 SQLite 锁互斥）"""
+
+    def __init__(self, db_path='work_queue.sqlite', visibility_timeout=300, max_attempts=3):
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS work_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                queue TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                updated REAL,
+                UNIQUE (queue, key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_work_items_queue_state ON work_items (queue, state, lease_expires);
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY,
+                info TEXT,
+                last_seen REAL
+            );
+        """)
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def put(self, queue, items):
+        """批量加入 (key, payload) 条目，key 相同的条目只保留一个，返回新增数量"""
+        now = time.time()
+        rows = [(queue, key, json.dumps(payload, ensure_ascii=False), PENDING, now) for key, payload in items]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO work_items (queue, key, payload, state, updated) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            return conn.total_changes - before
+        return self._transaction(insert)
+
+    def lease(self, queue, worker_id, limit=1):
+        """租用最多 limit 个条目：待处理的条目，以及租约已过期的条目（已达到最大尝试次数的标记为失败）"""
+        now = time.time()
+
+        def take(conn):
+            conn.execute(
+                "UPDATE work_items SET state = ?, lease = NULL, last_error = ?, updated = ? "
+                "WHERE queue = ? AND state = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, 'lease expired', now, queue, LEASED, now, self.max_attempts)
+            )
+            rows = conn.execute(
+                "SELECT id, payload, attempts FROM work_items WHERE queue = ? "
+                "AND (state = ? OR (state = ? AND lease_expires < ?)) ORDER BY id LIMIT ?",
+                (queue, PENDING, LEASED, now, limit)
+            ).fetchall()
+            items = []
+            for item_id, payload, attempts in rows:
+                token = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE work_items SET state = ?, attempts = attempts + 1, worker = ?, lease = ?, "
+                    "lease_expires = ?, updated = ? WHERE id = ?",
+                    (LEASED, worker_id, token, now + self.visibility_timeout, now, item_id)
+                )
+                items.append(WorkItem(item_id, queue, json.loads(payload), attempts + 1, token))
+            return items
+        return self._transaction(take)
+
+    def ack(self, item):
+        """确认完成；租约已失效（被其他 worker 重新租用）时返回 False"""
+        def update(conn):
+            cursor = conn.execute(
+                "UPDATE work_items SET state = ?, lease = NULL, updated = ? WHERE id = ? AND lease = ?",
+                (DONE, time.time(), item.id, item.lease)
+            )
+            return cursor.rowcount == 1
+        return self._transaction(update)
+
+    def nack(self, item, error=None, retry=True):
+        """退回条目：未超过最大尝试次数时重新排队，否则标记为失败"""
+        state = PENDING if retry and item.attempts < self.max_attempts else FAILED
+
+        def update(conn):
+            cursor = conn.execute(
+                "UPDATE work_items SET state = ?, lease = NULL, last_error = ?, updated = ? WHERE id = ? AND lease = ?",
+                (state, str(error) if error is not None else None, time.time(), item.id, item.lease)
+            )
+            return cursor.rowcount == 1
+        return self._transaction(update)
+
+    def extend(self, items):
+        """延长仍持有的租约，返回仍有效的条目数量"""
+        now = time.time()
+
+        def update(conn):
+            extended = 0
+            for item in items:
+                cursor = conn.execute(
+                    "UPDATE work_items SET lease_expires = ? WHERE id = ? AND lease = ? AND state = ?",
+                    (now + self.visibility_timeout, item.id, item.lease, LEASED)
+                )
+                extended += cursor.rowcount
+            return extended
+        return self._transaction(update)
+
+    def heartbeat(self, worker_id, info=None):
+        self._transaction(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO workers (worker_id, info, last_seen) VALUES (?, ?, ?)",
+            (worker_id, json.dumps(info or {}, ensure_ascii=False), time.time())
+        ))
+
+    def reclaim_dead(self, dead_after, queues=()):
+        """心跳超过 dead_after 秒的 worker 视为死亡，其租约立即回到队列（已达到最大尝试次数的标记为失败），
+        返回回收数量
+
+        SQLite 按 worker 回收所有队列中的租约，queues 只为与 RedisWorkQueue 接口一致。
+        """
+        cutoff = time.time() - dead_after
+
+        def update(conn):
+            dead = [row[0] for row in conn.execute("SELECT worker_id FROM workers WHERE last_seen < ?", (cutoff,))]
+            reclaimed = 0
+            for worker_id in dead:
+                cursor = conn.execute(
+                    "UPDATE work_items SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, lease = NULL, "
+                    "last_error = ?, updated = ? WHERE state = ? AND worker = ?",
+                    (self.max_attempts, FAILED, PENDING, 'worker dead', time.time(), LEASED, worker_id)
+                )
+                reclaimed += cursor.rowcount
+                conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+            return reclaimed
+        reclaimed = self._transaction(update)
+        if reclaimed:
+            logging.warning(f"回收失联 worker 的 {reclaimed} 个租约")
+        return reclaimed
+
+    def stats(self, queue):
+        """各状态的条目数量"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM work_items WHERE queue = ? GROUP BY state", (queue,)
+            ).fetchall()
+        return dict(rows)
+
+    def workers(self):
+        """{worker_id: (info, 距上次心跳的秒数)}"""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute("SELECT worker_id, info, last_seen FROM workers").fetchall()
+        return {worker_id: (json.loads(info or '{}'), now - last_seen) for worker_id, info, last_seen in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# 各 Lua 脚本共用的 KEYS 顺序
+_REDIS_KEYS = ('pending', 'leased', 'items', 'attempts', 'leases', 'owners', 'errors', 'stats')
+
+# 租约结束（到期、worker 死亡、退回）后：未达到最大尝试次数时放回队尾，否则标记为失败
+_LUA_SETTLE = """
+local function settle(id, max_attempts, error, retry)
+    redis.call('HDEL', KEYS[5], id)
+    redis.call('HDEL', KEYS[6], id)
+    if error and error ~= '' then
+        redis.call('HSET', KEYS[7], id, error)
+    end
+    local attempts = tonumber(redis.call('HGET', KEYS[4], id) or '0')
+    if retry and attempts < max_attempts then
+        redis.call('RPUSH', KEYS[1], id)
+        return 0
+    end
+    redis.call('HINCRBY', KEYS[8], 'failed', 1)
+    return 1
+end
+"""
+
+_LUA_SCRIPTS = {
+    # ARGV: 去重键, 条目ID, payload, ...
+    'put': """
+local added = 0
+for i = 1, #ARGV, 3 do
+    if redis.call('HSETNX', KEYS[9], ARGV[i], ARGV[i + 1]) == 1 then
+        redis.call('HSET', KEYS[3], ARGV[i + 1], ARGV[i + 2])
+        redis.call('HSET', KEYS[4], ARGV[i + 1], 0)
+        redis.call('RPUSH', KEYS[1], ARGV[i + 1])
+        added = added + 1
+    end
+end
+return added
+""",
+    # ARGV: 当前时间, 新租约到期时间, 最大尝试次数, worker, 租约令牌...
+    'lease': _LUA_SETTLE + """
+local max_attempts = tonumber(ARGV[3])
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])) do
+    redis.call('ZREM', KEYS[2], id)
+    settle(id, max_attempts, 'lease expired', true)
+end
+local leased = {}
+local n = 0
+while n < #ARGV - 4 do
+    local id = redis.call('LPOP', KEYS[1])
+    if not id then
+        break
+    end
+    local payload = redis.call('HGET', KEYS[3], id)
+    if payload then
+        n = n + 1
+        local attempts = redis.call('HINCRBY', KEYS[4], id, 1)
+        redis.call('HSET', KEYS[5], id, ARGV[4 + n])
+        redis.call('HSET', KEYS[6], id, ARGV[4])
+        redis.call('ZADD', KEYS[2], ARGV[2], id)
+        leased[n] = {id, payload, attempts, ARGV[4 + n]}
+    end
+end
+return leased
+""",
+    # ARGV: 新租约到期时间, 条目ID, 租约令牌, ...
+    'extend': """
+local extended = 0
+for i = 2, #ARGV, 2 do
+    if redis.call('HGET', KEYS[5], ARGV[i]) == ARGV[i + 1] and redis.call('ZSCORE', KEYS[2], ARGV[i]) then
+        redis.call('ZADD', KEYS[2], 'XX', ARGV[1], ARGV[i])
+        extended = extended + 1
+    end
+end
+return extended
+""",
+    # ARGV: 条目ID, 租约令牌
+    'ack': """
+if redis.call('HGET', KEYS[5], ARGV[1]) ~= ARGV[2] or redis.call('ZREM', KEYS[2], ARGV[1]) == 0 then
+    return 0
+end
+for i = 3, 7 do
+    redis.call('HDEL', KEYS[i], ARGV[1])
+end
+redis.call('HINCRBY', KEYS[8], 'done', 1)
+return 1
+""",
+    # ARGV: 条目ID, 租约令牌, 错误信息, 是否重试（1/0）, 最大尝试次数
+    'nack': _LUA_SETTLE + """
+if redis.call('HGET', KEYS[5], ARGV[1]) ~= ARGV[2] or redis.call('ZREM', KEYS[2], ARGV[1]) == 0 then
+    return 0
+end
+settle(ARGV[1], tonumber(ARGV[5]), ARGV[3], ARGV[4] == '1')
+return 1
+""",
+    # ARGV: 最大尝试次数, 死亡的 worker...
+    'reclaim': _LUA_SETTLE + """
+local dead = {}
+for i = 2, #ARGV do
+    dead[ARGV[i]] = true
+end
+local reclaimed = 0
+for _, id in ipairs(redis.call('ZRANGE', KEYS[2], 0, -1)) do
+    local owner = redis.call('HGET', KEYS[6], id)
+    if owner and dead[owner] then
+        redis.call('ZREM', KEYS[2], id)
+        settle(id, tonumber(ARGV[1]), 'worker dead', true)
+        reclaimed = reclaimed + 1
+    end
+end
+return reclaimed
+""",
+}
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisWorkQueue:
+    """Redis 兼容服务器上的工作队列
+
+    每个队列使用以下键（prefix 默认 crawler）：
+    {prefix}:{queue}:pending   列表，待处理的条目ID
+    {prefix}:{queue}:leased    有序集合，租用中的条目ID -> 租约到期时间
+    {prefix}:{queue}:items     哈希，条目ID -> payload JSON
+    {prefix}:{queue}:attempts  哈希，条目ID -> 已租用次数
+    {prefix}:{queue}:leases    哈希，条目ID -> 当前租约令牌
+    {prefix}:{queue}:owners    哈希，条目ID -> 持有租约的 worker
+    {prefix}:{queue}:errors    哈希，条目ID -> 最近一次错误
+    {prefix}:{queue}:stats     哈希，done / failed 计数
+    {prefix}:{queue}:keys      哈希，去重键 -> 条目ID
+    {prefix}:workers           哈希，worker_id -> JSON（info、last_seen）
+    加入、租用、延长、确认、退回和回收都在服务器端的 Lua 脚本中一次完成：租用时条目从 pending
+    移入 leased 与写入租约令牌是同一个原子操作，worker 在租用途中死亡不会丢失条目，
+    延长租约也不会与到期回收交错。到期或回收时已达到 max_attempts 的条目标记为失败。
+    """
+
+    def __init__(self, client, prefix='crawler', visibility_timeout=300, max_attempts=3):
+        self.client = client
+        self.prefix = prefix
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._scripts = {name: client.register_script(source) for name, source in _LUA_SCRIPTS.items()}
+
+    def _key(self, queue, name):
+        return f"{self.prefix}:{queue}:{name}"
+
+    def _run(self, script, queue, *args):
+        keys = [self._key(queue, name) for name in _REDIS_KEYS + ('keys',)]
+        return self._scripts[script](keys=keys, args=list(args))
+
+    def put(self, queue, items):
+        args = []
+        for key, payload in items:
+            args += [key, uuid.uuid4().hex, json.dumps(payload, ensure_ascii=False)]
+        return int(self._run('put', queue, *args)) if args else 0
+
+    def lease(self, queue, worker_id, limit=1):
+        """租用最多 limit 个条目；先把到期的租约放回队列（或标记为失败）"""
+        now = time.time()
+        tokens = [uuid.uuid4().hex for _ in range(limit)]
+        leased = self._run('lease', queue, now, now + self.visibility_timeout, self.max_attempts, worker_id, *tokens)
+        return [WorkItem(_text(item_id), queue, json.loads(payload), int(attempts), _text(token))
+                for item_id, payload, attempts, token in leased]
+
+    def ack(self, item):
+        return bool(self._run('ack', item.queue, item.id, item.lease))
+
+    def nack(self, item, error=None, retry=True):
+        return bool(self._run('nack', item.queue, item.id, item.lease, '' if error is None else str(error),
+                              1 if retry else 0, self.max_attempts))
+
+    def extend(self, items):
+        by_queue = {}
+        for item in items:
+            by_queue.setdefault(item.queue, []).extend([item.id, item.lease])
+        deadline = time.time() + self.visibility_timeout
+        return sum(int(self._run('extend', queue, deadline, *args)) for queue, args in by_queue.items())
+
+    def heartbeat(self, worker_id, info=None):
+        self.client.hset(f"{self.prefix}:workers", worker_id,
+                         json.dumps({'info': info or {}, 'last_seen': time.time()}, ensure_ascii=False))
+
+    def reclaim_dead(self, dead_after, queues=()):
+        """心跳超过 dead_after 秒的 worker 视为死亡，其在 queues 中的租约立即回到队列"""
+        cutoff = time.time() - dead_after
+        dead = [_text(worker_id) for worker_id, state in self.client.hgetall(f"{self.prefix}:workers").items()
+                if json.loads(state)['last_seen'] < cutoff]
+        if not dead:
+            return 0
+        reclaimed = sum(int(self._run('reclaim', queue, self.max_attempts, *dead)) for queue in queues)
+        for worker_id in dead:
+            self.client.hdel(f"{self.prefix}:workers", worker_id)
+        if reclaimed:
+            logging.warning(f"回收失联 worker 的 {reclaimed} 个租约")
+        return reclaimed
+
+    def stats(self, queue):
+        counts = {PENDING: self.client.llen(self._key(queue, 'pending')),
+                  LEASED: self.client.zcard(self._key(queue, 'leased'))}
+        for state, count in self.client.hgetall(self._key(queue, 'stats')).items():
+            counts[_text(state)] = int(count)
+        return {state: count for state, count in counts.items() if count}
+
+    def workers(self):
+        now = time.time()
+        result = {}
+        for worker_id, state in self.client.hgetall(f"{self.prefix}:workers").items():
+            state = json.loads(state)
+            result[_text(worker_id)] = (state['info'], now - state['last_seen'])
+        return result
+
+    def close(self):
+        close = getattr(self.client, 'close', None)
+        if close:
+            close()
+
+
+class MemoryRedis:
+    """进程内的 Redis 替身（单进程调试、基准测试和测试用）
+
+    只实现 RedisWorkQueue 直接用到的命令；Lua 脚本由同名的 Python 方法代替，
+    在同一把锁内执行，与服务器端脚本一样是原子的。
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._data = {}
+
+    def _get(self, key, factory):
+        return self._data.setdefault(key, factory())
+
+    def hset(self, key, field, value):
+        with self._lock:
+            self._get(key, dict)[field] = value
+
+    def hdel(self, key, field):
+        with self._lock:
+            return 1 if self._data.get(key, {}).pop(field, None) is not None else 0
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._data.get(key, {}))
+
+    def llen(self, key):
+        with self._lock:
+            return len(self._data.get(key, []))
+
+    def zcard(self, key):
+        with self._lock:
+            return len(self._data.get(key, {}))
+
+    def register_script(self, source):
+        script = getattr(self, '_script_' + next(name for name, lua in _LUA_SCRIPTS.items() if lua == source))
+
+        def run(keys, args):
+            with self._lock:
+                data = {name: self._get(key, list if name == 'pending' else dict)
+                        for name, key in zip(_REDIS_KEYS + ('keys',), keys)}
+                return script(data, [str(arg) for arg in args])
+        return run
+
+    # 以下方法与 _LUA_SCRIPTS 中的同名脚本一一对应，k 为 键名 -> 数据（列表或字典）
+
+    @staticmethod
+    def _settle(k, item_id, max_attempts, error, retry):
+        k['leases'].pop(item_id, None)
+        k['owners'].pop(item_id, None)
+        if error:
+            k['errors'][item_id] = error
+        if retry and int(k['attempts'].get(item_id, 0)) < max_attempts:
+            k['pending'].append(item_id)
+            return 0
+        k['stats']['failed'] = int(k['stats'].get('failed', 0)) + 1
+        return 1
+
+    def _script_put(self, k, args):
+        added = 0
+        for key, item_id, payload in zip(args[0::3], args[1::3], args[2::3]):
+            if key not in k['keys']:
+                k['keys'][key] = item_id
+                k['items'][item_id] = payload
+                k['attempts'][item_id] = 0
+                k['pending'].append(item_id)
+                added += 1
+        return added
+
+    def _script_lease(self, k, args):
+        now, deadline, max_attempts, worker_id, tokens = float(args[0]), float(args[1]), int(args[2]), args[3], args[4:]
+        for item_id, expires in sorted(k['leased'].items(), key=lambda kv: kv[1]):
+            if expires <= now:
+                del k['leased'][item_id]
+                self._settle(k, item_id, max_attempts, 'lease expired', True)
+        leased = []
+        while len(leased) < len(tokens) and k['pending']:
+            item_id = k['pending'].pop(0)
+            if item_id in k['items']:
+                token = tokens[len(leased)]
+                k['attempts'][item_id] = attempts = int(k['attempts'].get(item_id, 0)) + 1
+                k['leases'][item_id] = token
+                k['owners'][item_id] = worker_id
+                k['leased'][item_id] = deadline
+                leased.append([item_id, k['items'][item_id], attempts, token])
+        return leased
+
+    def _script_extend(self, k, args):
+        deadline, extended = float(args[0]), 0
+        for item_id, token in zip(args[1::2], args[2::2]):
+            if k['leases'].get(item_id) == token and item_id in k['leased']:
+                k['leased'][item_id] = deadline
+                extended += 1
+        return extended
+
+    def _script_ack(self, k, args):
+        item_id, token = args[0], args[1]
+        if k['leases'].get(item_id) != token or k['leased'].pop(item_id, None) is None:
+            return 0
+        for name in ('items', 'attempts', 'leases', 'owners', 'errors'):
+            k[name].pop(item_id, None)
+        k['stats']['done'] = int(k['stats'].get('done', 0)) + 1
+        return 1
+
+    def _script_nack(self, k, args):
+        item_id, token, error, retry, max_attempts = args
+        if k['leases'].get(item_id) != token or k['leased'].pop(item_id, None) is None:
+            return 0
+        self._settle(k, item_id, int(max_attempts), error, retry == '1')
+        return 1
+
+    def _script_reclaim(self, k, args):
+        max_attempts, dead, reclaimed = int(args[0]), set(args[1:]), 0
+        for item_id in list(k['leased']):
+            if k['owners'].get(item_id) in dead:
+                del k['leased'][item_id]
+                self._settle(k, item_id, max_attempts, 'worker dead', True)
+                reclaimed += 1
+        return reclaimed
+
+
+def open_work_queue(url='sqlite:///work_queue.sqlite', **kwargs):
+    """按地址创建工作队列：sqlite:///路径、redis://主机:端口/库 或 memory://"""
+    if url.startswith('redis://') or url.startswith('rediss://'):
+        if redis is None:
+            raise RuntimeError("使用 Redis 工作队列需要安装 redis 包: pip install redis")
+        return RedisWorkQueue(redis.Redis.from_url(url), **kwargs)
+    if url.startswith('memory://'):
+        return RedisWorkQueue(MemoryRedis(), **kwargs)
+    path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else url
+    return SQLiteWorkQueue(path, **kwargs)
+
+
+class LeaseKeeper:
+    """后台心跳线程：定期上报 worker 状态并延长当前持有的租约"""
+
+    def __init__(self, queue, worker_id, interval=None, info=None):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.interval = interval or max(1.0, queue.visibility_timeout / 3)
+        self.info = info or {}
+        self._held = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def hold(self, item):
+        with self._lock:
+            self._held[(item.queue, item.id)] = item
+
+    def release(self, item):
+        with self._lock:
+            self._held.pop((item.queue, item.id), None)
+
+    def beat(self):
+        with self._lock:
+            held = list(self._held.values())
+        try:
+            self.queue.heartbeat(self.worker_id, dict(self.info, leases=len(held)))
+            if held:
+                self.queue.extend(held)
+        except Exception as e:
+            logging.warning(f"发送心跳失败: {str(e)}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.beat()
+
+    def start(self):
+        self.beat()
+        self._thread = threading.Thread(target=self._run, name='lease-keeper', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)